@@ -58,8 +58,11 @@
 #include <string>
 
 #include "UUID.h"
+#include "BlockCodec.h"
+#include <tbb/parallel_for.h>
 
 #define PMEM_OFFSET 8
+#define COMPRESSION_BATCH 256 // Blocks compressed in parallel before being queued
 #define MAX_RETRIES 5
 
 CacheTable* ArrayDataStore::getStaticcache( const char *table_name, const char *keyspace_name,
@@ -404,6 +407,32 @@ void ArrayDataStore::store_numpy_partition_into_cas(const uint64_t *storage_id ,
         cache->put_crow(keys, values);
 }
 
+/***
+ * Stores the partitions of an array, compressing them in parallel first if the array is compressed.
+ * Takes the ownership of the data of the partitions
+ * @param storage_id identifying the numpy ndarray
+ * @param metadata ndarray characteristics
+ * @param parts partitions to store
+ */
+void ArrayDataStore::store_numpy_partitions_into_cas(const uint64_t *storage_id, const ArrayMetadata &metadata,
+                                                     std::vector<Partition> &parts) const {
+    if (metadata.is_compressed()) {
+        try {
+            tbb::parallel_for(size_t(0), parts.size(), [&](size_t i) {
+                void *compressed = BlockCodec::compress(metadata, parts[i].data);
+                free(parts[i].data);
+                parts[i].data = compressed;
+            });
+        } catch (...) {
+            for (const Partition &part : parts) free(part.data);
+            throw;
+        }
+    }
+    for (const Partition &part : parts) {
+        store_numpy_partition_into_cas(storage_id, part);
+    }
+}
+
 void ArrayDataStore::wait_stores(void) const {
     cache->wait_elements();
 }
@@ -683,11 +712,16 @@ void ArrayDataStore::store_numpy_into_cas(const uint64_t *storage_id, ArrayMetad
     SpaceFillingCurve::PartitionGenerator *partitions_it = this->partitioner.make_partitions_generator(metadata, data);
 
     //std::cout<< "store_numpy_into_cas " << std::endl;
+    std::vector<Partition> parts;
     while (!partitions_it->isDone()) {
-        Partition part = partitions_it->getNextPartition();
+        parts.push_back(partitions_it->getNextPartition());
         //std::cout<< "  cluster_id " << part.cluster_id << " block_id "<<part.block_id<< std::endl;
-        store_numpy_partition_into_cas(storage_id, part);
+        if (parts.size() == COMPRESSION_BATCH) {
+            store_numpy_partitions_into_cas(storage_id, metadata, parts);
+            parts.clear();
+        }
     }
+    store_numpy_partitions_into_cas(storage_id, metadata, parts);
     //this->partitioner.serialize_metas();
     delete (partitions_it);
 
@@ -727,8 +761,7 @@ void ArrayDataStore::store_numpy_into_cas_by_coords(const uint64_t *storage_id,
     SpaceFillingCurve::PartitionGenerator *
     partitions_it = SpaceFillingCurve::make_partitions_generator(metadata, data, coord);
 
-    std::set<int32_t> clusters = {};
-    std::list<Partition> partitions = {};
+    std::vector<Partition> partitions = {};
 
     //std::cout<< "store_numpy_into_cas_by_coords " << std::endl;
     while (!partitions_it->isDone()) {
@@ -737,11 +770,7 @@ void ArrayDataStore::store_numpy_into_cas_by_coords(const uint64_t *storage_id,
         partitions.push_back(part);
     }
 
-    for (auto it = partitions.begin(); it != partitions.end(); ++it) {
-    //std::cout<< "  store partition" << std::endl;
-        auto part = *it;
-        store_numpy_partition_into_cas(storage_id, part);
-    }
+    store_numpy_partitions_into_cas(storage_id, metadata, partitions);
     //std::cout<< "store_numpy_into_cas_by_coords done" << std::endl;
     //this->partitioner.serialize_metas();
     delete (partitions_it);
@@ -814,6 +843,46 @@ ArrayMetadata *ArrayDataStore::read_metadata(const uint64_t *storage_id) const {
 }
 
 
+/***
+ * Copies into the array the blocks read in 'rows'. The blocks of a compressed array are decompressed
+ * and copied by a task of 'tasks', in parallel with the next reads. Takes the ownership of the rows
+ * @param partitions_it generator of the partitions of the array
+ * @param metadata ndarray characteristics
+ * @param partitions blocks read, pointing to the chunks of 'rows'
+ * @param rows rows read
+ * @param save memory of the array
+ * @param tasks group running the decompressions, to be waited for by the caller
+ */
+void ArrayDataStore::merge_rows(SpaceFillingCurve::PartitionGenerator *partitions_it, const ArrayMetadata &metadata,
+                                std::vector<Partition> partitions, std::vector<const TupleRow *> rows, void *save,
+                                tbb::task_group &tasks) const {
+    if (!metadata.is_compressed()) {
+        try {
+            partitions_it->merge_partitions(metadata, partitions, save);
+        } catch (...) {
+            for (const TupleRow *row:rows) delete (row);
+            throw;
+        }
+        for (const TupleRow *row:rows) delete (row);
+        return;
+    }
+    tasks.run([partitions_it, &metadata, partitions, rows, save]() {
+        std::vector<Partition> blocks;
+        try {
+            for (const Partition &part : partitions) {
+                blocks.emplace_back(part.cluster_id, part.block_id, BlockCodec::decompress(metadata, part.data));
+            }
+            partitions_it->merge_partitions(metadata, blocks, save);
+        } catch (...) {
+            for (const Partition &block : blocks) free(block.data);
+            for (const TupleRow *row:rows) delete (row);
+            throw;
+        }
+        for (const Partition &block : blocks) free(block.data);
+        for (const TupleRow *row:rows) delete (row);
+    });
+}
+
 /***
  * Reads a numpy ndarray by fetching the clusters indipendently
  * @param storage_id of the array to retrieve
@@ -825,13 +894,12 @@ void ArrayDataStore::read_numpy_from_cas(const uint64_t *storage_id, ArrayMetada
     uint32_t keys_size = (*--keys_metas->end()).size + (*--keys_metas->end()).position;
 
 
-    std::vector<const TupleRow *> result, all_results;
-    std::vector<Partition> all_partitions;
+    std::vector<const TupleRow *> cluster_keys;
+    std::vector<int32_t> cluster_ids;
 
     uint64_t *c_uuid = nullptr;
     char *buffer = nullptr;
     int32_t cluster_id = 0, offset = 0;
-    int32_t *block = nullptr;
     int32_t half_int = 0;//-1 >> sizeof(int32_t)/2; //TODO be done properly
 
     SpaceFillingCurve::PartitionGenerator *
@@ -854,31 +922,41 @@ void ArrayDataStore::read_numpy_from_cas(const uint64_t *storage_id, ArrayMetada
             offset = sizeof(uint64_t *);
             //Cluster id
             memcpy(buffer + offset, &cluster_id, sizeof(cluster_id));
-            //We fetch the data
-            TupleRow *block_key = new TupleRow(keys_metas, keys_size, buffer);
-            result = read_cache->get_crow(block_key);
-            delete (block_key);
-            //build cluster
-            all_results.insert(all_results.end(), result.begin(), result.end());
-            for (const TupleRow *row:result) {
-                block = (int32_t *) row->get_element(0);
-                char **chunk = (char **) row->get_element(1);
-                all_partitions.emplace_back(
-                       Partition((uint32_t) cluster_id + half_int, (uint32_t) *block + half_int, *chunk));
-            }
+            cluster_keys.push_back(new TupleRow(keys_metas, keys_size, buffer));
+            cluster_ids.push_back(cluster_id);
         } else {
             cached = true;
         }
     }
 
-
-    if (all_partitions.empty() && !cached) {
-        throw ModuleException("no npy found on sys");
+    //We fetch the data, the blocks of each cluster are copied into the array while the next clusters are read
+    bool found = false;
+    tbb::task_group tasks; // Decompression of the clusters of a compressed array
+    try {
+        read_cache->get_crows(cluster_keys, [&](size_t i, std::vector<const TupleRow *> &result) {
+            std::vector<Partition> partitions;
+            for (const TupleRow *row:result) {
+                int32_t *block = (int32_t *) row->get_element(0);
+                char **chunk = (char **) row->get_element(1);
+                partitions.emplace_back(
+                       Partition((uint32_t) cluster_ids[i] + half_int, (uint32_t) *block + half_int, *chunk));
+            }
+            found = found || !partitions.empty();
+            merge_rows(partitions_it, metadata, partitions, result, save, tasks);
+        });
+        tasks.wait();
+    } catch (...) {
+        try { tasks.wait(); } catch (...) {}
+        for (const TupleRow *key:cluster_keys) delete (key);
+        delete (partitions_it);
+        throw;
     }
-    partitions_it->merge_partitions(metadata, all_partitions, save);
-    for (const TupleRow *item:all_results) delete (item);
+    for (const TupleRow *key:cluster_keys) delete (key);
     delete (partitions_it);
 
+    if (!found && !cached) {
+        throw ModuleException("no npy found on sys");
+    }
 }
 
 void ArrayDataStore::read_numpy_from_cas_by_coords(const uint64_t *storage_id, ArrayMetadata &metadata,
@@ -886,12 +964,10 @@ void ArrayDataStore::read_numpy_from_cas_by_coords(const uint64_t *storage_id, A
 
 	std::shared_ptr<const std::vector<ColumnMeta> > keys_metas = read_cache->get_metadata()->get_keys();
 	uint32_t keys_size = (*--keys_metas->end()).size + (*--keys_metas->end()).position;
-	std::vector<const TupleRow *> result, all_results;
-	std::vector<Partition> all_partitions;
+	std::vector<const TupleRow *> block_keys;
 	uint64_t *c_uuid = nullptr;
 	char *buffer = nullptr;
 	int32_t offset = 0;
-	int32_t *block = nullptr;
 	int32_t half_int = 0;//-1 >> sizeof(int32_t)/2; //TODO be done properly
 
 	SpaceFillingCurve::PartitionGenerator *partitions_it;
@@ -900,12 +976,11 @@ void ArrayDataStore::read_numpy_from_cas_by_coords(const uint64_t *storage_id, A
 	} else {
 		partitions_it = SpaceFillingCurve::make_partitions_generator(metadata, nullptr, coord);
 	}
-	std::list<Partition> clusters = {};
+	std::vector<Partition> clusters = {};
 	while (!partitions_it->isDone()) {
 		clusters.push_back(partitions_it->getNextPartition());
 	}
-	std::list<Partition>::iterator it = clusters.begin();
-	for (; it != clusters.end(); ++it) {
+	for (const Partition &cluster : clusters) {
             buffer = (char *) malloc(keys_size);
             //UUID
             c_uuid = new uint64_t[2]{*storage_id, *(storage_id + 1)};
@@ -914,32 +989,41 @@ void ArrayDataStore::read_numpy_from_cas_by_coords(const uint64_t *storage_id, A
             memcpy(buffer, &c_uuid, sizeof(uint64_t *));
             offset = sizeof(uint64_t *);
             //Cluster id
-            memcpy(buffer + offset, &(*it).cluster_id, sizeof((*it).cluster_id));
+            memcpy(buffer + offset, &cluster.cluster_id, sizeof(cluster.cluster_id));
             //JJblock_id
-            offset += sizeof((*it).cluster_id);
-            memcpy(buffer + offset, &(*it).block_id, sizeof((*it).block_id));
-
-            //We fetch the data
-            TupleRow *block_key = new TupleRow(keys_metas, keys_size, buffer);
-            result = read_cache->get_crow(block_key);
-            delete (block_key);
-            //build cluster
-            all_results.insert(all_results.end(), result.begin(), result.end());
-            for (const TupleRow *row:result) { // A single row should be returned
-                //block = (int32_t *) row->get_element(0);
-                char **chunk = (char **) row->get_element(0);
-                all_partitions.emplace_back(
-                        Partition((uint32_t) (*it).cluster_id + half_int, (uint32_t) (*it).block_id + half_int, *chunk));
-            }
+            offset += sizeof(cluster.cluster_id);
+            memcpy(buffer + offset, &cluster.block_id, sizeof(cluster.block_id));
+            block_keys.push_back(new TupleRow(keys_metas, keys_size, buffer));
 	}
 
-	if (all_partitions.empty()) {
-		throw ModuleException("no npy found on sys for uuid " + UUID::UUID2str(storage_id));
+	//We fetch the data: all the blocks are requested at once (up to reader_par on the fly)
+	//and each one is copied into the array as soon as it arrives
+	bool found = false;
+	tbb::task_group tasks; // Decompression of the blocks of a compressed array
+	try {
+		read_cache->get_crows(block_keys, [&](size_t i, std::vector<const TupleRow *> &result) {
+			std::vector<Partition> partitions;
+			for (const TupleRow *row:result) { // A single row should be returned
+				char **chunk = (char **) row->get_element(0);
+				partitions.emplace_back(
+					Partition((uint32_t) clusters[i].cluster_id + half_int, (uint32_t) clusters[i].block_id + half_int, *chunk));
+			}
+			found = found || !partitions.empty();
+			merge_rows(partitions_it, metadata, partitions, result, save, tasks);
+		});
+		tasks.wait();
+	} catch (...) {
+		try { tasks.wait(); } catch (...) {}
+		for (const TupleRow *key:block_keys) delete (key);
+		delete (partitions_it);
+		throw;
 	}
-	partitions_it->merge_partitions(metadata, all_partitions, save);
-	for (const TupleRow *item:all_results) delete (item);
+	for (const TupleRow *key:block_keys) delete (key);
 	delete (partitions_it);
 
+	if (!found) {
+		throw ModuleException("no npy found on sys for uuid " + UUID::UUID2str(storage_id));
+	}
 }
 
 #ifdef ARROW
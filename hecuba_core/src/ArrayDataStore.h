@@ -8,6 +8,7 @@
 #include <set>
 
 #include <string.h>
+#include <tbb/task_group.h>
 
 
 class ArrayDataStore {
@@ -54,6 +55,11 @@ public:
 protected:
 
     void store_numpy_partition_into_cas(const uint64_t *storage_id , Partition part) const;
+    void store_numpy_partitions_into_cas(const uint64_t *storage_id, const ArrayMetadata &metadata,
+                                         std::vector<Partition> &parts) const;
+    void merge_rows(SpaceFillingCurve::PartitionGenerator *partitions_it, const ArrayMetadata &metadata,
+                    std::vector<Partition> partitions, std::vector<const TupleRow *> rows, void *save,
+                    tbb::task_group &tasks) const;
     uint32_t get_row_elements(ArrayMetadata &metadata) const;
 
 
@@ -0,0 +1,151 @@
+#include "BlockCodec.h"
+#include "ModuleException.h"
+
+#include <cstdlib>
+#include <vector>
+
+#ifdef HAVE_LZ4
+#include <lz4.h>
+#endif
+#ifdef HAVE_ZSTD
+#include <zstd.h>
+#endif
+
+#define ZSTD_LEVEL 1 // Blocks are compressed on every store, favour speed over ratio
+
+namespace {
+    /* Groups the i-th byte of every element, the bytes of the elements of an array
+     * (exponents, high order bytes) repeat much more than the elements themselves */
+    void shuffle(const char *input, char *output, uint64_t size, uint32_t elem_size) {
+        uint64_t nelem = size / elem_size;
+        for (uint32_t byte = 0; byte < elem_size; ++byte) {
+            char *out = output + byte * nelem;
+            for (uint64_t i = 0; i < nelem; ++i) out[i] = input[i * elem_size + byte];
+        }
+        memcpy(output + nelem * elem_size, input + nelem * elem_size, size - nelem * elem_size);
+    }
+
+    void unshuffle(const char *input, char *output, uint64_t size, uint32_t elem_size) {
+        uint64_t nelem = size / elem_size;
+        for (uint32_t byte = 0; byte < elem_size; ++byte) {
+            const char *in = input + byte * nelem;
+            for (uint64_t i = 0; i < nelem; ++i) output[i * elem_size + byte] = in[i];
+        }
+        memcpy(output + nelem * elem_size, input + nelem * elem_size, size - nelem * elem_size);
+    }
+
+    bool is_shuffled(const ArrayMetadata &metas) {
+        return (metas.partition_type & COMPRESSION_SHUFFLE) && metas.elem_size > 1;
+    }
+
+    std::string unsupported(const ArrayMetadata &metas) {
+        switch (metas.get_compression_codec()) {
+            case COMPRESSION_LZ4:
+                return "Hecuba was built without lz4 support";
+            case COMPRESSION_ZSTD:
+                return "Hecuba was built without zstd support";
+            default:
+                return "Unknown compression codec " + std::to_string(metas.get_compression_codec());
+        }
+    }
+}
+
+void *BlockCodec::compress(const ArrayMetadata &metas, const void *chunk) {
+    uint64_t size = *(const uint64_t *) chunk;
+    const char *raw = (const char *) chunk + sizeof(uint64_t);
+
+    std::vector<char> shuffled;
+    if (is_shuffled(metas)) {
+        shuffled.resize(size);
+        shuffle(raw, shuffled.data(), size, metas.elem_size);
+        raw = shuffled.data();
+    }
+
+    uint64_t header = 2 * sizeof(uint64_t);
+    uint64_t compressed_size = 0;
+    char *output = nullptr;
+    switch (metas.get_compression_codec()) {
+#ifdef HAVE_LZ4
+        case COMPRESSION_LZ4: {
+            int bound = LZ4_compressBound((int) size);
+            output = (char *) malloc(header + bound);
+            int rc = LZ4_compress_default(raw, output + header, (int) size, bound);
+            if (rc <= 0) {
+                free(output);
+                throw ModuleException("lz4 failed to compress a block");
+            }
+            compressed_size = (uint64_t) rc;
+            break;
+        }
+#endif
+#ifdef HAVE_ZSTD
+        case COMPRESSION_ZSTD: {
+            size_t bound = ZSTD_compressBound(size);
+            output = (char *) malloc(header + bound);
+            size_t rc = ZSTD_compress(output + header, bound, raw, size, ZSTD_LEVEL);
+            if (ZSTD_isError(rc)) {
+                free(output);
+                throw ModuleException(std::string("zstd failed to compress a block: ") + ZSTD_getErrorName(rc));
+            }
+            compressed_size = (uint64_t) rc;
+            break;
+        }
+#endif
+        default:
+            throw ModuleException(unsupported(metas));
+    }
+
+    uint64_t chunk_size = sizeof(uint64_t) + compressed_size;
+    memcpy(output, &chunk_size, sizeof(uint64_t));
+    memcpy(output + sizeof(uint64_t), &size, sizeof(uint64_t));
+    // The chunk stays queued until written, do not keep the slack of the bound
+    char *shrunk = (char *) realloc(output, header + compressed_size);
+    return shrunk ? shrunk : output;
+}
+
+void *BlockCodec::decompress(const ArrayMetadata &metas, const void *chunk) {
+    uint64_t chunk_size = *(const uint64_t *) chunk;
+    if (chunk_size < sizeof(uint64_t)) throw ModuleException("Corrupted compressed block");
+    uint64_t size = *((const uint64_t *) chunk + 1);
+    const char *compressed = (const char *) chunk + 2 * sizeof(uint64_t);
+    uint64_t compressed_size = chunk_size - sizeof(uint64_t);
+
+    char *output = (char *) malloc(sizeof(uint64_t) + size);
+    memcpy(output, &size, sizeof(uint64_t));
+    char *raw = output + sizeof(uint64_t);
+
+    std::vector<char> shuffled;
+    char *target = raw;
+    if (is_shuffled(metas)) {
+        shuffled.resize(size);
+        target = shuffled.data();
+    }
+
+    bool ok = false;
+    switch (metas.get_compression_codec()) {
+#ifdef HAVE_LZ4
+        case COMPRESSION_LZ4: {
+            int rc = LZ4_decompress_safe(compressed, target, (int) compressed_size, (int) size);
+            ok = rc >= 0 && (uint64_t) rc == size;
+            break;
+        }
+#endif
+#ifdef HAVE_ZSTD
+        case COMPRESSION_ZSTD: {
+            size_t rc = ZSTD_decompress(target, size, compressed, compressed_size);
+            ok = !ZSTD_isError(rc) && rc == size;
+            break;
+        }
+#endif
+        default:
+            free(output);
+            throw ModuleException(unsupported(metas));
+    }
+    if (!ok) {
+        free(output);
+        throw ModuleException("Corrupted compressed block");
+    }
+
+    if (is_shuffled(metas)) unshuffle(target, raw, size, metas.elem_size);
+    return output;
+}
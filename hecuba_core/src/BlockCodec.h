@@ -0,0 +1,18 @@
+#ifndef HFETCH_BLOCKCODEC_H
+#define HFETCH_BLOCKCODEC_H
+
+#include "SpaceFillingCurve.h"
+
+/***
+ * Compression of the blocks of an array, as selected by the high bits of its partition_type.
+ * A block is a chunk [uint64_t size][size bytes], a compressed block is a chunk whose
+ * bytes are [uint64_t raw size][compressed bytes].
+ */
+namespace BlockCodec {
+    // Returns a new chunk (malloc'ed) with the compressed content of the block 'chunk'
+    void *compress(const ArrayMetadata &metas, const void *chunk);
+    // Returns a new chunk (malloc'ed) with the block compressed in 'chunk'
+    void *decompress(const ArrayMetadata &metas, const void *chunk);
+}
+
+#endif //HFETCH_BLOCKCODEC_H
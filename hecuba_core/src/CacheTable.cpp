@@ -4,12 +4,14 @@
 #include "HecubaExtrae.h"
 
 #define default_cache_size 0
+#define default_reader_par 16
+#define default_negative_cache_ttl 1000 // milliseconds
 
 
 /***
  * Constructs a cache which takes and returns data encapsulated as pointers to TupleRow or PyObject
- * Follows Least Recently Used replacement strategy
- * @param size Max elements the cache will hold, afterwards replacement takes place
+ * The replacement strategy is chosen with 'cache_policy' (lru, clock or 2q), Least Recently Used by default
+ * @param size Max elements ('cache_size') and/or bytes ('cache_bytes') the cache will hold, afterwards replacement takes place
  * @param table Name of the table being represented
  * @param keyspace Name of the keyspace whose table belongs to
  * @param query Query ready to be bind with the keys
@@ -47,6 +49,74 @@ CacheTable::CacheTable(const TableMetadata *table_meta, CassSession *session,
         }
     }
 
+    int64_t cache_bytes = 0;
+    if (config.find("cache_bytes") != config.end()) {
+        std::string cache_bytes_str = config["cache_bytes"];
+        try {
+            cache_bytes = std::stoll(cache_bytes_str);
+            if (cache_bytes < 0) throw ModuleException("Cache bytes value must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for cache_bytes";
+            throw ModuleException(msg);
+        }
+    }
+
+    KVCachePolicy cache_policy = KVCachePolicy::LRU;
+    if (config.find("cache_policy") != config.end()) {
+        try {
+            cache_policy = parse_kvcache_policy(config["cache_policy"]);
+        }
+        catch (std::exception &e) {
+            throw ModuleException(std::string(e.what()) + " Malformed value in config for cache_policy");
+        }
+    }
+
+    int32_t negative_cache_size = 0;
+    if (config.find("negative_cache_size") != config.end()) {
+        std::string negative_cache_size_str = config["negative_cache_size"];
+        try {
+            negative_cache_size = std::stoi(negative_cache_size_str);
+            if (negative_cache_size < 0) throw ModuleException("Negative cache size value must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for negative_cache_size";
+            throw ModuleException(msg);
+        }
+    }
+
+    int64_t negative_cache_ttl = default_negative_cache_ttl;
+    if (config.find("negative_cache_ttl") != config.end()) {
+        std::string negative_cache_ttl_str = config["negative_cache_ttl"];
+        try {
+            negative_cache_ttl = std::stoll(negative_cache_ttl_str);
+            if (negative_cache_ttl <= 0) throw ModuleException("Negative cache TTL value must be > 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for negative_cache_ttl";
+            throw ModuleException(msg);
+        }
+    }
+    this->negative_cache_ttl_us = (uint64_t) negative_cache_ttl * 1000;
+
+    this->max_inflight_reads = default_reader_par;
+    if (config.find("reader_par") != config.end()) {
+        std::string reader_par_str = config["reader_par"];
+        try {
+            int32_t reader_par = std::stoi(reader_par_str);
+            if (reader_par <= 0) throw ModuleException("Reader parallelism value must be > 0");
+            this->max_inflight_reads = (uint32_t) reader_par;
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for reader_par";
+            throw ModuleException(msg);
+        }
+    }
+
 
     /** Parse names **/
     HecubaExtrae_event(HECUBACASS, HBCASS_PREPARES);
@@ -71,6 +141,7 @@ CacheTable::CacheTable(const TableMetadata *table_meta, CassSession *session,
     HecubaExtrae_event(HECUBADBG, HECUBA_TIMESTAMPGENERATOR);
     this->timestamp_gen = new TimestampGenerator();
     this->writer->set_timestamp_gen(this->timestamp_gen);
+    this->writer->set_stats(&this->stats);
     HecubaExtrae_event(HECUBADBG, HECUBA_END);
     this->topic_name = nullptr;
     this->consumer = nullptr;
@@ -78,7 +149,11 @@ CacheTable::CacheTable(const TableMetadata *table_meta, CassSession *session,
     this->should_table_meta_be_freed = free_table_meta;
 
     HecubaExtrae_event(HECUBADBG, HECUBA_KVCACHE);
-    if (cache_size) this->myCache = new KVCache<TupleRow, TupleRow>(cache_size);
+    // cache_bytes only adds a bound on top of cache_size, a cache_size of 0 keeps the cache disabled
+    if (cache_size)
+        this->myCache = new KVCache<TupleRow, TupleRow>((size_t) cache_size, (size_t) cache_bytes, cache_policy);
+    if (negative_cache_size)
+        this->negativeCache = new KVCache<TupleRow, uint64_t>((size_t) negative_cache_size);
     HecubaExtrae_event(HECUBADBG, HECUBA_END);
 };
 
@@ -113,6 +188,7 @@ CacheTable& CacheTable::operator = (const CacheTable& src) {
         if (this->timestamp_gen != nullptr) {delete (this->timestamp_gen);}
         this->timestamp_gen = new TimestampGenerator();
         this->writer->set_timestamp_gen(this->timestamp_gen);
+        this->writer->set_stats(&this->stats);
         if (this->topic_name != nullptr) { free(this->topic_name); }
         if (this->kafka_conf != nullptr) { free(this->kafka_conf); }
         if (this->consumer != nullptr) { free(this->consumer); }
@@ -128,8 +204,18 @@ CacheTable& CacheTable::operator = (const CacheTable& src) {
             this->kafka_conf = nullptr;
         }
         if (this->myCache !=nullptr) {delete(this->myCache);}
-        if (src.myCache != NULL) this->myCache = new KVCache<TupleRow, TupleRow>(src.myCache->get_max_cache_size());
+        if (src.myCache != NULL)
+            this->myCache = new KVCache<TupleRow, TupleRow>(src.myCache->get_max_cache_size(),
+                                                            src.myCache->get_max_cache_bytes(),
+                                                            src.myCache->get_policy(),
+                                                            src.myCache->get_nshards());
+        if (this->negativeCache != nullptr) { delete (this->negativeCache); }
+        this->negativeCache = nullptr;
+        if (src.negativeCache != nullptr)
+            this->negativeCache = new KVCache<TupleRow, uint64_t>(src.negativeCache->get_max_cache_size());
+        this->negative_cache_ttl_us = src.negative_cache_ttl_us;
         this->should_table_meta_be_freed = src.should_table_meta_be_freed;
+        this->max_inflight_reads = src.max_inflight_reads;
     }
 
     return *this;
@@ -142,6 +228,7 @@ CacheTable::~CacheTable() {
         myCache->clear();
         delete (myCache);
     }
+    delete (negativeCache);
     delete (keys_factory);
     delete (values_factory);
     if (prepared_query != NULL) cass_prepared_free(prepared_query);
@@ -176,12 +263,19 @@ const void CacheTable::wait_elements() const {
 
 void CacheTable::send_event(const TupleRow *keys, const TupleRow *values) {
     this->writer->send_event(keys, values);
-    if (myCache) this->myCache->add(*keys, values); //Inserts if not present, otherwise replaces
+    cache_add(keys, values); //Inserts if not present, otherwise replaces
 }
 
 void CacheTable::put_crow(const TupleRow *keys, const TupleRow *values) {
     this->writer->write_to_cassandra(keys, values);
-    if (myCache) this->myCache->add(*keys, values); //Inserts if not present, otherwise replaces
+    cache_add(keys, values); //Inserts if not present, otherwise replaces
+}
+
+void CacheTable::put_crows(const std::vector<const TupleRow *> &keys, const std::vector<const TupleRow *> &values) {
+    this->writer->write_to_cassandra(keys, values);
+    for (size_t i = 0; i < keys.size(); ++i) {
+        cache_add(keys[i], values[i]); //Inserts if not present, otherwise replaces
+    }
 }
 
 
@@ -223,12 +317,46 @@ const TupleRow* CacheTable::get_new_values_tuplerow(void* values) const {
 void CacheTable::add_to_cache(void *keys, void *values) {
     const TupleRow *k = keys_factory->make_tuple(keys);
     const TupleRow *v = values_factory->make_tuple(values);
-    if (myCache) this->myCache->add(*k, v);
+    cache_add(k, v);
     delete (k);
     delete (v);
 }
 void CacheTable::add_to_cache(const TupleRow  *keys, const TupleRow *values) {
-    if (myCache) this->myCache->add(keys, values);
+    cache_add(keys, values);
+}
+
+/* Adds the row to the cache if there is one, accounting the entries evicted to make room for it */
+void CacheTable::cache_add(const TupleRow *keys, const TupleRow *values) {
+    if (negativeCache) negativeCache->remove(*keys); // The key exists from now on
+    if (!myCache) return;
+    size_t evicted = this->myCache->add(*keys, values);
+    if (evicted) stats.add(HecubaStats::CACHE_EVICTIONS, evicted);
+}
+
+/* True if the key was found missing less than 'negative_cache_ttl' milliseconds ago */
+bool CacheTable::known_absent(const TupleRow *keys) {
+    if (!negativeCache) return false;
+    try {
+        if (HecubaStats::now_us() < negativeCache->get(*keys)) {
+            stats.add(HecubaStats::NEGATIVE_CACHE_HITS);
+            return true;
+        }
+        negativeCache->remove(*keys);
+    }
+    catch (std::out_of_range &ex) {}
+    return false;
+}
+
+void CacheTable::remember_absent(const TupleRow *keys) {
+    if (negativeCache) negativeCache->add(*keys, HecubaStats::now_us() + negative_cache_ttl_us);
+}
+
+size_t CacheTable::get_cache_entries() const {
+    return myCache ? myCache->size() : 0;
+}
+
+size_t CacheTable::get_cache_bytes() const {
+    return myCache ? myCache->bytes() : 0;
 }
 
 Writer * CacheTable::get_writer() {
@@ -468,6 +596,7 @@ std::vector<const TupleRow *> CacheTable::retrieve_from_cassandra(const TupleRow
     this->keys_factory->bind(statement, keys, 0);
 
     HecubaExtrae_event(HECUBACASS, HBCASS_READ);
+    uint64_t start = HecubaStats::now_us();
     CassFuture *query_future = cass_session_execute(session, statement);
     const CassResult *result = cass_future_get_result(query_future);
     HecubaExtrae_event(HECUBACASS, HBCASS_END);
@@ -483,6 +612,26 @@ std::vector<const TupleRow *> CacheTable::retrieve_from_cassandra(const TupleRow
     cass_future_free(query_future);
     cass_statement_free(statement);
 
+    std::vector<const TupleRow *> values = get_values_from_result(result, attr_name);
+    cass_result_free(result);
+    record_read(values, HecubaStats::now_us() - start);
+    return values;
+}
+
+/* Accounts a query to Cassandra which took 'us' microseconds and returned 'values' */
+void CacheTable::record_read(const std::vector<const TupleRow *> &values, uint64_t us) {
+    uint64_t nbytes = 0;
+    for (const TupleRow *v : values) nbytes += KVCacheWeigher<TupleRow>()(*v);
+    stats.add(HecubaStats::READS);
+    stats.add(HecubaStats::READ_BYTES, nbytes);
+    stats.record(HecubaStats::READ, us);
+}
+
+/*
+ * Builds the values TupleRows of all the rows in 'result'.
+ * attr_name: Build ONLY the column 'attr_name' of each row
+ */
+std::vector<const TupleRow *> CacheTable::get_values_from_result(const CassResult *result, const char *attr_name) const {
     uint32_t counter = 0;
     std::vector<const TupleRow *> values(cass_result_row_count(result));
 
@@ -501,7 +650,6 @@ std::vector<const TupleRow *> CacheTable::retrieve_from_cassandra(const TupleRow
         ++counter;
     }
     cass_iterator_free(it);
-    cass_result_free(result);
     return values;
 }
 
@@ -518,26 +666,171 @@ std::vector<const TupleRow *> CacheTable::retrieve_from_cassandra(void *keys, co
 
 
 std::vector<const TupleRow *> CacheTable::get_crow(const TupleRow *keys) {
+    uint64_t start = HecubaStats::now_us();
 
     if (myCache) {
         TupleRow *value;
         try {
             value = new TupleRow(myCache->get(*keys));
+            stats.add(HecubaStats::CACHE_HITS);
+            stats.record(HecubaStats::GET, HecubaStats::now_us() - start);
             return std::vector<const TupleRow *>{value};
         }
         catch (std::out_of_range &ex) {
             value = nullptr;
+            stats.add(HecubaStats::CACHE_MISSES);
         }
     }
 
+    if (known_absent(keys)) {
+        stats.record(HecubaStats::GET, HecubaStats::now_us() - start);
+        return std::vector<const TupleRow *>();
+    }
+
     std::vector<const TupleRow *> values = retrieve_from_cassandra(keys);
 
-    if (myCache && !values.empty()) myCache->add(*keys, values[0]);
+    if (!values.empty()) cache_add(keys, values[0]);
+    else remember_absent(keys);
 
+    stats.record(HecubaStats::GET, HecubaStats::now_us() - start);
     return values;
 }
 
 
+/***
+ * Retrieves the values of several keys. The keys found in the cache are served from it, the rest
+ * are requested to Cassandra with up to 'max_inflight_reads' concurrent queries and added to the cache.
+ * @param keys Keys to retrieve
+ * @return A vector with the values of each key, in the same order as 'keys'. The entry
+ * of a key which does not exist is an empty vector.
+ */
+std::vector<std::vector<const TupleRow *> > CacheTable::get_crows(const std::vector<const TupleRow *> &keys) {
+    std::vector<std::vector<const TupleRow *> > results(keys.size());
+    try {
+        get_crows(keys, [&results](size_t pos, std::vector<const TupleRow *> &values) {
+            results[pos] = std::move(values);
+        });
+    } catch (...) {
+        for (auto &values : results) {
+            for (const TupleRow *v : values) delete (v);
+        }
+        throw;
+    }
+    return results;
+}
+
+/***
+ * Retrieves the values of several keys and hands them to 'consume' as soon as each of them is available,
+ * so the caller can process the first values while the rest are still being read. The keys found in the
+ * cache are consumed first, the rest are requested to Cassandra with up to 'max_inflight_reads' concurrent
+ * queries and consumed in the order their answers arrive.
+ * @param keys Keys to retrieve
+ * @param consume Called once per key, from the calling thread, with the position of the key in 'keys' and
+ * its values (empty if the key does not exist), which from then on belong to 'consume'
+ */
+void CacheTable::get_crows(const std::vector<const TupleRow *> &keys,
+                           const std::function<void(size_t, std::vector<const TupleRow *> &)> &consume) {
+    std::vector<size_t> misses;
+    misses.reserve(keys.size());
+
+    for (size_t i = 0; i < keys.size(); ++i) {
+        if (myCache) {
+            TupleRow *value = nullptr;
+            try {
+                value = new TupleRow(myCache->get(*keys[i]));
+            }
+            catch (std::out_of_range &ex) {
+                stats.add(HecubaStats::CACHE_MISSES);
+            }
+            if (value) {
+                // Outside the try: an out_of_range thrown by consume is not a cache miss
+                stats.add(HecubaStats::CACHE_HITS);
+                std::vector<const TupleRow *> values = {value};
+                consume(i, values);
+                continue;
+            }
+        }
+        if (known_absent(keys[i])) {
+            std::vector<const TupleRow *> values;
+            consume(i, values);
+            continue;
+        }
+        misses.push_back(i);
+    }
+    if (misses.empty()) return;
+
+    // To avoid consistency problems we flush the elements pending to be written
+    this->writer->flush_elements();
+
+    // Reads on the fly with the position of their key and their issue time
+    std::deque<std::tuple<size_t, CassFuture *, uint64_t> > inflight;
+    size_t next = 0;
+    HecubaExtrae_event(HECUBACASS, HBCASS_READ);
+    try {
+        while (next < misses.size() || !inflight.empty()) {
+            while (next < misses.size() && inflight.size() < max_inflight_reads) {
+                CassStatement *statement = cass_prepared_bind(prepared_query);
+                try {
+                    this->keys_factory->bind(statement, keys[misses[next]], 0);
+                } catch (...) {
+                    // The reads already issued are waited for and freed below
+                    cass_statement_free(statement);
+                    throw;
+                }
+                CassFuture *query_future = cass_session_execute(session, statement);
+                cass_statement_free(statement);
+                try {
+                    inflight.push_back(std::make_tuple(misses[next], query_future, HecubaStats::now_us()));
+                } catch (...) {
+                    cass_future_wait(query_future);
+                    cass_future_free(query_future);
+                    throw;
+                }
+                ++next;
+            }
+
+            // Take any read already answered, waiting for the oldest one only if none is
+            auto ready = inflight.begin();
+            for (auto it = inflight.begin(); it != inflight.end(); ++it) {
+                if (cass_future_ready(std::get<1>(*it)) == cass_true) {
+                    ready = it;
+                    break;
+                }
+            }
+            size_t pos = std::get<0>(*ready);
+            CassFuture *query_future = std::get<1>(*ready);
+            uint64_t issued = std::get<2>(*ready);
+            inflight.erase(ready);
+
+            const CassResult *result = cass_future_get_result(query_future);
+            if (result == NULL) {
+                CassError rc = cass_future_error_code(query_future);
+                std::string error(cass_error_desc(rc));
+                cass_future_free(query_future);
+                throw ModuleException("CacheTable: Get rows error on result" + error);
+            }
+            cass_future_free(query_future);
+
+            std::vector<const TupleRow *> values = get_values_from_result(result, NULL);
+            cass_result_free(result);
+            record_read(values, HecubaStats::now_us() - issued);
+            if (!values.empty()) cache_add(keys[pos], values[0]);
+            else remember_absent(keys[pos]);
+            consume(pos, values);
+        }
+    } catch (...) {
+        // Nobody will wait for the reads still on the fly
+        for (auto &pending : inflight) {
+            cass_future_wait(std::get<1>(pending));
+            cass_future_free(std::get<1>(pending));
+        }
+        HecubaExtrae_event(HECUBACASS, HBCASS_END);
+        throw;
+    }
+    HecubaExtrae_event(HECUBACASS, HBCASS_END);
+}
+
+
 std::vector<const TupleRow *> CacheTable::get_crow(void *keys) {
     const TupleRow *tuple_key = keys_factory->make_tuple(keys);
     std::vector<const TupleRow *> result = get_crow(tuple_key);
@@ -574,4 +867,5 @@ void CacheTable::delete_crow(const TupleRow *keys) {
 
     //Remove entry from cache
     if (myCache) myCache->remove(*keys);
+    remember_absent(keys);
 }
@@ -6,11 +6,15 @@
 #include <cstring>
 #include <string>
 #include <memory>
+#include <deque>
+#include <tuple>
+#include <functional>
 
 #include "TimestampGenerator.h"
 #include "TupleRow.h"
 #include "TupleRowFactory.h"
 #include "KVCache.h"
+#include "HecubaStats.h"
 #include "Writer.h"
 #include <librdkafka/rdkafka.h>
 
@@ -36,9 +40,13 @@ public:
     /*** TupleRow ops ***/
 
     std::vector<const TupleRow *> get_crow(const TupleRow *py_keys);
+    std::vector<std::vector<const TupleRow *> > get_crows(const std::vector<const TupleRow *> &keys);
+    void get_crows(const std::vector<const TupleRow *> &keys,
+                   const std::function<void(size_t, std::vector<const TupleRow *> &)> &consume);
     std::vector<const TupleRow *> retrieve_from_cassandra(const TupleRow *keys, const char* attr_name=NULL );
 
     void put_crow(const TupleRow *keys, const TupleRow *values);
+    void put_crows(const std::vector<const TupleRow *> &keys, const std::vector<const TupleRow *> &values);
     void send_event(const TupleRow *keys, const TupleRow *values);
     void close_stream();
 
@@ -71,8 +79,23 @@ public:
     bool can_table_meta_be_freed() const{
         return should_table_meta_be_freed;
     }
+
+    /*** Statistics ***/
+    const HecubaStats &get_stats() const {
+        return stats;
+    }
+
+    size_t get_cache_entries() const;
+    size_t get_cache_bytes() const;
+
 private:
+    void cache_add(const TupleRow *keys, const TupleRow *values);
+    bool known_absent(const TupleRow *keys);
+    void remember_absent(const TupleRow *keys);
+    void record_read(const std::vector<const TupleRow *> &values, uint64_t us);
+
     rd_kafka_message_t * kafka_poll(void) ;
+    std::vector<const TupleRow *> get_values_from_result(const CassResult *result, const char *attr_name) const;
 
 
     /* CASSANDRA INFORMATION FOR RETRIEVING DATA */
@@ -80,10 +103,14 @@ private:
     const CassPrepared *prepared_query = nullptr, *delete_query = nullptr;
 
     bool disable_timestamps;
+    uint32_t max_inflight_reads = 16; // Max concurrent queries issued by get_crows
     TimestampGenerator *timestamp_gen = nullptr;
 
     //Key and Value copy constructed
     KVCache<TupleRow, TupleRow> *myCache = nullptr;
+    // Keys found missing, with the time in microseconds until they are trusted to be still missing
+    KVCache<TupleRow, uint64_t> *negativeCache = nullptr;
+    uint64_t negative_cache_ttl_us = 0;
 
     TupleRowFactory *keys_factory = nullptr;
     TupleRowFactory *values_factory = nullptr;
@@ -92,6 +119,7 @@ private:
     const TableMetadata *table_metadata = nullptr;
 
     Writer *writer = nullptr;
+    HecubaStats stats; // Not copied along the CacheTable, each copy accounts its own accesses
     /*** Stream information ***/
     char * topic_name = nullptr;
     std::map<std::string, std::string> stream_config;
@@ -0,0 +1,45 @@
+#include "HecubaStats.h"
+
+
+LatencyHistogram::LatencyHistogram() : count(0), total_us(0) {
+    for (auto &bucket : buckets) bucket.store(0, std::memory_order_relaxed);
+}
+
+void LatencyHistogram::record(uint64_t us) {
+    uint32_t i = 0;
+    while (i < nbuckets - 1 && us >= bucket_upper_bound(i)) ++i;
+    buckets[i].fetch_add(1, std::memory_order_relaxed);
+    count.fetch_add(1, std::memory_order_relaxed);
+    total_us.fetch_add(us, std::memory_order_relaxed);
+}
+
+
+HecubaStats::HecubaStats(HecubaStats *parent) : parent(parent) {
+    for (auto &counter : counters) counter.store(0, std::memory_order_relaxed);
+    for (auto &gauge : gauges) gauge.store(0, std::memory_order_relaxed);
+}
+
+HecubaStats &HecubaStats::global() {
+    static HecubaStats process_stats(nullptr);
+    return process_stats;
+}
+
+const char *HecubaStats::counter_name(Counter c) {
+    static const char *names[NCOUNTERS] = {"cache_hits", "cache_misses", "cache_evictions",
+                                           "negative_cache_hits",
+                                           "reads", "read_bytes",
+                                           "writes_queued", "writes_sent", "writes_completed", "write_retries",
+                                           "write_errors", "written_bytes", "write_batches",
+                                           "writes_coalesced", "writes_spilled"};
+    return names[c];
+}
+
+const char *HecubaStats::operation_name(Operation op) {
+    static const char *names[NOPERATIONS] = {"get", "read", "write_queue", "write"};
+    return names[op];
+}
+
+const char *HecubaStats::gauge_name(Gauge g) {
+    static const char *names[NGAUGES] = {"write_window"};
+    return names[g];
+}
@@ -0,0 +1,130 @@
+#ifndef HFETCH_STATS_H
+#define HFETCH_STATS_H
+
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+
+/***
+ * Histogram of latencies in microseconds with power of two buckets: bucket 'i' counts the samples
+ * in [2^(i-1), 2^i) us, bucket 0 the ones under 1us and the last one everything above.
+ * Updated with relaxed atomics, so it is cheap enough to be always on.
+ */
+class LatencyHistogram {
+public:
+    enum {
+        nbuckets = 32
+    };
+
+    LatencyHistogram();
+
+    void record(uint64_t us);
+
+    uint64_t get_count() const {
+        return count.load(std::memory_order_relaxed);
+    }
+
+    uint64_t get_total_us() const {
+        return total_us.load(std::memory_order_relaxed);
+    }
+
+    uint64_t get_bucket(uint32_t i) const {
+        return buckets[i].load(std::memory_order_relaxed);
+    }
+
+    /* Exclusive upper bound in microseconds of the bucket 'i' */
+    static uint64_t bucket_upper_bound(uint32_t i) {
+        return (uint64_t) 1 << i;
+    }
+
+private:
+    std::atomic<uint64_t> buckets[nbuckets];
+    std::atomic<uint64_t> count;
+    std::atomic<uint64_t> total_us;
+};
+
+
+/***
+ * Counters and latency histograms of the accesses done through a CacheTable and its Writer.
+ * Every update is also added to the parent, by default the process wide instance.
+ */
+class HecubaStats {
+public:
+    enum Counter {
+        CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS, NEGATIVE_CACHE_HITS,
+        READS, READ_BYTES,
+        WRITES_QUEUED, WRITES_SENT, WRITES_COMPLETED, WRITE_RETRIES, WRITE_ERRORS, WRITTEN_BYTES,
+        WRITE_BATCHES, WRITES_COALESCED, WRITES_SPILLED,
+        NCOUNTERS
+    };
+
+    enum Operation {
+        GET,            // get_crow, cache hits included
+        READ,           // query to Cassandra
+        WRITE_QUEUE,    // time a write waits in the WriterThread queue until it is sent
+        WRITE,          // time since a write is queued until Cassandra acknowledges it
+        NOPERATIONS
+    };
+
+    /* Current values instead of totals, they are not propagated to the parent */
+    enum Gauge {
+        WRITE_WINDOW,   // writes the WriterThread allows on the fly
+        NGAUGES
+    };
+
+    explicit HecubaStats(HecubaStats *parent = &global());
+
+    HecubaStats(const HecubaStats &) = delete;
+
+    HecubaStats &operator=(const HecubaStats &) = delete;
+
+    /* Process wide statistics, all the other instances report to it */
+    static HecubaStats &global();
+
+    static const char *counter_name(Counter c);
+
+    static const char *operation_name(Operation op);
+
+    static const char *gauge_name(Gauge g);
+
+    /* Microseconds from an arbitrary point, to compute the latencies */
+    static uint64_t now_us() {
+        return (uint64_t) std::chrono::duration_cast<std::chrono::microseconds>(
+                std::chrono::steady_clock::now().time_since_epoch()).count();
+    }
+
+    void add(Counter c, uint64_t n = 1) {
+        counters[c].fetch_add(n, std::memory_order_relaxed);
+        if (parent) parent->add(c, n);
+    }
+
+    void record(Operation op, uint64_t us) {
+        latencies[op].record(us);
+        if (parent) parent->record(op, us);
+    }
+
+    void set_gauge(Gauge g, uint64_t value) {
+        gauges[g].store(value, std::memory_order_relaxed);
+    }
+
+    uint64_t get_gauge(Gauge g) const {
+        return gauges[g].load(std::memory_order_relaxed);
+    }
+
+    uint64_t get(Counter c) const {
+        return counters[c].load(std::memory_order_relaxed);
+    }
+
+    const LatencyHistogram &get_latency(Operation op) const {
+        return latencies[op];
+    }
+
+private:
+    HecubaStats *parent;
+    std::atomic<uint64_t> counters[NCOUNTERS];
+    std::atomic<uint64_t> gauges[NGAUGES];
+    LatencyHistogram latencies[NOPERATIONS];
+};
+
+
+#endif //HFETCH_STATS_H
@@ -0,0 +1,78 @@
+#include "InflightWindow.h"
+#include "HecubaStats.h"
+
+#include <algorithm>
+
+// Completions after which the lowest latency seen is refreshed, so the baseline follows a slower cluster
+#define BASELINE_SAMPLES 1000
+// Without a target, latencies above this number of times the baseline shrink the window
+#define LATENCY_TOLERANCE 4
+// Latency from which the window never shrinks when the target is derived, below it the noise dominates
+#define MIN_LATENCY_LIMIT_US 1000
+
+InflightWindow::InflightWindow(uint32_t initial, uint32_t min, uint32_t max, uint64_t latency_target_us) :
+        min_window(min), max_window(max), latency_target_us(latency_target_us) {
+    window = std::min(std::max(initial, min), max);
+    HecubaStats::global().set_gauge(HecubaStats::WRITE_WINDOW, (uint64_t) window);
+}
+
+uint64_t
+InflightWindow::acquire() {
+    std::unique_lock<decltype(mx)> lock{mx};
+    cv.wait(lock, [&]() { return inflight < (uint32_t) window; });
+    inflight++;
+    return HecubaStats::now_us();
+}
+
+void
+InflightWindow::release(uint64_t sent_us, bool failed) {
+    uint64_t latency = HecubaStats::now_us() - sent_us;
+    {
+        std::lock_guard<decltype(mx)> lock{mx};
+        bool saturated = inflight >= (uint32_t) window;
+        // Requests on the fly at the last decrease were sent with the old window, shrink once per round trip
+        bool before_decrease = sent_before_decrease > 0;
+        if (before_decrease) sent_before_decrease--;
+        inflight--;
+        if (min_window == max_window) {
+            // Fixed window
+        } else if (failed || latency > latency_limit()) {
+            if (!before_decrease) {
+                window = std::max(window / 2, (double) min_window);
+                sent_before_decrease = inflight;
+            }
+        } else if (saturated) {
+            // Only grow while the window limits the requests, otherwise the latency says nothing about a larger one
+            window = std::min(window + 1.0 / window, (double) max_window);
+        }
+        if (!failed) {
+            period_min_us = std::min(period_min_us, latency);
+            if (++period_samples >= BASELINE_SAMPLES || baseline_us == UINT64_MAX) {
+                baseline_us = period_min_us;
+                period_min_us = UINT64_MAX;
+                period_samples = 0;
+            }
+        }
+        HecubaStats::global().set_gauge(HecubaStats::WRITE_WINDOW, (uint64_t) window);
+    }
+    cv.notify_all();
+}
+
+uint64_t
+InflightWindow::latency_limit() const {
+    if (latency_target_us) return latency_target_us;
+    if (baseline_us == UINT64_MAX) return UINT64_MAX;
+    return std::max(baseline_us * LATENCY_TOLERANCE, (uint64_t) MIN_LATENCY_LIMIT_US);
+}
+
+uint32_t
+InflightWindow::get_window() {
+    std::lock_guard<decltype(mx)> lock{mx};
+    return (uint32_t) window;
+}
+
+uint32_t
+InflightWindow::get_inflight() {
+    std::lock_guard<decltype(mx)> lock{mx};
+    return inflight;
+}
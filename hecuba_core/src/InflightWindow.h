@@ -0,0 +1,53 @@
+#ifndef _INFLIGHT_WINDOW_H__
+#define _INFLIGHT_WINDOW_H__
+
+#include <mutex>
+#include <cstdint>
+#include <condition_variable>
+
+/***
+ * Limits the number of requests on the fly like a semaphore, but the limit (window) adapts to the
+ * latency of the requests: it grows by one every window completions while the latency stays low
+ * (additive increase) and it is halved when a request fails or its latency is too high (multiplicative decrease).
+ * With min == max the window is fixed.
+ */
+class InflightWindow {
+public:
+
+    /***
+     * @param initial Window to start with
+     * @param min Lower bound of the window, > 0
+     * @param max Upper bound of the window, >= min
+     * @param latency_target_us Latency from which the window shrinks, with 0 it is derived from the lowest latency seen
+     */
+    InflightWindow(uint32_t initial, uint32_t min, uint32_t max, uint64_t latency_target_us);
+    InflightWindow(const InflightWindow&) = delete;
+    InflightWindow& operator=(const InflightWindow&) = delete;
+
+    /* Waits until a request can be sent, returns the time (HecubaStats::now_us) it was allowed */
+    uint64_t acquire();
+
+    /* Notifies the completion of a request allowed at 'sent_us', 'failed' if it returned an error */
+    void release(uint64_t sent_us, bool failed);
+
+    uint32_t get_window();
+
+    uint32_t get_inflight();
+
+private:
+
+    uint64_t latency_limit() const;
+
+    std::condition_variable cv;
+    std::mutex mx;
+    double window;
+    uint32_t inflight{0};
+    uint32_t min_window, max_window;
+    uint64_t latency_target_us;
+    uint32_t sent_before_decrease{0};
+    uint64_t baseline_us{UINT64_MAX}; // Lowest latency seen in the previous sampling period
+    uint64_t period_min_us{UINT64_MAX}; // Lowest latency seen in the current sampling period
+    uint32_t period_samples{0};
+
+};
+#endif
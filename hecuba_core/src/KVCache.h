@@ -4,9 +4,88 @@
 #include <iostream>
 #include <unordered_map>
 #include <list>
+#include <mutex>
+#include <memory>
+#include <string>
+#include <vector>
+#include <algorithm>
+#include <stdexcept>
+#include <cstring>
+#include <cctype>
+#include <iterator>
+
+#include "TupleRow.h"
+
+/***
+ * Replacement policies supported by KVCache
+ * LRU: Least Recently Used, every hit moves the entry to the head of the list
+ * CLOCK: Second chance approximation of LRU, a hit only sets a reference bit
+ * TWO_Q: New entries go to a FIFO probation queue and only the keys requested again after
+ *        leaving it reach the protected LRU queue, so a full table scan can't evict the hot entries
+ */
+enum class KVCachePolicy {
+    LRU, CLOCK, TWO_Q
+};
+
+inline KVCachePolicy parse_kvcache_policy(std::string name) {
+    std::transform(name.begin(), name.end(), name.begin(), ::tolower);
+    if (name.empty() || name == "lru") return KVCachePolicy::LRU;
+    if (name == "clock") return KVCachePolicy::CLOCK;
+    if (name == "2q" || name == "twoq") return KVCachePolicy::TWO_Q;
+    throw std::invalid_argument("Unknown cache policy " + name + ", expected lru, clock or 2q");
+}
+
+/***
+ * Computes the memory footprint of the cached keys and values, used to bound the cache by bytes
+ */
+template<class T>
+struct KVCacheWeigher {
+    size_t operator()(const T &) const {
+        return sizeof(T);
+    }
+};
+
+template<>
+struct KVCacheWeigher<TupleRow> {
+    /* The payload, which holds the fixed size columns and the pointers of the rest,
+     * plus the variable length data those pointers point to (texts, blobs and uuids) */
+    size_t operator()(const TupleRow &row) const {
+        size_t weight = sizeof(TupleRow) + row.length();
+        for (uint16_t i = 0; i < row.n_elem(); ++i) {
+            const void *element = row.get_element(i);
+            if (element == nullptr) continue;
+            switch (row.get_metadata_element(i).type) {
+                case CASS_VALUE_TYPE_TEXT:
+                case CASS_VALUE_TYPE_VARCHAR:
+                case CASS_VALUE_TYPE_ASCII: {
+                    const char *data = *(char *const *) element;
+                    if (data != nullptr) weight += strlen(data) + 1;
+                    break;
+                }
+                case CASS_VALUE_TYPE_BLOB: {
+                    const char *data = *(char *const *) element;
+                    if (data != nullptr) weight += sizeof(uint64_t) + *(const uint64_t *) data;
+                    break;
+                }
+                case CASS_VALUE_TYPE_UUID: {
+                    const char *data = *(char *const *) element;
+                    if (data != nullptr) weight += sizeof(uint64_t) * 2;
+                    break;
+                }
+                default: // Fixed size, already weighed within the payload
+                    break;
+            }
+        }
+        return weight;
+    }
+};
+
 
 /***
- * Simple implementation of an LRU Cache.
+ * Thread safe cache bounded by number of entries and/or bytes.
+ * Entries are distributed among shards by the hash of the key, each shard has its own lock and
+ * applies the replacement policy on its own share of the capacity, so concurrent readers and
+ * writers only contend when they access the same shard.
  * @tparam TKey Key indexing, must be hashable
  * @tparam TValue Value associated to the Key
  */
@@ -14,11 +93,28 @@ template<class TKey, class TValue>
 class KVCache {
 
 public:
-    using value_type = typename std::pair<TKey, TValue>;
-    using value_it = typename std::list<value_type>::iterator;
 
-    KVCache(size_t size = 1024) {
+    /***
+     * @param size Max number of entries, 0 to bound the cache only by bytes
+     * @param max_bytes Max bytes used by the keys and values, 0 to bound the cache only by entries
+     * @param policy Replacement policy
+     * @param nshards Number of shards, 0 to derive it from the capacity
+     */
+    KVCache(size_t size = 1024, size_t max_bytes = 0, KVCachePolicy policy = KVCachePolicy::LRU,
+            uint32_t nshards = 0) {
+        if (size == 0 && max_bytes == 0) throw std::invalid_argument("KVCache: a cache needs a size or a bytes limit");
         this->max_cache_size = size;
+        this->max_cache_bytes = max_bytes;
+        this->policy = policy;
+        if (nshards == 0) {
+            // Small caches keep a single shard, otherwise the per shard capacity becomes too coarse
+            nshards = (uint32_t) std::min<size_t>(max_shards, std::max<size_t>(1, size / min_shard_entries));
+        }
+        size_t shard_size = size ? (size + nshards - 1) / nshards : 0;
+        size_t shard_bytes = max_bytes ? (max_bytes + nshards - 1) / nshards : 0;
+        for (uint32_t i = 0; i < nshards; ++i) {
+            shards.emplace_back(new Shard(shard_size, shard_bytes, policy));
+        }
     }
 
     ~KVCache() {
@@ -28,62 +124,52 @@ public:
     // Getters
 
     size_t size() const {
-        return this->cache_items_map.size();
+        size_t total = 0;
+        for (const auto &shard : shards) total += shard->size();
+        return total;
     }
+
+    size_t bytes() const {
+        size_t total = 0;
+        for (const auto &shard : shards) total += shard->bytes();
+        return total;
+    }
+
     size_t get_max_cache_size() const {
         return this->max_cache_size;
     }
 
-    const TValue &get(const TKey &key) const {
-        auto it = cache_items_map.find(key);
-
-        if (it == cache_items_map.end()) {
-            throw std::out_of_range("No such key in the cache");
-        } else {
-            cache_items_list.splice(cache_items_list.begin(), cache_items_list,
-                                    it->second);
-
-            return it->second->second;
-        }
+    size_t get_max_cache_bytes() const {
+        return this->max_cache_bytes;
     }
 
+    KVCachePolicy get_policy() const {
+        return this->policy;
+    }
 
-    // Modifiers
+    uint32_t get_nshards() const {
+        return (uint32_t) this->shards.size();
+    }
 
-    void add(const TKey &key, const TValue &value) {
-        auto it = cache_items_map.find(key);
+    /* Returns a copy: a reference could be evicted by another thread once the lock is released */
+    TValue get(const TKey &key) const {
+        return shard_for(key).get(key);
+    }
 
-        // Not found
-        if (it == cache_items_map.end()) {
-            if (cache_items_map.size() + 1 > max_cache_size) {
-                // remove the last element from cache
-                auto last = cache_items_list.crbegin();
 
-                cache_items_map.erase(last->first);
-                cache_items_list.pop_back();
-            }
+    // Modifiers
 
-            cache_items_list.push_front(std::make_pair(key, value));
-            cache_items_map[key] = cache_items_list.begin();
-        } else {
-            it->second->second = value;
-            // the first argument should be a constant iterator but Intel fails
-            cache_items_list.splice(cache_items_list.begin(), cache_items_list, it->second);
-        }
+    /* Inserts or replaces the value of key, returns the number of entries evicted to make room for it */
+    size_t add(const TKey &key, const TValue &value) {
+        return shard_for(key).add(key, value, KVCacheWeigher<TKey>()(key) + KVCacheWeigher<TValue>()(value));
     }
 
     void remove(const TKey &key) {
-        auto it = cache_items_map.find(key);
-        if (it != cache_items_map.end()) {
-            cache_items_list.erase(it->second);
-            cache_items_map.erase(key);
-        }
+        shard_for(key).remove(key);
     }
 
     void clear() {
-        cache_items_map.clear();
-        cache_items_list.clear();
-
+        for (auto &shard : shards) shard->clear();
     }
 
 
@@ -93,13 +179,217 @@ private:
 
     KVCache &operator=(const KVCache &aCache);
 
-    size_t max_cache_size;
+    enum {
+        max_shards = 16, min_shard_entries = 256
+    };
+
+    /***
+     * A portion of the cache with its own lock, applying the replacement policy over its entries
+     */
+    class Shard {
+    public:
+        Shard(size_t max_entries, size_t max_bytes, KVCachePolicy policy) : max_entries(max_entries),
+                                                                           max_bytes(max_bytes),
+                                                                           policy(policy) {
+            hand = probation.end();
+        }
+
+        size_t size() const {
+            std::lock_guard<std::mutex> lock(shard_mutex);
+            return items_map.size();
+        }
 
-    // List ordered by access
-    mutable std::list<value_type> cache_items_list;
+        size_t bytes() const {
+            std::lock_guard<std::mutex> lock(shard_mutex);
+            return used_bytes;
+        }
+
+        TValue get(const TKey &key) {
+            std::lock_guard<std::mutex> lock(shard_mutex);
+            auto it = items_map.find(key);
+            if (it == items_map.end()) {
+                throw std::out_of_range("No such key in the cache");
+            }
+            touch(it->second);
+            return it->second->value;
+        }
+
+        size_t add(const TKey &key, const TValue &value, size_t weight) {
+            std::lock_guard<std::mutex> lock(shard_mutex);
+            auto it = items_map.find(key);
+            if (max_bytes && weight > max_bytes) {
+                // Doesn't fit, and keeping an old value would return outdated results
+                if (it != items_map.end()) erase(it->second);
+                return 0;
+            }
+
+            if (it != items_map.end()) {
+                used_bytes = used_bytes - it->second->weight + weight;
+                if (it->second->in_probation) probation_bytes = probation_bytes - it->second->weight + weight;
+                it->second->value = value;
+                it->second->weight = weight;
+                touch(it->second);
+            } else {
+                bool was_ghost = false;
+                if (policy == KVCachePolicy::TWO_Q) {
+                    auto ghost = ghosts_map.find(key);
+                    if (ghost != ghosts_map.end()) {
+                        ghosts.erase(ghost->second);
+                        ghosts_map.erase(ghost);
+                        was_ghost = true;
+                    }
+                }
+                entry_it entry;
+                if (was_ghost) {
+                    protect.push_front(Entry(key, value, weight, false));
+                    entry = protect.begin();
+                } else if (policy == KVCachePolicy::CLOCK) {
+                    // Behind the hand, the last entry it will visit
+                    entry = probation.insert(hand, Entry(key, value, weight, true));
+                    probation_bytes += weight;
+                } else {
+                    probation.push_front(Entry(key, value, weight, true));
+                    entry = probation.begin();
+                    probation_bytes += weight;
+                }
+                items_map[key] = entry;
+                used_bytes += weight;
+            }
+
+            size_t evicted = 0;
+            while ((max_entries && items_map.size() > max_entries) || (max_bytes && used_bytes > max_bytes)) {
+                evict();
+                ++evicted;
+            }
+            return evicted;
+        }
+
+        void remove(const TKey &key) {
+            std::lock_guard<std::mutex> lock(shard_mutex);
+            auto it = items_map.find(key);
+            if (it != items_map.end()) erase(it->second);
+        }
+
+        void clear() {
+            std::lock_guard<std::mutex> lock(shard_mutex);
+            items_map.clear();
+            probation.clear();
+            protect.clear();
+            ghosts_map.clear();
+            ghosts.clear();
+            hand = probation.end();
+            used_bytes = 0;
+            probation_bytes = 0;
+        }
+
+    private:
+        struct Entry {
+            Entry(const TKey &key, const TValue &value, size_t weight, bool in_probation) :
+                    key(key), value(value), weight(weight), in_probation(in_probation) {}
+
+            TKey key;
+            TValue value;
+            size_t weight;
+            bool in_probation; // Always true for LRU and CLOCK, which only use the probation list
+            bool referenced = false;
+        };
+
+        using entry_it = typename std::list<Entry>::iterator;
+
+        void touch(entry_it entry) {
+            switch (policy) {
+                case KVCachePolicy::LRU:
+                    // the first argument should be a constant iterator but Intel fails
+                    probation.splice(probation.begin(), probation, entry);
+                    break;
+                case KVCachePolicy::CLOCK:
+                    entry->referenced = true;
+                    break;
+                case KVCachePolicy::TWO_Q:
+                    // Hits on the probation queue don't promote, a scan touching each key once stays there
+                    if (!entry->in_probation) protect.splice(protect.begin(), protect, entry);
+                    break;
+            }
+        }
+
+        void erase(entry_it entry) {
+            used_bytes -= entry->weight;
+            items_map.erase(entry->key);
+            if (entry->in_probation) {
+                probation_bytes -= entry->weight;
+                if (entry == hand) hand = probation.erase(entry);
+                else probation.erase(entry);
+            } else protect.erase(entry);
+        }
+
+        void evict() {
+            switch (policy) {
+                case KVCachePolicy::LRU:
+                    erase(std::prev(probation.end()));
+                    break;
+                case KVCachePolicy::CLOCK:
+                    while (true) {
+                        if (hand == probation.end()) hand = probation.begin();
+                        if (!hand->referenced) break;
+                        hand->referenced = false;
+                        ++hand;
+                    }
+                    erase(hand);
+                    break;
+                case KVCachePolicy::TWO_Q: {
+                    // The probation queue keeps a quarter of the capacity unless the protected one is empty
+                    bool probation_full = (max_entries && probation.size() > max_entries / 4) ||
+                                          (max_bytes && probation_bytes > max_bytes / 4);
+                    if (!probation.empty() && (probation_full || protect.empty())) {
+                        entry_it victim = std::prev(probation.end());
+                        remember(victim->key);
+                        erase(victim);
+                    } else erase(std::prev(protect.end()));
+                    break;
+                }
+            }
+        }
+
+        /* Keeps the keys recently evicted from the probation queue, bounded to half the entries */
+        void remember(const TKey &key) {
+            ghosts.push_front(key);
+            ghosts_map[key] = ghosts.begin();
+            size_t max_ghosts = std::max<size_t>(1, (max_entries ? max_entries : items_map.size()) / 2);
+            while (ghosts.size() > max_ghosts) {
+                ghosts_map.erase(ghosts.back());
+                ghosts.pop_back();
+            }
+        }
+
+        size_t max_entries, max_bytes;
+        KVCachePolicy policy;
+
+        mutable std::mutex shard_mutex;
+
+        size_t used_bytes = 0;
+        size_t probation_bytes = 0;
+
+        // LRU: list ordered by access. CLOCK: circular list swept by the hand. 2Q: FIFO of new entries
+        std::list<Entry> probation;
+        entry_it hand;
+        // 2Q: LRU list of the entries requested again after leaving the probation queue
+        std::list<Entry> protect;
+        std::list<TKey> ghosts;
+        std::unordered_map<TKey, typename std::list<TKey>::iterator> ghosts_map;
+
+        // Map containing references to the list items for update / read / removal purposes
+        std::unordered_map<TKey, entry_it> items_map;
+    };
+
+    Shard &shard_for(const TKey &key) const {
+        return *shards[std::hash<TKey>()(key) % shards.size()];
+    }
+
+    size_t max_cache_size;
+    size_t max_cache_bytes;
+    KVCachePolicy policy;
 
-    // Map containing references to the list items for update / read / removal purposes
-    std::unordered_map<TKey, value_it> cache_items_map;
+    std::vector<std::unique_ptr<Shard> > shards;
 };
 
 
@@ -3,6 +3,8 @@
 
 #define MAX_TRIES 10
 #define default_prefetch_size 100
+#define default_prefetch_parallelism 4
+#define default_prefetch_page_size 5000
 
 Prefetch::Prefetch(const std::vector<std::pair<int64_t, int64_t>> &token_ranges, const TableMetadata *table_meta,
                    CassSession *session, std::map<std::string, std::string> &config) {
@@ -73,6 +75,42 @@ Prefetch::Prefetch(const std::vector<std::pair<int64_t, int64_t>> &token_ranges,
     if (prefetch_size <= 0)
         throw ModuleException("Prefetch size must be > 0");
 
+    int32_t parallelism = default_prefetch_parallelism;
+
+    if (config.find("prefetch_parallelism") != config.end()) {
+        std::string parallelism_str = config["prefetch_parallelism"];
+        try {
+            parallelism = std::stoi(parallelism_str);
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for prefetch_parallelism";
+            throw ModuleException(msg);
+        }
+    }
+
+    if (parallelism <= 0)
+        throw ModuleException("Prefetch parallelism must be > 0");
+
+    this->parallelism = (uint32_t) parallelism;
+
+    this->page_size = default_prefetch_page_size;
+
+    if (config.find("prefetch_page_size") != config.end()) {
+        std::string page_size_str = config["prefetch_page_size"];
+        try {
+            this->page_size = std::stoi(page_size_str);
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for prefetch_page_size";
+            throw ModuleException(msg);
+        }
+    }
+
+    if (this->page_size <= 0)
+        throw ModuleException("Prefetch page size must be > 0");
+
     this->data.set_capacity(prefetch_size);
     this->worker = new std::thread{&Prefetch::consume_tokens, this};
 
@@ -107,23 +145,54 @@ TupleRow *Prefetch::get_cnext() {
 }
 
 
+Prefetch::RangeQuery Prefetch::execute_range(const std::pair<int64_t, int64_t> &range) const {
+    //Bind tokens and execute the first page
+    RangeQuery query;
+    query.statement = cass_prepared_bind(this->prepared_query);
+    cass_statement_bind_int64(query.statement, 0, range.first);
+    cass_statement_bind_int64(query.statement, 1, range.second);
+    cass_statement_set_paging_size(query.statement, this->page_size);
+    HecubaExtrae_event(HECUBACASS, HBCASS_READ);
+    query.future = cass_session_execute(session, query.statement);
+    HecubaExtrae_event(HECUBACASS, HBCASS_END);
+    return query;
+}
+
+/* Stop fetching data: discard the queries on the fly and unblock the consumer */
+void Prefetch::abort_fetching(std::deque<RangeQuery> &inflight) {
+    for (RangeQuery &pending : inflight) {
+        cass_future_free(pending.future);
+        cass_statement_free(pending.statement);
+    }
+    inflight.clear();
+    completed = true;
+    data.abort();
+}
+
+/***
+ * Keeps up to 'parallelism' token range queries on the fly. Each range is read in pages of 'page_size'
+ * rows, the next page of a range is requested before the rows of the current one are queued.
+ * Results are consumed in the same order the ranges were issued, so the rows are delivered range after
+ * range and in order within each range.
+ */
 void Prefetch::consume_tokens() {
-    for (std::pair<int64_t, int64_t> &range : tokens) {
+    std::deque<RangeQuery> inflight;
+    std::vector<std::pair<int64_t, int64_t>>::const_iterator next_range = tokens.begin();
+
+    while (next_range != tokens.end() || !inflight.empty()) {
         //If Consumer sets capacity 0, we stop fetching data
         if (data.capacity() == 0) {
-            completed = true;
-            data.abort();
+            abort_fetching(inflight);
             return;
         }
 
-        //Bind tokens and execute
-        CassStatement *statement = cass_prepared_bind(this->prepared_query);
-        cass_statement_bind_int64(statement, 0, range.first);
-        cass_statement_bind_int64(statement, 1, range.second);
-        HecubaExtrae_event(HECUBACASS, HBCASS_READ);
-        CassFuture *future = cass_session_execute(session, statement);
-        HecubaExtrae_event(HECUBACASS, HBCASS_END);
-        cass_statement_free(statement);
+        while (next_range != tokens.end() && inflight.size() < parallelism) {
+            inflight.push_back(execute_range(*next_range));
+            ++next_range;
+        }
+
+        RangeQuery query = inflight.front();
+        inflight.pop_front();
 
         const CassResult *result = NULL;
         int tries = 0;
@@ -131,38 +200,49 @@ void Prefetch::consume_tokens() {
         while (result == NULL) {
             //If Consumer sets capacity 0, we stop fetching data
             if (data.capacity() == 0) {
-                cass_future_free(future);
-                completed = true;
-                data.abort();
+                inflight.push_front(query);
+                abort_fetching(inflight);
                 return;
             }
 
-            result = cass_future_get_result(future);
-            CassError rc = cass_future_error_code(future);
+            result = cass_future_get_result(query.future);
+            CassError rc = cass_future_error_code(query.future);
 
             if (rc != CASS_OK) {
                 std::cerr << "Prefetch action failed: " << cass_error_desc(rc) << " Try #" << tries << std::endl;
                 tries++;
                 if (tries > MAX_TRIES) {
-                    cass_future_free(future);
-                    completed = true;
-                    data.abort();
+                    inflight.push_front(query);
+                    abort_fetching(inflight);
                     std::cerr << "Prefetch reached max connection attempts " << MAX_TRIES << std::endl;
                     std::cerr << "Prefetch query " << this->prepared_query << std::endl;
                     return;
                 }
+                cass_future_free(query.future);
+                query.future = cass_session_execute(session, query.statement); // Retry the current page
             }
         }
 
 
         //PRE: Result != NULL, future != NULL, completed = false
-        cass_future_free(future);
+        cass_future_free(query.future);
+        query.future = NULL;
+
+        // Request the next page while the current one is consumed
+        if (cass_result_has_more_pages(result)) {
+            cass_statement_set_paging_state(query.statement, result);
+            HecubaExtrae_event(HECUBACASS, HBCASS_READ);
+            query.future = cass_session_execute(session, query.statement);
+            HecubaExtrae_event(HECUBACASS, HBCASS_END);
+            inflight.push_front(query); // Keep the order within the range
+        } else {
+            cass_statement_free(query.statement);
+        }
 
         CassIterator *iterator = cass_iterator_from_result(result);
         while (cass_iterator_next(iterator)) {
             if (data.capacity() == 0) {
-                completed = true;
-                data.abort();
+                abort_fetching(inflight);
                 cass_iterator_free(iterator);
                 cass_result_free(result);
                 return;
@@ -173,15 +253,14 @@ void Prefetch::consume_tokens() {
                 data.push(t); //blocking operation
             }
             catch (std::exception &e) {
-                completed = true;
-                data.abort();
+                abort_fetching(inflight);
                 delete (t);
                 cass_iterator_free(iterator);
                 cass_result_free(result);
                 return;
             }
         }
-        //Done fetching current token range
+        //Done fetching current page
         cass_iterator_free(iterator);
         cass_result_free(result);
     }
@@ -4,6 +4,7 @@
 
 #include <thread>
 #include <atomic>
+#include <deque>
 
 #include "tbb/concurrent_queue.h"
 #include "TupleRowFactory.h"
@@ -32,8 +33,18 @@ public:
 
 private:
 
+    /* A token range being fetched: the statement keeps the paging state of the page requested by the future */
+    struct RangeQuery {
+        CassStatement *statement;
+        CassFuture *future;
+    };
+
     void consume_tokens();
 
+    RangeQuery execute_range(const std::pair<int64_t, int64_t> &range) const;
+
+    void abort_fetching(std::deque<RangeQuery> &inflight);
+
 /** no ownership **/
     CassSession *session;
     TupleRowFactory t_factory;
@@ -47,6 +58,8 @@ private:
     std::vector<std::pair<int64_t, int64_t>> tokens;
     const CassPrepared *prepared_query;
     std::string type;
+    uint32_t parallelism; // Max range queries on the fly
+    int32_t page_size; // Rows per page requested to Cassandra
 
 };
 
@@ -23,3 +23,11 @@ Semaphore::acquire () {
     counter--;
 }
 
+
+bool
+Semaphore::try_acquire_for(std::chrono::microseconds timeout) {
+    std::unique_lock<decltype(mx)> lock{mx};
+    if (!cv.wait_for(lock, timeout, [&](){return counter > 0; })) return false;
+    counter--;
+    return true;
+}
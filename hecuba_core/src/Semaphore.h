@@ -2,6 +2,7 @@
 #define _SEMAPHORE_H__
 
 #include <mutex>
+#include <chrono>
 #include <condition_variable>
 
 class Semaphore {
@@ -12,6 +13,8 @@ public:
     Semaphore& operator=(const Semaphore&) = delete;
     void release();
     void acquire();
+    /* Returns false if the semaphore could not be acquired before 'timeout' elapsed */
+    bool try_acquire_for(std::chrono::microseconds timeout);
 
 private:
 
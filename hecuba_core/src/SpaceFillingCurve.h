@@ -19,6 +19,15 @@
 #define COLUMNAR 2
 #define FORTRANORDER 3
 
+// The partition_type of an array keeps the partitioning algorithm in its low bits
+// and the compression of its blocks in the high bits
+#define PARTITION_ALGORITHM_MASK 0x0F
+#define COMPRESSION_CODEC_MASK 0x30
+#define COMPRESSION_NONE 0x00
+#define COMPRESSION_LZ4 0x10
+#define COMPRESSION_ZSTD 0x20
+#define COMPRESSION_SHUFFLE 0x40
+
 //Represents a block of data belonging to an array
 struct Partition {
     Partition(uint32_t cluster, uint32_t block, void *chunk) {
@@ -71,6 +80,18 @@ struct ArrayMetadata {
         size *= elem_size;
         return size;
     }
+
+    uint8_t get_partition_algorithm() const {
+        return partition_type & PARTITION_ALGORITHM_MASK;
+    }
+
+    uint8_t get_compression_codec() const {
+        return partition_type & COMPRESSION_CODEC_MASK;
+    }
+
+    bool is_compressed() const {
+        return get_compression_codec() != COMPRESSION_NONE;
+    }
 };
 
 
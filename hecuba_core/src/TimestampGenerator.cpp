@@ -10,11 +10,11 @@ int64_t TimestampGenerator::next() {
 
     int64_t now = std::chrono::duration_cast<std::chrono::nanoseconds>(tse).count();
 
-    m.lock();
-    if (now <= last) now = last + 1;
+    int64_t prev = last.load(std::memory_order_relaxed);
+    int64_t ts;
+    do {
+        ts = (now <= prev) ? prev + 1 : now;
+    } while (!last.compare_exchange_weak(prev, ts, std::memory_order_relaxed)); // On failure 'prev' is reloaded
 
-    last = now;
-    m.unlock();
-
-    return last;
+    return ts;
 }
@@ -6,10 +6,12 @@
 
 #include "ModuleException.h"
 
-#include <mutex>
+#include <atomic>
 
 /***
  * Generates a monotonic strictly increasing timestamp.
+ * Lock-free: concurrent callers race with a compare-and-swap on the last timestamp given,
+ * so each of them gets a different one.
  */
 
 class TimestampGenerator {
@@ -21,8 +23,7 @@ public:
 
 private:
 
-    int64_t last;
-    std::mutex m;
+    std::atomic<int64_t> last{0};
 };
 
 
@@ -6,48 +6,57 @@ TupleRow::TupleRow(std::shared_ptr<const std::vector<ColumnMeta>> metas,
                    size_t payload_size, void *buffer) {
 
     metadatas = metas;
-    payload = std::shared_ptr<TupleRowData>(new TupleRowData(buffer, payload_size, (uint32_t) metas->size()),
-                                            [metas](TupleRowData *holder) {
-                                                for (uint16_t i = 0; i < metas->size(); ++i) {
-                                                    if (!holder->isNull(i)) {
-                                                        switch (metas->at(i).type) {
-                                                            case CASS_VALUE_TYPE_BLOB:
-                                                            case CASS_VALUE_TYPE_TEXT:
-                                                            case CASS_VALUE_TYPE_VARCHAR:
-                                                            case CASS_VALUE_TYPE_ASCII: {
-                                                                int64_t *addr = (int64_t *) ((char *) holder->data +
-                                                                                             metas->at(i).position);
-                                                                char *d = reinterpret_cast<char *>(*addr);
-                                                                free(d);
-                                                                break;
-                                                            }
-                                                            case CASS_VALUE_TYPE_UUID: {
-                                                                int64_t *addr = (int64_t *) ((char *) holder->data +
-                                                                                             metas->at(i).position);
-                                                                uint64_t *uuid = reinterpret_cast<uint64_t *>(*addr);
-                                                                delete[] uuid; //#TODO: Check interaction with hdict interface
-                                                                break;
-                                                            }
-                                                            case CASS_VALUE_TYPE_TUPLE: {
-                                                                int64_t *addr = (int64_t *) ((char *) holder->data +
-                                                                                             metas->at(i).position);
-                                                                TupleRow *tr = reinterpret_cast<TupleRow *>(*addr);
-                                                                delete (tr);
-                                                                break;
-                                                            }
-                                                            case CASS_VALUE_TYPE_UDT: {
-                                                                int64_t *addr = (int64_t *) ((char *) holder->data +
-                                                                                             metas->at(i).position);
-                                                                char *udt = reinterpret_cast<char *>(*addr);
-                                                                free(udt);
-                                                            }
-                                                            default:
-                                                                break;
-                                                        }
-                                                    }
-                                                }
-                                                delete (holder);
-                                            });
+    // The data and its reference count share a single pooled block
+    payload = std::allocate_shared<TupleRowData>(TupleRowPool::Allocator<TupleRowData>(), buffer, payload_size,
+                                                 metas, false);
+}
+
+TupleRow::TupleRow(std::shared_ptr<const std::vector<ColumnMeta>> metas, size_t payload_size) {
+    metadatas = metas;
+    void *buffer = payload_size ? TupleRowPool::allocate(payload_size) : nullptr;
+    payload = std::allocate_shared<TupleRowData>(TupleRowPool::Allocator<TupleRowData>(), buffer, payload_size,
+                                                 metas, true);
+}
+
+TupleRow::TupleRowData::~TupleRowData() {
+    if (data) {
+        for (uint16_t i = 0; i < metas->size(); ++i) {
+            if (!isNull(i)) {
+                switch (metas->at(i).type) {
+                    case CASS_VALUE_TYPE_BLOB:
+                    case CASS_VALUE_TYPE_TEXT:
+                    case CASS_VALUE_TYPE_VARCHAR:
+                    case CASS_VALUE_TYPE_ASCII: {
+                        int64_t *addr = (int64_t *) ((char *) data + metas->at(i).position);
+                        char *d = reinterpret_cast<char *>(*addr);
+                        free(d);
+                        break;
+                    }
+                    case CASS_VALUE_TYPE_UUID: {
+                        int64_t *addr = (int64_t *) ((char *) data + metas->at(i).position);
+                        uint64_t *uuid = reinterpret_cast<uint64_t *>(*addr);
+                        delete[] uuid; //#TODO: Check interaction with hdict interface
+                        break;
+                    }
+                    case CASS_VALUE_TYPE_TUPLE: {
+                        int64_t *addr = (int64_t *) ((char *) data + metas->at(i).position);
+                        TupleRow *tr = reinterpret_cast<TupleRow *>(*addr);
+                        delete (tr);
+                        break;
+                    }
+                    case CASS_VALUE_TYPE_UDT: {
+                        int64_t *addr = (int64_t *) ((char *) data + metas->at(i).position);
+                        char *udt = reinterpret_cast<char *>(*addr);
+                        free(udt);
+                    }
+                    default:
+                        break;
+                }
+            }
+        }
+    }
+    if (pooled) TupleRowPool::release(data, ptr_length);
+    else free(data);
 }
 
 
@@ -11,15 +11,28 @@
 
 
 #include "TableMetadata.h"
+#include "TupleRowPool.h"
 
 
 class TupleRow {
 
 public:
 
-    /* Constructor */
+    /* Constructor, the TupleRow takes the ownership of the malloc'ed buffer */
     TupleRow(std::shared_ptr<const std::vector<ColumnMeta> > metas, size_t payload_size, void *buffer);
 
+    /* Constructor with an uninitialized payload of 'payload_size' bytes from the TupleRowPool */
+    TupleRow(std::shared_ptr<const std::vector<ColumnMeta> > metas, size_t payload_size);
+
+    /* TupleRows are allocated and released very often, they come from the TupleRowPool */
+    static void *operator new(size_t size) {
+        return TupleRowPool::allocate(size);
+    }
+
+    static void operator delete(void *ptr, size_t size) {
+        TupleRowPool::release(ptr, size);
+    }
+
     /* Copy constructors */
     TupleRow(const TupleRow &t);
 
@@ -112,20 +125,22 @@ private:
         size_t ptr_length;
         std::vector<uint32_t> null_values;
         int64_t timestamp;
+        std::shared_ptr<const std::vector<ColumnMeta> > metas; // To release the content of the columns
+        bool pooled; // 'data' comes from the TupleRowPool instead of malloc
 
 
         /* Constructors */
-        TupleRowData(void *data_ptr, size_t length, uint32_t nelem) {
+        TupleRowData(void *data_ptr, size_t length, std::shared_ptr<const std::vector<ColumnMeta> > metas, bool pooled) {
             this->data = data_ptr;
-            this->null_values = std::vector<uint32_t>(ceil((double) nelem/32), 0);
+            this->null_values = std::vector<uint32_t>(ceil((double) metas->size()/32), 0);
             this->ptr_length = length;
             this->timestamp = 0;
+            this->metas = metas;
+            this->pooled = pooled;
         }
 
         /* Destructors */
-        ~TupleRowData() {
-            free(data);
-        }
+        ~TupleRowData();
 
         /* Modifiers */
         /*
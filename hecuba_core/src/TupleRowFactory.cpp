@@ -15,18 +15,94 @@ enum StringValue {
 };
 
 // Map to associate the strings with the enum values
-static std::map<std::string, StringValue> s_mapStringValues;
-
-static void initialize_mapStringValues()
-{
-  s_mapStringValues["flags"] = evFlags;
-  s_mapStringValues["elem_size"] = evElemSize;
-  s_mapStringValues["partition_type"] = evPartitionType;
-  s_mapStringValues["typekind"] = evTypeKind;
-  s_mapStringValues["byteorder"] = evByteOrder;
-  s_mapStringValues["dims"] = evDims;
-  s_mapStringValues["strides"] = evStrides;
+static const std::map<std::string, StringValue> s_mapStringValues = {
+  {"flags", evFlags},
+  {"elem_size", evElemSize},
+  {"partition_type", evPartitionType},
+  {"typekind", evTypeKind},
+  {"byteorder", evByteOrder},
+  {"dims", evDims},
+  {"strides", evStrides}
+};
+
+/*** COLUMN PLANS ***/
+
+// Decoders and binders specialized per column type, selected once per factory by build_plan
+
+template<typename T, CassError (*get)(const CassValue *, T *)>
+static CassError decode_value(const CassValue *value, void *data) {
+    return get(value, static_cast<T *>(data));
+}
+
+static CassError decode_bool(const CassValue *value, void *data) {
+    cass_bool_t b;
+    CassError rc = cass_value_get_bool(value, &b);
+    if (rc == CASS_OK) *static_cast<bool *>(data) = (b == cass_true);
+    return rc;
+}
+
+static CassError decode_text(const CassValue *value, void *data) {
+    const char *l_temp;
+    size_t l_size;
+    CassError rc = cass_value_get_string(value, &l_temp, &l_size);
+    if (rc != CASS_OK) return rc;
+    char *permanent = (char *) malloc(l_size + 1);
+    memcpy(permanent, l_temp, l_size);
+    permanent[l_size] = '\0';
+    memcpy(data, &permanent, sizeof(char *));
+    return CASS_OK;
 }
+
+static CassError decode_blob(const CassValue *value, void *data) {
+    const unsigned char *l_temp;
+    size_t l_size;
+    CassError rc = cass_value_get_bytes(value, &l_temp, &l_size);
+    if (rc != CASS_OK) return rc;
+    // [num bytes as uint64][bytes]
+    char *permanent = (char *) malloc(l_size + sizeof(uint64_t));
+    uint64_t int_size = (uint64_t) l_size;
+    memcpy(permanent, &int_size, sizeof(uint64_t));
+    memcpy(permanent + sizeof(uint64_t), l_temp, l_size);
+    memcpy(data, &permanent, sizeof(char *));
+    return CASS_OK;
+}
+
+static CassError decode_uuid(const CassValue *value, void *data) {
+    CassUuid uuid;
+    CassError rc = cass_value_get_uuid(value, &uuid);
+    if (rc != CASS_OK) return rc;
+    char *permanent = (char *) malloc(sizeof(uint64_t) * 2);
+    TupleRowFactory::cassuuid2uuid(uuid, &permanent);
+    memcpy(data, &permanent, sizeof(char *));
+    return CASS_OK;
+}
+
+template<typename T, typename C, CassError (*set)(CassStatement *, size_t, C)>
+static CassError bind_value(CassStatement *statement, size_t index, const void *element) {
+    return set(statement, index, (C) *static_cast<const T *>(element));
+}
+
+static CassError bind_bool(CassStatement *statement, size_t index, const void *element) {
+    return cass_statement_bind_bool(statement, index, *static_cast<const bool *>(element) ? cass_true : cass_false);
+}
+
+static CassError bind_text(CassStatement *statement, size_t index, const void *element) {
+    return cass_statement_bind_string(statement, index, *static_cast<char *const *>(element));
+}
+
+static CassError bind_blob(CassStatement *statement, size_t index, const void *element) {
+    const unsigned char *byte_array = *static_cast<unsigned char *const *>(element);
+    uint64_t num_bytes;
+    memcpy(&num_bytes, byte_array, sizeof(uint64_t));
+    return cass_statement_bind_bytes(statement, index, byte_array + sizeof(uint64_t), num_bytes);
+}
+
+static CassError bind_uuid(CassStatement *statement, size_t index, const void *element) {
+    CassUuid cass_uuid;
+    TupleRowFactory::uuid2cassuuid((const uint64_t **) element, cass_uuid);
+    return cass_statement_bind_uuid(statement, index, cass_uuid);
+}
+
 /***
  * Builds a tuple factory to retrieve tuples based on rows and keys
  * extracting the information from Cassandra to decide the types to be used
@@ -40,10 +116,75 @@ TupleRowFactory::TupleRowFactory(std::shared_ptr<const std::vector<ColumnMeta> >
         std::vector<ColumnMeta>::const_iterator last_element = --row_info->end();
         total_bytes = last_element->position + last_element->size;
     }
-	initialize_mapStringValues();
+    build_plan();
     HecubaExtrae_event(HECUBADBG, HECUBA_END);
 }
 
+/***
+ * Selects once, from the type of each column, the functions which decode and bind it, so
+ * that the per row loops do not dispatch on the type. The types without a specialized
+ * function (tuples, numpy metas, dates...) keep going through cass_to_c and bind_column
+ */
+void TupleRowFactory::build_plan() {
+    plan.clear();
+    plan.reserve(metadata->size());
+    fixed_width = true;
+    for (const ColumnMeta &meta : *metadata) {
+        ColumnPlan col = {meta.position, nullptr, nullptr, ""};
+        switch (meta.type) {
+            case CASS_VALUE_TYPE_VARINT:
+            case CASS_VALUE_TYPE_BIGINT:
+                col = {meta.position, decode_value<cass_int64_t, cass_value_get_int64>,
+                       bind_value<int64_t, cass_int64_t, cass_statement_bind_int64>, "bigint/varint"};
+                break;
+            case CASS_VALUE_TYPE_BOOLEAN:
+                col = {meta.position, decode_bool, bind_bool, "bool"};
+                break;
+            case CASS_VALUE_TYPE_COUNTER:
+                col = {meta.position, decode_value<cass_uint32_t, cass_value_get_uint32>,
+                       bind_value<uint64_t, cass_int64_t, cass_statement_bind_int64>, "counter"};
+                break;
+            case CASS_VALUE_TYPE_DOUBLE:
+                col = {meta.position, decode_value<cass_double_t, cass_value_get_double>,
+                       bind_value<double, cass_double_t, cass_statement_bind_double>, "double"};
+                break;
+            case CASS_VALUE_TYPE_FLOAT:
+                col = {meta.position, decode_value<cass_float_t, cass_value_get_float>,
+                       bind_value<float, cass_float_t, cass_statement_bind_float>, "float"};
+                break;
+            case CASS_VALUE_TYPE_INT:
+                col = {meta.position, decode_value<cass_int32_t, cass_value_get_int32>,
+                       bind_value<int32_t, cass_int32_t, cass_statement_bind_int32>, "int32"};
+                break;
+            case CASS_VALUE_TYPE_SMALL_INT:
+                col = {meta.position, decode_value<cass_int16_t, cass_value_get_int16>,
+                       bind_value<int16_t, cass_int16_t, cass_statement_bind_int16>, "small int as int16"};
+                break;
+            case CASS_VALUE_TYPE_TINY_INT:
+                col = {meta.position, decode_value<cass_int8_t, cass_value_get_int8>,
+                       bind_value<int8_t, cass_int8_t, cass_statement_bind_int8>, "tiny int as int8"};
+                break;
+            case CASS_VALUE_TYPE_TEXT:
+            case CASS_VALUE_TYPE_VARCHAR:
+            case CASS_VALUE_TYPE_ASCII:
+                col = {meta.position, decode_text, bind_text, "text"};
+                fixed_width = false;
+                break;
+            case CASS_VALUE_TYPE_BLOB:
+                col = {meta.position, decode_blob, bind_blob, "bytes"};
+                fixed_width = false;
+                break;
+            case CASS_VALUE_TYPE_UUID:
+                col = {meta.position, decode_uuid, bind_uuid, "UUID"};
+                fixed_width = false;
+                break;
+            default:
+                fixed_width = false;
+        }
+        plan.push_back(col);
+    }
+}
+
 
 
 /*** TUPLE BUILDERS ***/
@@ -66,29 +207,50 @@ TupleRow *TupleRowFactory::make_tuple(void *data) const {
  */
 TupleRow *TupleRowFactory::make_tuple(const CassRow *row) {
     if (!row) return NULL;
-    char *buffer = nullptr;
-
-    if (total_bytes > 0) buffer = (char *) malloc(total_bytes);
-
-    TupleRow *new_tuple = new TupleRow(metadata, total_bytes, buffer);
+    TupleRow *new_tuple = new TupleRow(metadata, total_bytes);
+    char *buffer = (char *) new_tuple->get_payload();
+    const uint16_t ncolumns = (uint16_t) plan.size();
+
+    if (fixed_width) {
+        // Straight decode of every column, no allocations and no fallback
+        for (uint16_t i = 0; i < ncolumns; ++i) {
+            CassError rc = plan[i].decode(cass_row_get_column(row, i), buffer + plan[i].position);
+            if (rc != CASS_OK) decode_failed(new_tuple, rc, i);
+        }
+        return new_tuple;
+    }
 
-    CassIterator *it = cass_iterator_from_row(row);
-    for (uint16_t i = 0; cass_iterator_next(it) && i < metadata->size(); ++i) {
-        if (cass_to_c(cass_iterator_get_column(it), buffer + metadata->at(i).position, i) == -1) {
+    for (uint16_t i = 0; i < ncolumns; ++i) {
+        const ColumnPlan &col = plan[i];
+        const CassValue *value = cass_row_get_column(row, i);
+        if (col.decode) {
+            CassError rc = col.decode(value, buffer + col.position);
+            if (rc != CASS_OK) decode_failed(new_tuple, rc, i);
+        } else if (cass_to_c(value, buffer + col.position, i) == -1) {
             new_tuple->setNull(i);
         }
     }
-    cass_iterator_free(it);
     return new_tuple;
 }
 
+/***
+ * Handles a column the plan could not decode: null values are flagged in the tuple,
+ * anything else is an error
+ */
+void TupleRowFactory::decode_failed(TupleRow *tuple, CassError rc, uint16_t col) const {
+    if (rc == CASS_ERROR_LIB_NULL_VALUE) {
+        tuple->setNull(col);
+        return;
+    }
+    CHECK_CASS("TupleRowFactory: Cassandra to C parse " + std::string(plan[col].type_name) +
+               " unsuccessful, column:" + std::to_string(col));
+}
+
 //build a tuple row for just one value of a cassandra row
 //we need this to return just one column
 TupleRow *TupleRowFactory::make_tuple(const CassValue *value) {
-    char *buffer = nullptr;
-    if (total_bytes > 0) buffer = (char *) malloc(total_bytes);
-
-    TupleRow *new_tuple = new TupleRow(metadata, total_bytes, buffer);
+    TupleRow *new_tuple = new TupleRow(metadata, total_bytes);
+    char *buffer = (char *) new_tuple->get_payload();
 
     if (cass_to_c(value, buffer, 0) == -1) {
         new_tuple->setNull(0);
@@ -551,7 +713,7 @@ TupleRowFactory::bind(CassTuple *tuple, const TupleRow *row) const {
        uuid: RFC4122 UUID format BIGENDIAN
 */
 void
-TupleRowFactory::uuid2cassuuid(const uint64_t** uuid, CassUuid& cass_uuid) const {
+TupleRowFactory::uuid2cassuuid(const uint64_t** uuid, CassUuid& cass_uuid) {
     const uint64_t *time_and_version = *uuid;
     const uint64_t *clock_seq_and_node = *uuid + 1;
 
@@ -580,7 +742,7 @@ TupleRowFactory::uuid2cassuuid(const uint64_t** uuid, CassUuid& cass_uuid) const
 }
 
 void
-TupleRowFactory::cassuuid2uuid(const CassUuid& cass_uuid, char** uuid) const {
+TupleRowFactory::cassuuid2uuid(const CassUuid& cass_uuid, char** uuid) {
     char *p = (*uuid);
     char *psrc = (char*)&cass_uuid.time_and_version;
     // Recode time_low
@@ -621,252 +783,264 @@ TupleRowFactory::bind(CassStatement *statement, const TupleRow *row, u_int16_t o
         uint16_t bind_pos = offset + i;
         const void *element_i = row->get_element(i);
         if (element_i != nullptr && !row->isNull(i)) {
-            switch (metadata->at(i).type) {
-                case CASS_VALUE_TYPE_VARCHAR:
-                case CASS_VALUE_TYPE_TEXT:
-                case CASS_VALUE_TYPE_ASCII: {
-                    int64_t *addr = (int64_t *) element_i;
-                    const char *d = reinterpret_cast<char *>(*addr);
-                    CassError rc = cass_statement_bind_string(statement, bind_pos, d);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [text], column:" +
-                               metadata->at(i).info.begin()->second);
-                    break;
-                }
-                case CASS_VALUE_TYPE_VARINT:
-                case CASS_VALUE_TYPE_BIGINT: {
-                    const int64_t *data = static_cast<const int64_t *>(element_i);
-                    CassError rc = cass_statement_bind_int64(statement, bind_pos,
-                                                             *data);//L means long long, K unsigned long long
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [bigint/varint], column:" +
-                               metadata->at(i).info.begin()->second);
-                    break;
-                }
-                case CASS_VALUE_TYPE_BLOB: {
-                    unsigned char *byte_array;
-                    byte_array = *(unsigned char **) element_i;
-                    uint64_t *num_bytes = (uint64_t *) byte_array;
-                    const unsigned char *bytes = byte_array + sizeof(uint64_t);
-                    cass_statement_bind_bytes(statement, bind_pos, bytes, *num_bytes);
-                    break;
-                }
-                case CASS_VALUE_TYPE_BOOLEAN: {
-                    cass_bool_t b = cass_false;
-                    const bool *bindbool = static_cast<const bool *>(element_i);
+            const ColumnPlan &col = plan[i];
+            if (col.bind) {
+                CassError rc = col.bind(statement, bind_pos, element_i);
+                CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [" + std::string(col.type_name) +
+                           "], column:" + metadata->at(i).info.begin()->second);
+            } else {
+                bind_column(statement, element_i, i, bind_pos);
+            }
+        } else {
+            //Element is a nullptr
+            CassError rc = cass_statement_bind_null(statement, bind_pos);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [Null value], column:" +
+                       metadata->at(i).info.begin()->second);
+        }
+    }
+}
 
-                    if (*bindbool) b = cass_true;
-                    CassError rc = cass_statement_bind_bool(statement, bind_pos, b);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [bool], column:" +
-                               metadata->at(i).info.begin()->second);
-                    break;
-                }
-                    //TODO parsed as uint32 or uint64 on different methods
-                case CASS_VALUE_TYPE_COUNTER: {
-                    const uint64_t *data = static_cast<const uint64_t *>(element_i);
-                    CassError rc = cass_statement_bind_int64(statement, bind_pos,
-                                                             *data);//L means long long, K unsigned long long
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [counter as uint64], column:" +
-                               metadata->at(i).info.begin()->second);
+/***
+ * Binds the value of a column whose type has no specialized binder in the plan
+ */
+void TupleRowFactory::bind_column(CassStatement *statement, const void *element_i, uint16_t i,
+                                  uint16_t bind_pos) const {
+    switch (metadata->at(i).type) {
+        case CASS_VALUE_TYPE_VARCHAR:
+        case CASS_VALUE_TYPE_TEXT:
+        case CASS_VALUE_TYPE_ASCII: {
+            int64_t *addr = (int64_t *) element_i;
+            const char *d = reinterpret_cast<char *>(*addr);
+            CassError rc = cass_statement_bind_string(statement, bind_pos, d);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [text], column:" +
+                       metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_VARINT:
+        case CASS_VALUE_TYPE_BIGINT: {
+            const int64_t *data = static_cast<const int64_t *>(element_i);
+            CassError rc = cass_statement_bind_int64(statement, bind_pos,
+                                                     *data);//L means long long, K unsigned long long
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [bigint/varint], column:" +
+                       metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_BLOB: {
+            unsigned char *byte_array;
+            byte_array = *(unsigned char **) element_i;
+            uint64_t *num_bytes = (uint64_t *) byte_array;
+            const unsigned char *bytes = byte_array + sizeof(uint64_t);
+            cass_statement_bind_bytes(statement, bind_pos, bytes, *num_bytes);
+            break;
+        }
+        case CASS_VALUE_TYPE_BOOLEAN: {
+            cass_bool_t b = cass_false;
+            const bool *bindbool = static_cast<const bool *>(element_i);
 
-                    break;
-                }
-                case CASS_VALUE_TYPE_DOUBLE: {
-                    const double *data = static_cast<const double *>(element_i);
-                    CassError rc = cass_statement_bind_double(statement, bind_pos, *data);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [double], column:" +
-                               metadata->at(i).info.begin()->second);
+            if (*bindbool) b = cass_true;
+            CassError rc = cass_statement_bind_bool(statement, bind_pos, b);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [bool], column:" +
+                       metadata->at(i).info.begin()->second);
+            break;
+        }
+            //TODO parsed as uint32 or uint64 on different methods
+        case CASS_VALUE_TYPE_COUNTER: {
+            const uint64_t *data = static_cast<const uint64_t *>(element_i);
+            CassError rc = cass_statement_bind_int64(statement, bind_pos,
+                                                     *data);//L means long long, K unsigned long long
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [counter as uint64], column:" +
+                       metadata->at(i).info.begin()->second);
 
-                    break;
-                }
-                case CASS_VALUE_TYPE_FLOAT: {
-                    const float *data = static_cast<const float *>(element_i);
+            break;
+        }
+        case CASS_VALUE_TYPE_DOUBLE: {
+            const double *data = static_cast<const double *>(element_i);
+            CassError rc = cass_statement_bind_double(statement, bind_pos, *data);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [double], column:" +
+                       metadata->at(i).info.begin()->second);
 
-                    CassError rc = cass_statement_bind_float(statement, bind_pos, *data);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [float], column:" +
-                               metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_FLOAT: {
+            const float *data = static_cast<const float *>(element_i);
 
-                    break;
-                }
-                case CASS_VALUE_TYPE_INT: {
-                    const int32_t *data = static_cast<const int32_t *>(element_i);
+            CassError rc = cass_statement_bind_float(statement, bind_pos, *data);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [float], column:" +
+                       metadata->at(i).info.begin()->second);
 
-                    CassError rc = cass_statement_bind_int32(statement, bind_pos, *data);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [int32], column:" +
-                               metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_INT: {
+            const int32_t *data = static_cast<const int32_t *>(element_i);
 
-                    break;
-                }
-                case CASS_VALUE_TYPE_UUID: {
-                    const uint64_t **uuid = (const uint64_t **) element_i;
+            CassError rc = cass_statement_bind_int32(statement, bind_pos, *data);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [int32], column:" +
+                       metadata->at(i).info.begin()->second);
 
-                    CassUuid cass_uuid;
-                    uuid2cassuuid(uuid, cass_uuid);
+            break;
+        }
+        case CASS_VALUE_TYPE_UUID: {
+            const uint64_t **uuid = (const uint64_t **) element_i;
 
-                    char myfinal[CASS_UUID_STRING_LENGTH];
-                    cass_uuid_string(cass_uuid, myfinal);
+            CassUuid cass_uuid;
+            uuid2cassuuid(uuid, cass_uuid);
 
-                    CassError rc = cass_statement_bind_uuid(statement, bind_pos, cass_uuid);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UUID], column:" +
-                               metadata->at(i).info.begin()->second);
+            CassError rc = cass_statement_bind_uuid(statement, bind_pos, cass_uuid);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UUID], column:" +
+                       metadata->at(i).info.begin()->second);
 
-                    break;
-                }
-                case CASS_VALUE_TYPE_SMALL_INT: {
-                    const int16_t *data = static_cast<const int16_t *>(element_i);
-                    CassError rc = cass_statement_bind_int16(statement, bind_pos, *data);
-                    CHECK_CASS(
-                            "TupleRowFactory: Cassandra binding query unsuccessful [small int as int16], column:" +
-                            metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_SMALL_INT: {
+            const int16_t *data = static_cast<const int16_t *>(element_i);
+            CassError rc = cass_statement_bind_int16(statement, bind_pos, *data);
+            CHECK_CASS(
+                    "TupleRowFactory: Cassandra binding query unsuccessful [small int as int16], column:" +
+                    metadata->at(i).info.begin()->second);
 
-                    break;
-                }
-                case CASS_VALUE_TYPE_TINY_INT: {
-                    const int8_t *data = static_cast<const int8_t *>(element_i);
-                    CassError rc = cass_statement_bind_int8(statement, bind_pos, *data);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [tiny int as int8], column:" +
-                               metadata->at(i).info.begin()->second);
-                    break;
-                }
-                case CASS_VALUE_TYPE_TUPLE: {
-                    TupleRow **ptr = (TupleRow **) element_i;
-                    const TupleRow *inner_data = *ptr;
-                    TupleRowFactory TFACT = TupleRowFactory(metadata->at(i).pointer);
-                    unsigned long n_types = metadata->at(i).pointer->size();
-                    CassTuple *tuple = cass_tuple_new(n_types);
-                    TFACT.bind(tuple, inner_data);
-                    cass_statement_bind_tuple(statement, bind_pos, tuple);
-                    cass_tuple_free(tuple);
-                    break;
-                }
-                case CASS_VALUE_TYPE_DATE: {
-                    const time_t time = *((time_t *) element_i);
-                    cass_uint32_t year_month_day = cass_date_from_epoch(time);
-                    CassError rc = cass_statement_bind_uint32(statement, bind_pos, year_month_day);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [date as int64], column:" +
-                               metadata->at(i).info.begin()->second);
-                    break;
-                }
-                case CASS_VALUE_TYPE_TIME: {
-                    int64_t time = *((int64_t *) element_i);
-                    CassError rc = cass_statement_bind_int64(statement, bind_pos, time);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [time as int64], column:" +
-                               metadata->at(i).info.begin()->second);
-                    break;
-                }
-                case CASS_VALUE_TYPE_TIMESTAMP: {
-                    cass_int64_t time = *((int64_t *) element_i);
-                    CassError rc = cass_statement_bind_int64(statement, bind_pos, time);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [timestamp as int64], column:" +
-                               metadata->at(i).info.begin()->second);
-                    break;
-                }
-                case CASS_VALUE_TYPE_UDT: {
-                    int64_t *addr = *((int64_t **) element_i);
-                    int64_t size = *addr;
-                    addr=(int64_t *)(((char *) addr)+sizeof(int64_t));
-                    CassError rc;
-
-                    CassUserType* cass_np_meta = cass_user_type_new_from_data_type(metadata->at(i).dtype);
-
-                    ArrayMetadata np_metas = ArrayMetadata(); // Dummy ArrayMetadata to store temporal values
-
-                    /* Minimum size of ArrayMetaData. 'sizeof' can not be used as the compiler may add some padding */
-
-
-                    int64_t sizeof_ArrayMetaData = sizeof(np_metas.elem_size)
-                            + sizeof(np_metas.partition_type)
-                            + sizeof(np_metas.flags)
-                            + sizeof(np_metas.typekind)
-                            + sizeof(np_metas.byteorder);
-                    if (size < sizeof_ArrayMetaData) {
-                            throw ModuleException("Corrupted data. Data does not fit ArrayMetaData");
-                    }
-                    int offset = 0;
-                    unsigned char *byte_array = reinterpret_cast<unsigned char*>(addr);
-                    memcpy(&np_metas.flags, byte_array + offset, sizeof(np_metas.flags));
-                    offset += sizeof(np_metas.flags);
-                    memcpy(&np_metas.elem_size, byte_array + offset, sizeof(np_metas.elem_size));
-                    offset += sizeof(np_metas.elem_size);
-                    memcpy(&np_metas.partition_type, byte_array + offset, sizeof(np_metas.partition_type));
-                    offset += sizeof(np_metas.partition_type);
-                    memcpy(&np_metas.typekind, byte_array + offset, sizeof(np_metas.typekind));
-                    offset += sizeof(np_metas.typekind);
-                    memcpy(&np_metas.byteorder, byte_array + offset, sizeof(np_metas.byteorder));
-                    offset += sizeof(np_metas.byteorder);
-                    // The remaining elements will be read later to avoid the recreation the vectors                        
-                    uint32_t remain = (size - offset)/sizeof(uint32_t);
-
-                    if ((remain <= 0) || ((remain % 2) != 0)) {
-                            throw ModuleException("Corrupted data. Data does not fit ArrayMetaData or even number of dims/strides");
-                    }
-                    uint32_t nelems = remain / 2;
-                    std::string field_name;
-
-                    field_name  = "flags";
-                    rc = cass_user_type_set_int32_by_name(cass_np_meta, field_name.c_str(), np_metas.flags);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-                    field_name  = "elem_size";
-                    rc = cass_user_type_set_int32_by_name(cass_np_meta, field_name.c_str(), np_metas.elem_size);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-                    field_name  = "partition_type";
-                    rc = cass_user_type_set_int8_by_name(cass_np_meta, field_name.c_str(), np_metas.partition_type);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-                    field_name  = "typekind";
-                    rc = cass_user_type_set_string_by_name_n(cass_np_meta, field_name.c_str(), field_name.length(), &np_metas.typekind, 1);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-                    field_name  = "byteorder";
-                    rc = cass_user_type_set_string_by_name_n(cass_np_meta, field_name.c_str(), field_name.length(), &np_metas.byteorder, 1);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-
-                    field_name="dims";
-                    CassCollection* dims_collection = cass_collection_new(CASS_COLLECTION_TYPE_LIST, nelems);
-                    for (uint32_t pos = 0; pos < nelems; pos++ ) {
-                        uint32_t value;
-                        memcpy(&value, byte_array + offset, sizeof(value));
-                        offset += sizeof(value);
-                        rc = cass_collection_append_int32(dims_collection, value);
-                        CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-                    }
-
-                    rc = cass_user_type_set_collection_by_name(cass_np_meta,field_name.c_str(),dims_collection);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-                    field_name="strides";
-                    CassCollection* str_collection = cass_collection_new(CASS_COLLECTION_TYPE_LIST,nelems);
-                    for (uint32_t pos = 0; pos < nelems; pos++ ) {
-                           uint32_t value;
-                           memcpy(&value, byte_array + offset, sizeof(value));
-                        offset += sizeof(value);
-                        rc = cass_collection_append_int32(str_collection, value);
-                        CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-                    }
-
-                    rc = cass_user_type_set_collection_by_name(cass_np_meta,field_name.c_str(),str_collection);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
-
-                    rc = cass_statement_bind_user_type(statement, bind_pos, cass_np_meta);
-                    CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], column:" +
-                               metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_TINY_INT: {
+            const int8_t *data = static_cast<const int8_t *>(element_i);
+            CassError rc = cass_statement_bind_int8(statement, bind_pos, *data);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [tiny int as int8], column:" +
+                       metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_TUPLE: {
+            TupleRow **ptr = (TupleRow **) element_i;
+            const TupleRow *inner_data = *ptr;
+            TupleRowFactory TFACT = TupleRowFactory(metadata->at(i).pointer);
+            unsigned long n_types = metadata->at(i).pointer->size();
+            CassTuple *tuple = cass_tuple_new(n_types);
+            TFACT.bind(tuple, inner_data);
+            cass_statement_bind_tuple(statement, bind_pos, tuple);
+            cass_tuple_free(tuple);
+            break;
+        }
+        case CASS_VALUE_TYPE_DATE: {
+            const time_t time = *((time_t *) element_i);
+            cass_uint32_t year_month_day = cass_date_from_epoch(time);
+            CassError rc = cass_statement_bind_uint32(statement, bind_pos, year_month_day);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [date as int64], column:" +
+                       metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_TIME: {
+            int64_t time = *((int64_t *) element_i);
+            CassError rc = cass_statement_bind_int64(statement, bind_pos, time);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [time as int64], column:" +
+                       metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_TIMESTAMP: {
+            cass_int64_t time = *((int64_t *) element_i);
+            CassError rc = cass_statement_bind_int64(statement, bind_pos, time);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [timestamp as int64], column:" +
+                       metadata->at(i).info.begin()->second);
+            break;
+        }
+        case CASS_VALUE_TYPE_UDT: {
+            int64_t *addr = *((int64_t **) element_i);
+            int64_t size = *addr;
+            addr=(int64_t *)(((char *) addr)+sizeof(int64_t));
+            CassError rc;
 
+            CassUserType* cass_np_meta = cass_user_type_new_from_data_type(metadata->at(i).dtype);
 
-                    break;
+            ArrayMetadata np_metas = ArrayMetadata(); // Dummy ArrayMetadata to store temporal values
 
-                }
-                case CASS_VALUE_TYPE_DECIMAL:
-                case CASS_VALUE_TYPE_TIMEUUID:
-                case CASS_VALUE_TYPE_INET:
-                case CASS_VALUE_TYPE_LIST:
-                case CASS_VALUE_TYPE_MAP:
-                case CASS_VALUE_TYPE_SET:
-                case CASS_VALUE_TYPE_CUSTOM:
-                case CASS_VALUE_TYPE_UNKNOWN:
-                default:
-                    throw ModuleException("Default behaviour not supported");
+            /* Minimum size of ArrayMetaData. 'sizeof' can not be used as the compiler may add some padding */
+
+
+            int64_t sizeof_ArrayMetaData = sizeof(np_metas.elem_size)
+                    + sizeof(np_metas.partition_type)
+                    + sizeof(np_metas.flags)
+                    + sizeof(np_metas.typekind)
+                    + sizeof(np_metas.byteorder);
+            if (size < sizeof_ArrayMetaData) {
+                    throw ModuleException("Corrupted data. Data does not fit ArrayMetaData");
             }
-        } else {
-            //Element is a nullptr
-            CassError rc = cass_statement_bind_null(statement, bind_pos);
-            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [Null value], column:" +
+            int offset = 0;
+            unsigned char *byte_array = reinterpret_cast<unsigned char*>(addr);
+            memcpy(&np_metas.flags, byte_array + offset, sizeof(np_metas.flags));
+            offset += sizeof(np_metas.flags);
+            memcpy(&np_metas.elem_size, byte_array + offset, sizeof(np_metas.elem_size));
+            offset += sizeof(np_metas.elem_size);
+            memcpy(&np_metas.partition_type, byte_array + offset, sizeof(np_metas.partition_type));
+            offset += sizeof(np_metas.partition_type);
+            memcpy(&np_metas.typekind, byte_array + offset, sizeof(np_metas.typekind));
+            offset += sizeof(np_metas.typekind);
+            memcpy(&np_metas.byteorder, byte_array + offset, sizeof(np_metas.byteorder));
+            offset += sizeof(np_metas.byteorder);
+            // The remaining elements will be read later to avoid the recreation the vectors                        
+            uint32_t remain = (size - offset)/sizeof(uint32_t);
+
+            if ((remain <= 0) || ((remain % 2) != 0)) {
+                    throw ModuleException("Corrupted data. Data does not fit ArrayMetaData or even number of dims/strides");
+            }
+            uint32_t nelems = remain / 2;
+            std::string field_name;
+
+            field_name  = "flags";
+            rc = cass_user_type_set_int32_by_name(cass_np_meta, field_name.c_str(), np_metas.flags);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+            field_name  = "elem_size";
+            rc = cass_user_type_set_int32_by_name(cass_np_meta, field_name.c_str(), np_metas.elem_size);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+            field_name  = "partition_type";
+            rc = cass_user_type_set_int8_by_name(cass_np_meta, field_name.c_str(), np_metas.partition_type);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+            field_name  = "typekind";
+            rc = cass_user_type_set_string_by_name_n(cass_np_meta, field_name.c_str(), field_name.length(), &np_metas.typekind, 1);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+            field_name  = "byteorder";
+            rc = cass_user_type_set_string_by_name_n(cass_np_meta, field_name.c_str(), field_name.length(), &np_metas.byteorder, 1);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+
+            field_name="dims";
+            CassCollection* dims_collection = cass_collection_new(CASS_COLLECTION_TYPE_LIST, nelems);
+            for (uint32_t pos = 0; pos < nelems; pos++ ) {
+                uint32_t value;
+                memcpy(&value, byte_array + offset, sizeof(value));
+                offset += sizeof(value);
+                rc = cass_collection_append_int32(dims_collection, value);
+                CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+            }
+
+            rc = cass_user_type_set_collection_by_name(cass_np_meta,field_name.c_str(),dims_collection);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+            field_name="strides";
+            CassCollection* str_collection = cass_collection_new(CASS_COLLECTION_TYPE_LIST,nelems);
+            for (uint32_t pos = 0; pos < nelems; pos++ ) {
+                   uint32_t value;
+                   memcpy(&value, byte_array + offset, sizeof(value));
+                offset += sizeof(value);
+                rc = cass_collection_append_int32(str_collection, value);
+                CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+            }
+
+            rc = cass_user_type_set_collection_by_name(cass_np_meta,field_name.c_str(),str_collection);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], field:" + field_name);
+
+            rc = cass_statement_bind_user_type(statement, bind_pos, cass_np_meta);
+            CHECK_CASS("TupleRowFactory: Cassandra binding query unsuccessful [UDT], column:" +
                        metadata->at(i).info.begin()->second);
+
+
+            break;
+
         }
+        case CASS_VALUE_TYPE_DECIMAL:
+        case CASS_VALUE_TYPE_TIMEUUID:
+        case CASS_VALUE_TYPE_INET:
+        case CASS_VALUE_TYPE_LIST:
+        case CASS_VALUE_TYPE_MAP:
+        case CASS_VALUE_TYPE_SET:
+        case CASS_VALUE_TYPE_CUSTOM:
+        case CASS_VALUE_TYPE_UNKNOWN:
+        default:
+            throw ModuleException("Default behaviour not supported");
     }
 }
 
@@ -62,16 +62,35 @@ public:
     TupleRow * decode(const void *encoded_buff) const;
     void * get_element_addr(const void *element_i, const uint16_t pos) const;
 
+    static void uuid2cassuuid(const uint64_t** uuid, CassUuid& cass_uuid);
+    static void cassuuid2uuid(const CassUuid& cass_uuid, char** uuid);
+
 private:
+    typedef CassError (*DecodeColumn)(const CassValue *value, void *data);
+    typedef CassError (*BindColumn)(CassStatement *statement, size_t index, const void *element);
+
+    // How a column is decoded and bound, selected once from its type
+    struct ColumnPlan {
+        uint16_t position;     // Offset of the column in the payload
+        DecodeColumn decode;   // nullptr: decoded by cass_to_c
+        BindColumn bind;       // nullptr: bound by bind_column
+        const char *type_name; // Used in the error messages
+    };
+
     std::shared_ptr<const std::vector<ColumnMeta> > metadata;
 
     uint16_t total_bytes;
 
+    std::vector<ColumnPlan> plan;
+    bool fixed_width = false; // All the columns are fixed width values decoded and bound by the plan
+
+    void build_plan();
+    void decode_failed(TupleRow *tuple, CassError rc, uint16_t col) const;
+    void bind_column(CassStatement *statement, const void *element_i, uint16_t i, uint16_t bind_pos) const;
+
 	void setArrayMetadataField(ArrayMetadata &np_metas, const char *field, size_t field_name_length, const CassValue* field_value) const;
 
     int cass_to_c(const CassValue *lhs, void *data, int16_t col) const;
-    void uuid2cassuuid(const uint64_t** uuid, CassUuid& cass_uuid) const;
-    void cassuuid2uuid(const CassUuid& cass_uuid, char** uuid) const ;
 
 };
 
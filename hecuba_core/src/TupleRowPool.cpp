@@ -0,0 +1,95 @@
+#include "TupleRowPool.h"
+
+#include <mutex>
+#include <cstdint>
+#include <vector>
+#include <unordered_map>
+
+// Blocks moved at once between a thread and the depot
+#define POOL_BATCH 64
+// Free blocks of a size kept by the depot, the rest are freed
+#define POOL_DEPOT_BLOCKS 65536
+
+namespace {
+
+    struct Depot {
+        std::mutex mx;
+        std::unordered_map<size_t, std::vector<void *> > free_blocks;
+    };
+
+    /* Never destroyed: threads may release blocks while the process exits */
+    Depot &depot() {
+        static Depot *shared = new Depot();
+        return *shared;
+    }
+
+    // Trivially destructible, still readable once the cache of the thread has been destroyed
+    thread_local bool cache_destroyed = false;
+
+    struct ThreadCache {
+        std::unordered_map<size_t, std::vector<void *> > free_blocks;
+
+        /* Moves the blocks above 'keep' to the depot, freeing the ones it can not hold */
+        void flush(size_t size, std::vector<void *> &blocks, size_t keep) {
+            Depot &d = depot();
+            std::lock_guard<std::mutex> lock(d.mx);
+            std::vector<void *> &shared = d.free_blocks[size];
+            while (blocks.size() > keep) {
+                if (shared.size() < POOL_DEPOT_BLOCKS) shared.push_back(blocks.back());
+                else free(blocks.back());
+                blocks.pop_back();
+            }
+        }
+
+        ~ThreadCache() {
+            for (auto &blocks : free_blocks) flush(blocks.first, blocks.second, 0);
+            cache_destroyed = true;
+        }
+    };
+
+    thread_local ThreadCache cache;
+
+    /* Sizes are rounded up to 16 bytes, the alignment of malloc, to share the free lists among close sizes */
+    inline size_t size_class(size_t size) {
+        return (size + 15) & ~(size_t) 15;
+    }
+}
+
+void *TupleRowPool::allocate(size_t size) {
+    size = size_class(size);
+    if (size == 0 || size > max_block_size || cache_destroyed) {
+        void *ptr = malloc(size ? size : 1);
+        if (!ptr) throw std::bad_alloc();
+        return ptr;
+    }
+    std::vector<void *> &blocks = cache.free_blocks[size];
+    if (blocks.empty()) {
+        Depot &d = depot();
+        std::lock_guard<std::mutex> lock(d.mx);
+        std::vector<void *> &shared = d.free_blocks[size];
+        for (uint32_t i = 0; i < POOL_BATCH && !shared.empty(); ++i) {
+            blocks.push_back(shared.back());
+            shared.pop_back();
+        }
+    }
+    if (blocks.empty()) {
+        void *ptr = malloc(size);
+        if (!ptr) throw std::bad_alloc();
+        return ptr;
+    }
+    void *ptr = blocks.back();
+    blocks.pop_back();
+    return ptr;
+}
+
+void TupleRowPool::release(void *ptr, size_t size) {
+    if (!ptr) return;
+    size = size_class(size);
+    if (size == 0 || size > max_block_size || cache_destroyed) {
+        free(ptr);
+        return;
+    }
+    std::vector<void *> &blocks = cache.free_blocks[size];
+    blocks.push_back(ptr);
+    if (blocks.size() >= 2 * POOL_BATCH) cache.flush(size, blocks, POOL_BATCH);
+}
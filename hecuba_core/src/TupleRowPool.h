@@ -0,0 +1,51 @@
+#ifndef HFETCH_TUPLEROWPOOL_H
+#define HFETCH_TUPLEROWPOOL_H
+
+#include <cstddef>
+#include <cstdlib>
+#include <new>
+
+/***
+ * Slab allocator for the TupleRows, their payloads and their reference counts: blocks are kept
+ * in free lists by size, so rows of the same table reuse the memory released by the previous ones.
+ * Each thread keeps its own free lists and exchanges batches of blocks with a shared depot, so
+ * rows produced by one thread (e.g. the prefetch) and released by another (e.g. Python) are recycled too.
+ * The blocks come from malloc, releasing them with free is safe.
+ */
+class TupleRowPool {
+public:
+    /* Blocks larger than this are not pooled */
+    static const size_t max_block_size = 4096;
+
+    static void *allocate(size_t size);
+
+    static void release(void *ptr, size_t size);
+
+    /* Allocator for std::allocate_shared, so the object and its reference count are a single pooled block */
+    template<class T>
+    struct Allocator {
+        typedef T value_type;
+
+        Allocator() = default;
+
+        template<class U>
+        Allocator(const Allocator<U> &) {}
+
+        T *allocate(size_t n) {
+            return static_cast<T *>(TupleRowPool::allocate(n * sizeof(T)));
+        }
+
+        void deallocate(T *ptr, size_t n) {
+            TupleRowPool::release(ptr, n * sizeof(T));
+        }
+
+        template<class U>
+        bool operator==(const Allocator<U> &) const { return true; }
+
+        template<class U>
+        bool operator!=(const Allocator<U> &) const { return false; }
+    };
+};
+
+
+#endif //HFETCH_TUPLEROWPOOL_H
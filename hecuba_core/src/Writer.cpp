@@ -3,6 +3,19 @@
 #include "unistd.h"
 #include "HecubaExtrae.h"
 #include "WriterThread.h"
+#include <dirent.h>
+#include <fcntl.h>
+#include <sys/file.h>
+#include <sys/stat.h>
+#include <random>
+#include <algorithm>
+
+#define DEFAULT_WRITER_BATCH_BYTES 32768
+#define DEFAULT_WRITER_BATCH_LINGER 1000
+#define DEFAULT_WRITER_RETRIES 10
+#define DEFAULT_WRITER_RETRY_DELAY 100
+#define DEFAULT_WRITER_RETRY_MAX_DELAY 10000
+#define DEFAULT_WRITER_MAX_RETRYING 1000
 
 
 
@@ -22,6 +35,121 @@ Writer::Writer(const TableMetadata *table_meta, CassSession *session,
             disable_timestamps = true;
     }
 
+    int32_t batch_rows = 0;
+    if (config.find("writer_batch_rows") != config.end()) {
+        std::string batch_rows_str = config["writer_batch_rows"];
+        try {
+            batch_rows = std::stoi(batch_rows_str);
+            if (batch_rows < 0) throw ModuleException("Writer batch rows value must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_batch_rows";
+            throw ModuleException(msg);
+        }
+    }
+    this->batch_rows = (uint32_t) batch_rows;
+
+    int32_t batch_bytes = DEFAULT_WRITER_BATCH_BYTES;
+    if (config.find("writer_batch_bytes") != config.end()) {
+        std::string batch_bytes_str = config["writer_batch_bytes"];
+        try {
+            batch_bytes = std::stoi(batch_bytes_str);
+            if (batch_bytes <= 0) throw ModuleException("Writer batch bytes value must be > 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_batch_bytes";
+            throw ModuleException(msg);
+        }
+    }
+    this->batch_bytes = (uint32_t) batch_bytes;
+
+    int64_t batch_linger = DEFAULT_WRITER_BATCH_LINGER;
+    if (config.find("writer_batch_linger") != config.end()) {
+        std::string batch_linger_str = config["writer_batch_linger"];
+        try {
+            batch_linger = std::stoll(batch_linger_str);
+            if (batch_linger < 0) throw ModuleException("Writer batch linger value must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_batch_linger";
+            throw ModuleException(msg);
+        }
+    }
+    this->batch_linger_us = (uint64_t) batch_linger;
+
+    if (config.find("writer_coalesce") != config.end()) {
+        std::string coalesce = config["writer_coalesce"];
+        for (long unsigned int i = 0; i < coalesce.size(); i++)
+            coalesce[i] = ::tolower(coalesce[i]);
+        this->coalesce_writes = (coalesce == "true" || coalesce == "yes" || coalesce == "1");
+    }
+
+    int32_t max_retries = DEFAULT_WRITER_RETRIES;
+    if (config.find("writer_retries") != config.end()) {
+        std::string max_retries_str = config["writer_retries"];
+        try {
+            max_retries = std::stoi(max_retries_str);
+            if (max_retries < 0) throw ModuleException("Writer retries value must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_retries";
+            throw ModuleException(msg);
+        }
+    }
+    this->max_retries = (uint32_t) max_retries;
+
+    int64_t retry_delay = DEFAULT_WRITER_RETRY_DELAY;
+    if (config.find("writer_retry_delay") != config.end()) {
+        std::string retry_delay_str = config["writer_retry_delay"];
+        try {
+            retry_delay = std::stoll(retry_delay_str);
+            if (retry_delay < 0) throw ModuleException("Writer retry delay value must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_retry_delay";
+            throw ModuleException(msg);
+        }
+    }
+    this->retry_delay_us = (uint64_t) retry_delay * 1000;
+
+    int64_t retry_max_delay = DEFAULT_WRITER_RETRY_MAX_DELAY;
+    if (config.find("writer_retry_max_delay") != config.end()) {
+        std::string retry_max_delay_str = config["writer_retry_max_delay"];
+        try {
+            retry_max_delay = std::stoll(retry_max_delay_str);
+            if (retry_max_delay < retry_delay) throw ModuleException("Writer retry maximum delay value must be >= writer_retry_delay");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_retry_max_delay";
+            throw ModuleException(msg);
+        }
+    }
+    this->retry_max_delay_us = (uint64_t) retry_max_delay * 1000;
+
+    int32_t max_retrying = DEFAULT_WRITER_MAX_RETRYING;
+    if (config.find("writer_max_retrying") != config.end()) {
+        std::string max_retrying_str = config["writer_max_retrying"];
+        try {
+            max_retrying = std::stoi(max_retrying_str);
+            if (max_retrying < 0) throw ModuleException("Writer maximum retrying rows value must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_max_retrying";
+            throw ModuleException(msg);
+        }
+    }
+    this->max_retrying = (uint32_t) max_retrying;
+    this->retrying = 0;
+
+    if (config.find("writer_spill_dir") != config.end()) this->spill_dir = config["writer_spill_dir"];
+
     this->session = session;
     this->table_metadata = table_meta;
     this->k_factory = new TupleRowFactory(table_meta->get_keys());
@@ -50,6 +178,8 @@ Writer::Writer(const TableMetadata *table_meta, CassSession *session,
         CHECK_CASS("writer cannot prepare: ");
         prepared_partial_queries[cm.info["name"]] = cass_future_get_prepared(future);
     }
+    create_single_value_factories();
+    prepare_timestamped_queries();
     HecubaExtrae_event(HECUBACASS, HBCASS_END);
     this->ncallbacks = 0;
     this->timestamp_gen = new TimestampGenerator();
@@ -76,12 +206,26 @@ Writer& Writer::operator = (const Writer& src) {
     if (this->v_factory != nullptr) { delete(this->v_factory); }
     this->k_factory = new TupleRowFactory(src.table_metadata->get_keys());
     this->v_factory = new TupleRowFactory(src.table_metadata->get_values());
+    create_single_value_factories();
 
     CassFuture *future = cass_session_prepare(session, src.table_metadata->get_insert_query());
     CassError rc = cass_future_error_code(future);
     CHECK_CASS("writer cannot prepare: ");
     this->prepared_query = cass_future_get_prepared(future);
     cass_future_free(future);
+    this->batch_rows = src.batch_rows;
+    this->batch_bytes = src.batch_bytes;
+    this->batch_linger_us = src.batch_linger_us;
+    this->coalesce_writes = src.coalesce_writes;
+    this->max_retries = src.max_retries;
+    this->retry_delay_us = src.retry_delay_us;
+    this->retry_max_delay_us = src.retry_max_delay_us;
+    this->max_retrying = src.max_retrying;
+    this->retrying = 0;
+    this->spill_dir = src.spill_dir; // The spill file is not shared, each Writer opens its own
+    for (auto it: prepared_timestamped_queries) cass_prepared_free(it.second);
+    prepared_timestamped_queries.clear();
+    prepare_timestamped_queries();
     // if we copy the writer we copy the characteristics of the writer but we do not inherit the pending writes: we initialize both dirty_blocks and data, and we set to 0 the number of callbacks
     //this->data = src.data; // concurrent_bounded_queue implements copy assignment: this does not compile because concurrent bounded queue implements move assignment
     //this->dirty_blocks = src.dirty_blocks; //concurrent_hash_map implements copy assignment
@@ -90,8 +234,9 @@ Writer& Writer::operator = (const Writer& src) {
     this->ncallbacks = 0;
     this->max_calls = src.max_calls;
     if (this->timestamp_gen != nullptr) { delete (this->timestamp_gen); }
-    this->timestamp_gen = new TimestampGenerator();; // TimestampGenerator has a class attribute of type mutex which is not copy-assignable
+    this->timestamp_gen = new TimestampGenerator(); // TimestampGenerator has an atomic attribute which is not copy-assignable
     this->lazy_write_enabled = src.lazy_write_enabled;
+    this->stats = src.stats;
 
     //kafka is plain c code, it does not implement copy assignment semantic
     if (this->topic_name != nullptr){ free(this->topic_name); }
@@ -120,6 +265,9 @@ Writer::~Writer() {
         cass_prepared_free(it.second);
         it.second = nullptr;
     }
+    for(auto it: prepared_timestamped_queries) {
+        cass_prepared_free(it.second);
+    }
 
     if (this->topic_name) {
         free(this->topic_name);
@@ -133,8 +281,10 @@ Writer::~Writer() {
         rd_kafka_destroy(this->producer);
         this->producer = NULL;
     }
+    if (this->spill_file) fclose(this->spill_file);
     delete (this->k_factory);
     delete (this->v_factory);
+    for (auto it: single_value_factories) delete (it.second);
     delete (this->timestamp_gen);
     delete (this->dirty_blocks);
     // table_metadata NOT FREED (Shared?)
@@ -309,8 +459,19 @@ void Writer::set_timestamp_gen(TimestampGenerator *time_gen) {
 }
 
 
+void Writer::set_stats(HecubaStats *stats) {
+    this->stats = stats;
+}
+
+HecubaStats *Writer::get_stats() const {
+    return this->stats;
+}
+
+
 void Writer::finish_async_call() {
-    ncallbacks--;
+    // Decremented under the lock: once the waiter sees 0 (e.g. in the destructor) this call no longer uses the Writer
+    std::lock_guard<std::mutex> lock(completion_mutex);
+    if (--ncallbacks == 0) completion_cv.notify_all();
 }
 void Writer::flush_dirty_blocks() {
     if (!this->lazy_write_enabled) return;
@@ -330,20 +491,27 @@ void Writer::flush_dirty_blocks() {
 // flush all the pending write requests: send them to Cassandra driver and wait for finalization (called from outside)
 void Writer::flush_elements() {
     wait_writes_completion();
+    std::string error;
+    {
+        std::lock_guard<std::mutex> lock(failed_mutex);
+        error.swap(write_error);
+    }
+    if (!error.empty()) throw ModuleException("Writes to " + std::string(table_metadata->get_table_name()) + " failed: " + error);
 }
 
 bool Writer::is_write_completed() const {
     return ( (ncallbacks == 0) && dirty_blocks->empty() );
 }
 
-// wait for callbacks execution for all sent write requests
+// wait for callbacks execution for all sent write requests of this Writer
 void Writer::wait_writes_completion(void) {
     HecubaExtrae_event(HECUBADBG, HECUBA_FLUSHELEMENTS);
-    flush_dirty_blocks();
     //std::cout<< "Writer::wait_writes_completion * Waiting for "<< data.size() << " Pending "<<ncallbacks<<" callbacks" <<" inflight"<<std::endl;
-    while( ! is_write_completed() ) {
-        std::this_thread::yield();
-    }
+    do {
+        flush_dirty_blocks(); // Blocks dirtied by other threads meanwhile are flushed in the next iteration
+        std::unique_lock<std::mutex> lock(completion_mutex);
+        completion_cv.wait(lock, [this]() { return ncallbacks == 0; });
+    } while ( ! is_write_completed() );
     HecubaExtrae_event(HECUBADBG, HECUBA_END);
     //std::cout<< "Writer::wait_writes_completion2* Waiting for "<< data.size() << " Pending "<<ncallbacks<<" callbacks" <<" inflight"<<std::endl;
 }
@@ -389,6 +557,46 @@ void Writer::write_to_cassandra(const TupleRow *keys, const TupleRow *values) {
     }
 }
 
+/* Write a set of rows, 'keys[i]' with 'values[i]', queueing them all at once */
+void Writer::write_to_cassandra(const std::vector<const TupleRow *> &keys, const std::vector<const TupleRow *> &values) {
+    if (keys.size() != values.size())
+        throw ModuleException("Writer: the number of keys and values to write must match");
+
+    if (lazy_write_enabled) {
+        for (size_t i = 0; i < keys.size(); ++i) {
+            write_to_cassandra(keys[i], values[i]);
+        }
+        return;
+    }
+
+    std::vector<const TupleRow *> queued_keys(keys.size());
+    for (size_t i = 0; i < keys.size(); ++i) {
+        TupleRow *k = new TupleRow(keys[i]);
+        if (!disable_timestamps) k->set_timestamp(timestamp_gen->next()); // Set write time
+        queued_keys[i] = k;
+    }
+
+    std::vector<const TupleRow *> queued_values;
+    queued_values.reserve(keys.size());
+    size_t nqueued = 0;
+    for (size_t i = 0; i < keys.size(); ++i) {
+        TupleRow *v = new TupleRow(values[i]);
+        if (coalesce_writes && coalesce_write(queued_keys[i], v)) {
+            delete (queued_keys[i]);
+            delete (v);
+            continue;
+        }
+        queued_keys[nqueued++] = queued_keys[i];
+        queued_values.push_back(v);
+    }
+    queued_keys.resize(nqueued);
+    if (queued_keys.empty()) return;
+
+    ncallbacks += (uint32_t) queued_keys.size();
+    stats->add(HecubaStats::WRITES_QUEUED, queued_keys.size());
+    WriterThread::get(*myconfig).queue_async_queries(this, queued_keys, queued_values);
+}
+
 void Writer::write_to_cassandra(void *keys, void *values) {
     const TupleRow *k = k_factory->make_tuple(keys);
     const TupleRow *v = v_factory->make_tuple(values);
@@ -403,52 +611,384 @@ void Writer::write_to_cassandra(void *keys, void *values , const char *value_nam
     // hides the benefit of it
     disable_lazy_write();
 
-    TupleRowFactory * v_single_factory = new TupleRowFactory(table_metadata->get_single_value(value_name));
     const TupleRow *k = k_factory->make_tuple(keys);
-    const TupleRow *v = v_single_factory->make_tuple(values);
+    const TupleRow *v = get_single_value_factory(value_name)->make_tuple(values);
     this->write_to_cassandra(k, v);
-    delete (v_single_factory);
     delete (k);
     delete (v);
 }
 
 
+/* Builds once the factories of the rows writing a single value, so that their decode and bind plans are reused */
+void Writer::create_single_value_factories() {
+    for (auto it: single_value_factories) delete (it.second);
+    single_value_factories.clear();
+    for (const ColumnMeta &cm: *(table_metadata->get_values())) {
+        const std::string &name = cm.info.at("name");
+        single_value_factories[name] = new TupleRowFactory(table_metadata->get_single_value(name.c_str()));
+    }
+}
+
+TupleRowFactory *Writer::get_single_value_factory(const std::string &name) const {
+    auto it = single_value_factories.find(name);
+    if (it == single_value_factories.end())
+        throw ModuleException("Writer: no column named " + name + " in " + std::string(table_metadata->get_table_name()));
+    return it->second;
+}
+
+/* Prepares the insert queries with the write time as a bound value, only used when rows are batched */
+void Writer::prepare_timestamped_queries() {
+    if (batch_rows <= 1 || disable_timestamps) return;
+
+    std::map<std::string, std::string> queries;
+    queries[""] = table_metadata->get_insert_query();
+    for (auto cm: *(table_metadata->get_values())) {
+        const char *insert_q = table_metadata->get_partial_insert_query(cm.info["name"]);
+        queries[cm.info["name"]] = insert_q;
+        free((void *) insert_q);
+    }
+    for (auto &query: queries) {
+        std::string insert_q = query.second.substr(0, query.second.find_last_of(')') + 1) + " USING TIMESTAMP ?;";
+        CassFuture *future = cass_session_prepare(session, insert_q.c_str());
+        CassError rc = cass_future_error_code(future);
+        CHECK_CASS("writer cannot prepare: ");
+        prepared_timestamped_queries[query.first] = cass_future_get_prepared(future);
+        cass_future_free(future);
+    }
+}
+
 /* bind_cassstatement: Prepare an statement and bind it with the passed keys and values */
-CassStatement* Writer::bind_cassstatement(const TupleRow* keys, const TupleRow* values) const {
+CassStatement* Writer::bind_cassstatement(const TupleRow* keys, const TupleRow* values, bool bind_timestamp) const {
     CassStatement *statement;
+    bind_timestamp = bind_timestamp && !this->disable_timestamps;
+    uint16_t nbound;
     // Check if it is writing the whole set of values or just a single one
     if (table_metadata->get_values()->size() > values->n_elem()) { // Single value written
         if (values->n_elem() > 1)
             throw ModuleException("async_query_execute: only supports 1 or all attributes write");
 
         ColumnMeta cm = values->get_metadata_element(0);
-        const CassPrepared *prepared_query = prepared_partial_queries.at(cm.info["name"]);
+        const CassPrepared *prepared_query = bind_timestamp ? prepared_timestamped_queries.at(cm.info["name"])
+                                                            : prepared_partial_queries.at(cm.info["name"]);
         statement = cass_prepared_bind(prepared_query);
         this->k_factory->bind(statement, keys, 0); //error
-        TupleRowFactory * v_single_factory = new TupleRowFactory(table_metadata->get_single_value(cm.info["name"].c_str()));
-        v_single_factory->bind(statement, values, this->k_factory->n_elements());
-        delete(v_single_factory);
+        get_single_value_factory(cm.info["name"])->bind(statement, values, this->k_factory->n_elements());
+        nbound = this->k_factory->n_elements() + 1;
 
     } else { // Whole row written
-        statement = cass_prepared_bind(prepared_query);
+        statement = cass_prepared_bind(bind_timestamp ? prepared_timestamped_queries.at("") : prepared_query);
         this->k_factory->bind(statement, keys, 0); //error
         this->v_factory->bind(statement, values, this->k_factory->n_elements());
+        nbound = this->k_factory->n_elements() + this->v_factory->n_elements();
     }
 
-    if (!this->disable_timestamps) {
+    if (bind_timestamp) {
+        cass_statement_bind_int64(statement, nbound, keys->get_timestamp());
+    } else if (!this->disable_timestamps) {
         cass_statement_set_timestamp(statement, keys->get_timestamp());
     }
     return statement;
 }
 
+std::string Writer::key_content(const TupleRow *keys, bool partition_only) const {
+    std::vector<uint32_t> sizes = k_factory->get_content_sizes(keys);
+    std::string content;
+    for (uint16_t i = 0; i < keys->n_elem(); ++i) {
+        const ColumnMeta &cm = keys->get_metadata_element(i);
+        if (partition_only && cm.col_type != CASS_COLUMN_TYPE_PARTITION_KEY) continue;
+        if (keys->isNull(i)) {
+            content.push_back('\0');
+            continue;
+        }
+        content.push_back('\1');
+        content.append((const char *) k_factory->get_element_addr(keys->get_element(i), i), sizes[i]);
+    }
+    return content;
+}
+
 void Writer::queue_async_query(const TupleRow* keys, const TupleRow* values){
     TupleRow *queued_keys = new TupleRow(keys);
     if (!disable_timestamps) queued_keys->set_timestamp(timestamp_gen->next()); // Set write time
 
+    TupleRow *queued_values = new TupleRow(values);
+    if (coalesce_writes && coalesce_write(queued_keys, queued_values)) {
+        delete (queued_keys);
+        delete (queued_values);
+        return;
+    }
+
     ncallbacks++;
-    WriterThread::get(*myconfig).queue_async_query(this, queued_keys, values);
+    stats->add(HecubaStats::WRITES_QUEUED);
+    WriterThread::get(*myconfig).queue_async_query(this, queued_keys, queued_values);
+}
+
+std::string Writer::pending_write_key(const TupleRow *keys, const TupleRow *values) const {
+    std::string key = key_content(keys, false);
+    if (table_metadata->get_values()->size() > values->n_elem()) { // Single value written
+        key.push_back('\0');
+        key += values->get_metadata_element(0).info.at("name");
+    }
+    return key;
+}
+
+/* If a write to the same key (and columns) is still queued, replaces its value and write time with the ones
+ * of this write and returns true. Otherwise registers this write, which must be queued, and returns false */
+bool Writer::coalesce_write(const TupleRow *keys, const TupleRow *values) {
+    std::string key = pending_write_key(keys, values);
+    std::lock_guard<std::mutex> lock(pending_mutex);
+    auto pending = pending_writes.find(key);
+    if (pending == pending_writes.end()) {
+        // The WriterThread takes the ownership of these pointers once they are queued
+        pending_writes.emplace(key, std::make_pair((TupleRow *) keys, (TupleRow *) values));
+        pending_write_keys.emplace(keys, std::move(key));
+        return false;
+    }
+    // The newest write time goes along the newest value, later writes still override this one
+    *pending->second.first = *keys;
+    *pending->second.second = *values;
+    stats->add(HecubaStats::WRITES_COALESCED);
+    return true;
+}
+
+void Writer::release_pending_write(const TupleRow *keys) const {
+    std::lock_guard<std::mutex> lock(pending_mutex);
+    auto pending = pending_write_keys.find(keys);
+    if (pending == pending_write_keys.end()) return;
+    pending_writes.erase(pending->second);
+    pending_write_keys.erase(pending);
 }
 
 CassSession* Writer::get_session() const {
     return session;
 }
+
+uint64_t Writer::get_retry_delay(uint32_t attempt) const {
+    static thread_local std::mt19937_64 rng(std::random_device{}());
+    uint64_t delay = retry_delay_us;
+    for (uint32_t i = 1; i < attempt && delay < retry_max_delay_us; ++i) delay *= 2;
+    delay = std::min(delay, retry_max_delay_us);
+    // Jitter: writers which failed together do not retry together
+    return std::uniform_int_distribution<uint64_t>(delay / 2, delay)(rng);
+}
+
+bool Writer::start_retry(uint32_t nrows) const {
+    if (retrying.fetch_add(nrows) + nrows <= max_retrying) return true;
+    retrying -= nrows;
+    return false;
+}
+
+void Writer::end_retry(uint32_t nrows) const {
+    retrying -= nrows;
+}
+
+void Writer::write_failed(const std::string &error) const {
+    std::lock_guard<std::mutex> lock(failed_mutex);
+    write_error = error;
+}
+
+/* Spill files of this table start with it, followed by the host and process which wrote them */
+std::string Writer::spill_prefix() const {
+    return std::string(table_metadata->get_keyspace()) + "." + table_metadata->get_table_name() + ".";
+}
+
+/* Appends to 'record' the columns of 'row' as: null flag (1 byte), size (4 bytes) and content */
+void Writer::serialize_row(std::string &record, const TupleRowFactory *factory, const TupleRow *row) const {
+    std::vector<uint32_t> sizes = factory->get_content_sizes(row);
+    for (uint16_t i = 0; i < row->n_elem(); ++i) {
+        if (row->isNull(i)) {
+            record.push_back('\0');
+            continue;
+        }
+        switch (row->get_metadata_element(i).type) {
+            case CASS_VALUE_TYPE_TUPLE:
+            case CASS_VALUE_TYPE_UDT:
+            case CASS_VALUE_TYPE_DATE:
+            case CASS_VALUE_TYPE_TIME:
+            case CASS_VALUE_TYPE_TIMESTAMP:
+                throw ModuleException("Spill of column " + row->get_metadata_element(i).info.at("name") + " not supported");
+            default:
+                break;
+        }
+        record.push_back('\1');
+        record.append((const char *) &sizes[i], sizeof(uint32_t));
+        record.append((const char *) factory->get_element_addr(row->get_element(i), i), sizes[i]);
+    }
+}
+
+/* Builds a TupleRow from the columns serialized at 'record', which is advanced past them */
+TupleRow *Writer::deserialize_row(const char *&record, const TupleRowFactory *factory) const {
+    std::shared_ptr<const std::vector<ColumnMeta> > metas = factory->get_metadata();
+    TupleRow *row = new TupleRow(metas, factory->get_nbytes());
+    char *buffer = (char *) row->get_payload();
+    for (uint16_t i = 0; i < metas->size(); ++i) {
+        if (*record++ == '\0') {
+            row->setNull(i);
+            continue;
+        }
+        uint32_t size;
+        memcpy(&size, record, sizeof(uint32_t));
+        record += sizeof(uint32_t);
+        char *dest = buffer + metas->at(i).position;
+        switch (metas->at(i).type) {
+            case CASS_VALUE_TYPE_UUID: {
+                uint64_t *uuid = new uint64_t[2]; // Freed with delete[] by the TupleRow
+                memcpy(uuid, record, sizeof(uint64_t) * 2);
+                memcpy(dest, &uuid, sizeof(uuid));
+                break;
+            }
+            case CASS_VALUE_TYPE_BLOB:
+            case CASS_VALUE_TYPE_TEXT:
+            case CASS_VALUE_TYPE_VARCHAR:
+            case CASS_VALUE_TYPE_ASCII: {
+                void *content = malloc(size);
+                memcpy(content, record, size);
+                memcpy(dest, &content, sizeof(content));
+                break;
+            }
+            default:
+                memcpy(dest, record, size);
+        }
+        record += size;
+    }
+    return row;
+}
+
+/* Returns true if 'fd' is still the file at 'path', i.e. no replay renamed it */
+static bool is_same_file(int fd, const std::string &path) {
+    struct stat opened, linked;
+    return fstat(fd, &opened) == 0 && stat(path.c_str(), &linked) == 0 &&
+           opened.st_dev == linked.st_dev && opened.st_ino == linked.st_ino;
+}
+
+/***
+ * Opens the spill file of this Writer for appending. It stays locked until closed,
+ * so replay_spilled_writes does not claim a file still being written.
+ * @return NULL if the file can not be opened
+ */
+FILE *Writer::open_spill_file() const {
+    char hostname[256] = "";
+    gethostname(hostname, sizeof(hostname) - 1);
+    std::string path = spill_dir + "/" + spill_prefix() + hostname + "." + std::to_string(getpid()) + "." +
+                       std::to_string((uintptr_t) this) + ".spill";
+    while (true) {
+        FILE *file = fopen(path.c_str(), "ab");
+        if (!file) {
+            std::cerr << "Writer: can not open the spill file " << path << ": " << strerror(errno) << std::endl;
+            return nullptr;
+        }
+        if (flock(fileno(file), LOCK_EX) != 0) {
+            std::cerr << "Writer: can not lock the spill file " << path << ": " << strerror(errno) << std::endl;
+            fclose(file);
+            return nullptr;
+        }
+        // A replay may have claimed the file between the open and the lock, its rows would be lost
+        if (is_same_file(fileno(file), path)) return file;
+        fclose(file);
+    }
+}
+
+/***
+ * Appends a row to the spill file of this Writer as: record size (4 bytes), written column name (2 bytes
+ * length and the name, empty for the whole row), write time (8 bytes), keys and values.
+ * @return false if spilling is disabled or the row can not be spilled
+ */
+bool Writer::spill_write(const TupleRow *keys, const TupleRow *values) const {
+    if (spill_dir.empty()) return false;
+    std::string record(sizeof(uint32_t), '\0');
+    try {
+        std::string name;
+        TupleRowFactory *factory = v_factory;
+        if (table_metadata->get_values()->size() > values->n_elem()) { // Single value written
+            name = values->get_metadata_element(0).info.at("name");
+            factory = get_single_value_factory(name);
+        }
+        uint16_t name_length = (uint16_t) name.size();
+        record.append((const char *) &name_length, sizeof(name_length));
+        record += name;
+        int64_t timestamp = keys->get_timestamp();
+        record.append((const char *) &timestamp, sizeof(timestamp));
+        serialize_row(record, k_factory, keys);
+        serialize_row(record, factory, values);
+    } catch (ModuleException &e) {
+        std::cerr << "Writer: " << e.what() << std::endl;
+        return false;
+    }
+    uint32_t record_size = (uint32_t) (record.size() - sizeof(uint32_t));
+    memcpy(&record[0], &record_size, sizeof(record_size));
+
+    std::lock_guard<std::mutex> lock(spill_mutex);
+    if (!spill_file && !(spill_file = open_spill_file())) return false;
+    if (fwrite(record.data(), 1, record.size(), spill_file) != record.size() || fflush(spill_file) != 0) {
+        std::cerr << "Writer: can not write to the spill file: " << strerror(errno) << std::endl;
+        return false;
+    }
+    return true;
+}
+
+uint64_t Writer::replay_spilled_writes() {
+    if (spill_dir.empty()) throw ModuleException("Writer: no spill directory configured (writer_spill_dir)");
+    {
+        // The rows spilled by this Writer so far are replayed too, later ones go to a new file
+        std::lock_guard<std::mutex> lock(spill_mutex);
+        if (spill_file) fclose(spill_file);
+        spill_file = nullptr;
+    }
+
+    // Claim the files by renaming them, so the rows are replayed once even if several processes replay them.
+    // Files still open by their Writer are locked and skipped: their rows are replayed once it closes them
+    std::string prefix = spill_prefix();
+    std::string claimed_suffix = ".replaying." + std::to_string(getpid());
+    std::vector<std::string> claimed;
+    DIR *dir = opendir(spill_dir.c_str());
+    if (!dir) throw ModuleException("Writer: can not open the spill directory " + spill_dir + ": " + strerror(errno));
+    for (struct dirent *entry = readdir(dir); entry != nullptr; entry = readdir(dir)) {
+        std::string name(entry->d_name);
+        if (name.compare(0, prefix.size(), prefix) != 0 || name.size() < prefix.size() + 6 ||
+            name.compare(name.size() - 6, 6, ".spill") != 0) continue;
+        std::string path = spill_dir + "/" + name;
+        int fd = open(path.c_str(), O_RDONLY);
+        if (fd < 0) continue; // Claimed by another replay
+        if (flock(fd, LOCK_EX | LOCK_NB) == 0 && is_same_file(fd, path) &&
+            rename(path.c_str(), (path + claimed_suffix).c_str()) == 0) {
+            claimed.push_back(path + claimed_suffix);
+        }
+        close(fd); // Releases the lock
+    }
+    closedir(dir);
+
+    uint64_t nrows = 0;
+    for (const std::string &path : claimed) {
+        FILE *file = fopen(path.c_str(), "rb");
+        if (!file) throw ModuleException("Writer: can not open the spill file " + path + ": " + strerror(errno));
+        uint32_t record_size;
+        std::vector<char> record;
+        while (fread(&record_size, sizeof(record_size), 1, file) == 1) {
+            record.resize(record_size);
+            if (fread(record.data(), 1, record_size, file) != record_size) break; // Truncated by a crash
+            const char *p = record.data();
+            uint16_t name_length;
+            memcpy(&name_length, p, sizeof(name_length));
+            p += sizeof(name_length);
+            std::string name(p, name_length);
+            p += name_length;
+            int64_t timestamp;
+            memcpy(&timestamp, p, sizeof(timestamp));
+            p += sizeof(timestamp);
+            TupleRowFactory *factory = name.empty() ? v_factory : get_single_value_factory(name);
+            TupleRow *keys = deserialize_row(p, k_factory);
+            TupleRow *values = deserialize_row(p, factory);
+            // Keep the original write time, so newer writes done meanwhile are not overwritten
+            keys->set_timestamp(timestamp);
+            ncallbacks++;
+            stats->add(HecubaStats::WRITES_QUEUED);
+            WriterThread::get(*myconfig).queue_async_query(this, keys, values);
+            ++nrows;
+        }
+        fclose(file);
+    }
+    wait_writes_completion();
+    // Rows failing again have been spilled to a new file or reported, the replayed files are not needed anymore
+    for (const std::string &path : claimed) unlink(path.c_str());
+    flush_elements();
+    return nrows;
+}
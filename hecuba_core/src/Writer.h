@@ -5,8 +5,11 @@
 #include <thread>
 #include <mutex>
 #include <atomic>
+#include <condition_variable>
 #include <map>
+#include <unordered_map>
 #include <functional>
+#include <cstdio>
 #include <librdkafka/rdkafka.h>
 
 #include "tbb/concurrent_queue.h"
@@ -14,6 +17,7 @@
 
 #include "TimestampGenerator.h"
 #include "TupleRowFactory.h"
+#include "HecubaStats.h"
 
 
 class Writer {
@@ -27,11 +31,18 @@ public:
 
     void set_timestamp_gen(TimestampGenerator *time_gen);
 
+    /* The statistics are not owned by the Writer */
+    void set_stats(HecubaStats *stats);
+
+    HecubaStats *get_stats() const;
+
 
     void flush_elements();
 
     void write_to_cassandra(const TupleRow *keys, const TupleRow *values);
 
+    void write_to_cassandra(const std::vector<const TupleRow *> &keys, const std::vector<const TupleRow *> &values);
+
     void write_to_cassandra(void *keys, void *values);
 
     void enable_stream(const char* topic_name, std::map<std::string,std::string>  &config);
@@ -55,7 +66,56 @@ public:
     void enable_lazy_write(void);
     void disable_lazy_write(void);
 
-    CassStatement* bind_cassstatement(const TupleRow* keys, const TupleRow* values) const;
+    /* bind_timestamp: bind the write time as a value (USING TIMESTAMP ?) instead of setting it on the statement,
+     * needed for the rows sent in a batch as the protocol only keeps a timestamp per batch */
+    CassStatement* bind_cassstatement(const TupleRow* keys, const TupleRow* values, bool bind_timestamp = false) const;
+    /* Content of the keys (or of their partition key columns) as bytes, equal for equal keys */
+    std::string key_content(const TupleRow *keys, bool partition_only) const;
+
+    /* Rows of the same partition grouped into an unlogged batch, 0 or 1 to send each row on its own */
+    uint32_t get_batch_rows() const {
+        return batch_rows;
+    }
+
+    uint32_t get_batch_bytes() const {
+        return batch_bytes;
+    }
+
+    /* Microseconds a batch waits for more rows before being sent */
+    uint64_t get_batch_linger() const {
+        return batch_linger_us;
+    }
+
+    /* True if a write replaces the value of a write to the same key still waiting in the queue */
+    bool get_coalesce_writes() const {
+        return coalesce_writes;
+    }
+
+    /* Called when a queued write is taken to be sent, afterwards it can't be replaced */
+    void release_pending_write(const TupleRow *keys) const;
+
+    /* Attempts of a failed write before giving up on it */
+    uint32_t get_max_retries() const {
+        return max_retries;
+    }
+
+    /* Microseconds to wait before the attempt number 'attempt' of a failed write: exponential with jitter */
+    uint64_t get_retry_delay(uint32_t attempt) const;
+
+    /* Accounts 'nrows' more rows being retried, false if the Writer already retries too many */
+    bool start_retry(uint32_t nrows) const;
+
+    void end_retry(uint32_t nrows) const;
+
+    /* Appends a write given up to the spill file, false if spilling is disabled or the row can't be spilled */
+    bool spill_write(const TupleRow *keys, const TupleRow *values) const;
+
+    /* Records the error of a write given up, flush_elements reports it */
+    void write_failed(const std::string &error) const;
+
+    /* Writes again the rows spilled for this table in the spill directory, returns the number of rows */
+    uint64_t replay_spilled_writes();
+
     void finish_async_call();
     CassSession* get_session() const;
     bool is_write_completed() const;
@@ -86,23 +146,58 @@ private:
 
     const CassPrepared *prepared_query = nullptr;
     std::map<const std::string, const CassPrepared*> prepared_partial_queries;
+    // Same queries with the write time as the last bound value, indexed by column name ("" for the whole row)
+    std::map<const std::string, const CassPrepared*> prepared_timestamped_queries;
 
     TupleRowFactory *k_factory = nullptr;
     TupleRowFactory *v_factory = nullptr;
+    std::map<const std::string, TupleRowFactory*> single_value_factories; // Rows writing one value, by column name
 
     bool lazy_write_enabled;
     tbb::concurrent_hash_map <const TupleRow *, const TupleRow *, HashCompare> *dirty_blocks = nullptr;
 
     uint32_t max_calls;
+    uint32_t batch_rows = 0;
+    uint32_t batch_bytes = 0;
+    uint64_t batch_linger_us = 0;
+
+    bool coalesce_writes = false;
+    // Writes queued and not sent yet by key (and column when a single one is written), shared with the WriterThread queue
+    mutable std::mutex pending_mutex;
+    mutable std::unordered_map<std::string, std::pair<TupleRow *, TupleRow *> > pending_writes;
+    // Key in pending_writes of each queued keys, computed once when queued as their payload is replaced by coalescing
+    mutable std::unordered_map<const TupleRow *, std::string> pending_write_keys;
+    std::string pending_write_key(const TupleRow *keys, const TupleRow *values) const;
+    bool coalesce_write(const TupleRow *keys, const TupleRow *values);
+    uint32_t max_retries = 0;
+    uint64_t retry_delay_us = 0;
+    uint64_t retry_max_delay_us = 0;
+    uint32_t max_retrying = 0;
+    mutable std::atomic<uint32_t> retrying; // Rows of this Writer waiting for a retry or being retried
+    mutable std::mutex failed_mutex;
+    mutable std::string write_error; // Last write given up since the last flush_elements
+    std::string spill_dir; // Empty if spilling is disabled
+    mutable std::mutex spill_mutex;
+    mutable FILE *spill_file = nullptr; // Opened on the first spilled write, locked while open
+    std::string spill_prefix() const;
+    FILE *open_spill_file() const;
+    void serialize_row(std::string &record, const TupleRowFactory *factory, const TupleRow *row) const;
+    TupleRow *deserialize_row(const char *&record, const TupleRowFactory *factory) const;
     std::atomic<uint32_t> ncallbacks; // In flight write requests to the cassandra driver (not finished)
+    std::mutex completion_mutex; // Guards the wake up of wait_writes_completion when ncallbacks reaches 0
+    std::condition_variable completion_cv;
 
     const TableMetadata *table_metadata = nullptr;
 
     bool disable_timestamps;
     TimestampGenerator *timestamp_gen = nullptr;
+    HecubaStats *stats = &HecubaStats::global();
 
 
     void flush_dirty_blocks();
+    void prepare_timestamped_queries();
+    void create_single_value_factories();
+    TupleRowFactory *get_single_value_factory(const std::string &name) const;
     void queue_async_query(const TupleRow* keys, const TupleRow* values);
 
     // StorageStream attributes
@@ -1,6 +1,8 @@
 #include "WriterThread.h"
 #include "HecubaExtrae.h"
+#include "KVCache.h"
 #include <sys/wait.h>
+#include <algorithm>
 
 #ifndef CLONE
 #include <pthread.h>
@@ -18,7 +20,6 @@ WriterThread& WriterThread::get(std::map<std::string, std::string>&config) {
 WriterThread::WriterThread(std::map<std::string, std::string>& config):
     sempending_data(new Semaphore(0)),
     ncallbacks(0),
-    error_count(0),
 #ifdef EXTRAE
     msgid(0),
 #endif /* EXTRAE */
@@ -53,9 +54,52 @@ WriterThread::WriterThread(std::map<std::string, std::string>& config):
             throw ModuleException(msg);
         }
     }
-    this->max_calls = (uint32_t) max_callbacks;
+    int32_t min_callbacks = max_callbacks;
+    if (config.find("writer_par_min") != config.end()) {
+        std::string min_callbacks_str = config["writer_par_min"];
+        try {
+            min_callbacks = std::stoi(min_callbacks_str);
+            if (min_callbacks <= 0 || min_callbacks > max_callbacks)
+                throw ModuleException("Writer minimum parallelism value must be > 0 and <= writer_par");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_par_min";
+            throw ModuleException(msg);
+        }
+    }
+
+    int32_t top_callbacks = max_callbacks;
+    if (config.find("writer_par_max") != config.end()) {
+        std::string top_callbacks_str = config["writer_par_max"];
+        try {
+            top_callbacks = std::stoi(top_callbacks_str);
+            if (top_callbacks < max_callbacks) throw ModuleException("Writer maximum parallelism value must be >= writer_par");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_par_max";
+            throw ModuleException(msg);
+        }
+    }
 
-    semmaxcallbacks = new Semaphore(max_callbacks);
+    int64_t latency_target = 0;
+    if (config.find("writer_latency_target") != config.end()) {
+        std::string latency_target_str = config["writer_latency_target"];
+        try {
+            latency_target = std::stoll(latency_target_str);
+            if (latency_target < 0) throw ModuleException("Writer latency target must be >= 0");
+        }
+        catch (std::exception &e) {
+            std::string msg(e.what());
+            msg += " Malformed value in config for writer_latency_target";
+            throw ModuleException(msg);
+        }
+    }
+
+    // writer_par is the initial window, it only moves if writer_par_min or writer_par_max widen its bounds
+    inflight_window = new InflightWindow((uint32_t) max_callbacks, (uint32_t) min_callbacks, (uint32_t) top_callbacks,
+                                         (uint64_t) latency_target);
     create_working_threads();
 
     HecubaExtrae_event(HECUBADBG, HECUBA_END);
@@ -80,12 +124,17 @@ void WriterThread::create_working_threads() {
 void WriterThread::wait_writes_completion(void) {
     HecubaExtrae_event(HECUBADBG, HECUBA_FLUSHELEMENTS);
     //std::cout<< "Writer::wait_writes_completion * Waiting for "<< data.size() << " Pending "<<ncallbacks<<" callbacks" <<" inflight"<<std::endl;
-    while(!data.empty() || ncallbacks>0) {
-        std::this_thread::yield();
-    }
+    std::unique_lock<std::mutex> lock(completion_mutex);
+    completion_cv.wait(lock, [this]() { return data.empty() && ncallbacks == 0; });
     HecubaExtrae_event(HECUBADBG, HECUBA_END);
 }
 
+/* Marks 'n' writes as finished, waking up wait_writes_completion once there are no more */
+void WriterThread::finish_calls(uint32_t n) {
+    std::lock_guard<std::mutex> lock(completion_mutex);
+    if ((ncallbacks -= n) == 0) completion_cv.notify_all();
+}
+
 WriterThread::~WriterThread() {
     // wait for remaining callbacks
     wait_writes_completion();
@@ -94,110 +143,250 @@ WriterThread::~WriterThread() {
     sempending_data->release();// Unblock the async_query_thread (which does not have any work)
     this->async_query_thread.join();
     delete(sempending_data);
-    delete(semmaxcallbacks);
+    delete(inflight_window);
 }
 
 
 /* Queue a new pair {keys, values} into the 'data' queue to be executed later.
- * Args are copied, therefore they may be deleted after calling this method. */
+ * Ownership of 'keys' and 'values' is transferred. */
 void WriterThread::queue_async_query( const Writer* w, const TupleRow *keys, const TupleRow *values) {
-    std::tuple<const Writer*, const TupleRow *, const TupleRow *> item = std::make_tuple(w, keys, new TupleRow(values));
+    WriteItem item = std::make_tuple(w, keys, values, HecubaStats::now_us());
 
     //std::cout<< "  Writer::flushing item created pair"<<std::endl;
     data.push(item);
     sempending_data->release(); //One more pending msg
 }
 
+/* Queue a set of pairs {keys[i], values[i]} into the 'data' queue. Ownership of 'keys' and 'values' is transferred. */
+void WriterThread::queue_async_queries( const Writer* w, const std::vector<const TupleRow *> &keys, const std::vector<const TupleRow *> &values) {
+    uint64_t queued_us = HecubaStats::now_us();
+    for (size_t i = 0; i < keys.size(); ++i) {
+        data.push(std::make_tuple(w, keys[i], values[i], queued_us));
+        sempending_data->release(); //One more pending msg
+    }
+}
+
 void WriterThread::callback(CassFuture *future, void *ptr) {
-    void **data = reinterpret_cast<void **>(ptr);
-    assert(data != NULL && data[0] != NULL);
-    WriterThread *WThread = (WriterThread *) data[0];
-    WThread->semmaxcallbacks->release(); // Limit number of callbacks
+    WriteRequest *request = reinterpret_cast<WriteRequest *>(ptr);
+    assert(request != NULL && request->thread != NULL);
+    WriterThread *WThread = request->thread;
 
     //std::cout<< "Writer::callback"<< std::endl;
     CassError rc = cass_future_error_code(future);
+    WThread->inflight_window->release(request->sent_us, rc != CASS_OK); // Timeouts and errors shrink the window
+    HecubaExtrae_comm(EXTRAE_USER_RECV, request->msgid);
     if (rc != CASS_OK) {
         std::string message(cass_error_desc(rc));
         const char *dmsg;
         size_t l;
         cass_future_error_message(future, &dmsg, &l);
         std::string msg2(dmsg, l);
-        WThread->set_error_occurred("Writer callback: " + message + "  " + msg2, data[1], data[2], data[3]);
+        WThread->set_error_occurred("Writer callback: " + message + "  " + msg2, request);
     } else {
-        delete ((TupleRow *) data[2]);
-        delete ((TupleRow *) data[3]);
-        WThread->ncallbacks--;
-        ((Writer*) data[1])->finish_async_call(); //Notify Writer of another finished request.
+        HecubaStats *stats = request->writer->get_stats();
+        uint64_t now = HecubaStats::now_us();
+        if (request->attempts) request->writer->end_retry((uint32_t) request->rows.size());
+        for (const WriteItem &row : request->rows) {
+            const TupleRow *keys = std::get<1>(row);
+            const TupleRow *values = std::get<2>(row);
+            stats->add(HecubaStats::WRITES_COMPLETED);
+            stats->add(HecubaStats::WRITTEN_BYTES, KVCacheWeigher<TupleRow>()(*keys) +
+                                                   KVCacheWeigher<TupleRow>()(*values));
+            stats->record(HecubaStats::WRITE, now - std::get<3>(row));
+            delete (keys);
+            delete (values);
+            WThread->finish_calls(1);
+            ((Writer *) request->writer)->finish_async_call(); //Notify Writer of another finished request.
+        }
+        delete (request);
     }
-    HecubaExtrae_comm(EXTRAE_USER_RECV, (long long int)data[4]);
-    free(data);
 }
 
-void WriterThread::async_query_execute(const Writer* w, const TupleRow *keys, const TupleRow *values) {
+void WriterThread::async_query_execute(WriteRequest *request, bool retry) {
+    const Writer *w = request->writer;
+    CassStatement *statement = nullptr;
+    CassBatch *batch = nullptr;
+    if (request->rows.size() == 1) {
+        statement = w->bind_cassstatement(std::get<1>(request->rows[0]), std::get<2>(request->rows[0]));
+    } else {
+        // Unlogged: the rows belong to the same partition, so the batch is applied atomically by a single replica set
+        batch = cass_batch_new(CASS_BATCH_TYPE_UNLOGGED);
+        for (const WriteItem &row : request->rows) {
+            CassStatement *row_statement = w->bind_cassstatement(std::get<1>(row), std::get<2>(row), true);
+            cass_batch_add_statement(batch, row_statement);
+            cass_statement_free(row_statement);
+        }
+    }
 
-    CassStatement *statement = w->bind_cassstatement(keys, values);
+    request->sent_us = inflight_window->acquire(); // Limit number of callbacks
 
-    semmaxcallbacks->acquire(); // Limit number of callbacks
+    if (!retry) {
+        uint64_t now = HecubaStats::now_us();
+        for (const WriteItem &row : request->rows) {
+            w->get_stats()->add(HecubaStats::WRITES_SENT);
+            w->get_stats()->record(HecubaStats::WRITE_QUEUE, now - std::get<3>(row));
+        }
+        if (batch) w->get_stats()->add(HecubaStats::WRITE_BATCHES);
+    }
 
     HecubaExtrae_event(HECUBACASS, HBCASS_SENDDRIVER);
-#ifdef EXTRAE
-    const void **data = (const void **) malloc(sizeof(void *) * 5);
-#else
-    const void **data = (const void **) malloc(sizeof(void *) * 4);
-#endif
-    data[0] = this;
-    data[1] = w;
-    data[2] = keys;
-    data[3] = values;
 #ifdef EXTRAE
     msgid++;
-    data[4] = (void*)((((long long int)getpid())<<32) | msgid);
+    request->msgid = (((long long int)getpid())<<32) | msgid;
 
-    HecubaExtrae_comm(EXTRAE_USER_SEND, (long long int)data[4]); // parameter is used to  identify the callback (lower 12 bits from data will be zeroed and then the 12 lower bits from PID added)
+    HecubaExtrae_comm(EXTRAE_USER_SEND, request->msgid); // parameter is used to  identify the callback (lower 12 bits from data will be zeroed and then the 12 lower bits from PID added)
 #endif /* EXTRAE */
-    CassFuture *query_future = cass_session_execute(w->get_session(), statement);
+    CassFuture *query_future;
+    if (batch) {
+        query_future = cass_session_execute_batch(w->get_session(), batch);
+        cass_batch_free(batch);
+    } else {
+        query_future = cass_session_execute(w->get_session(), statement);
+        cass_statement_free(statement);
+    }
     HecubaExtrae_event(HECUBACASS, HBCASS_END);
 
+    cass_future_set_callback(query_future, callback, request);
+    cass_future_free(query_future);
+}
 
-    cass_statement_free(statement);
+/* Schedules the retry of a failed request after a backoff, or gives up on it.
+ * Called from the callback: the request is sent again or given up by the async_query_thread, which never sleeps on it */
+void WriterThread::set_error_occurred(std::string error, WriteRequest *request) {
+    const Writer *w = request->writer;
+    uint32_t nrows = (uint32_t) request->rows.size();
+    ++request->attempts;
+    {
+        std::lock_guard<std::mutex> lock(retry_mutex);
+        // Spilling writes to disk, it is left to the async_query_thread instead of blocking the driver's thread
+        if (request->attempts == 1 && !w->start_retry(nrows)) {
+            given_up.emplace_back(error + " (too many writes being retried)", request);
+        } else if (request->attempts > w->get_max_retries()) {
+            w->end_retry(nrows);
+            given_up.emplace_back(error + " (after " + std::to_string(w->get_max_retries()) + " retries)", request);
+        } else {
+            w->get_stats()->add(HecubaStats::WRITE_RETRIES);
+            retries.emplace(HecubaStats::now_us() + w->get_retry_delay(request->attempts), request);
+        }
+    }
+    sempending_data->release(); // Wake up the async_query_thread to reschedule its wait
+}
 
+/* Spills the rows of a request which can not be written, or reports them as failed to their Writer */
+void WriterThread::give_up(const std::string &error, WriteRequest *request) {
+    Writer *w = (Writer *) request->writer;
+    uint32_t nfailed = 0;
+    for (const WriteItem &row : request->rows) {
+        if (w->spill_write(std::get<1>(row), std::get<2>(row))) {
+            w->get_stats()->add(HecubaStats::WRITES_SPILLED);
+        } else {
+            w->get_stats()->add(HecubaStats::WRITE_ERRORS);
+            ++nfailed;
+        }
+    }
+    if (nfailed) {
+        std::cerr << "Writer: " << nfailed << " writes to " << w->get_metadata()->get_table_name() << " lost: " << error << std::endl;
+        w->write_failed(error);
+    }
+    for (const WriteItem &row : request->rows) {
+        delete (std::get<1>(row));
+        delete (std::get<2>(row));
+        finish_calls(1);
+        w->finish_async_call(); // The Writer may be gone after the last one
+    }
+    delete (request);
+}
 
-    cass_future_set_callback(query_future, callback, data);
-    cass_future_free(query_future);
+/* Gives up on the failed requests out of retries and sends again those whose backoff expired.
+ * Returns the microseconds until the next one expires, 0 if there are no retries pending */
+uint64_t WriterThread::send_due_retries(void) {
+    std::vector<WriteRequest*> due;
+    std::vector<std::pair<std::string, WriteRequest*> > failed;
+    uint64_t next = 0;
+    {
+        std::lock_guard<std::mutex> lock(retry_mutex);
+        failed.swap(given_up);
+        uint64_t now = HecubaStats::now_us();
+        auto it = retries.begin();
+        for (; it != retries.end() && it->first <= now; ++it) due.push_back(it->second);
+        retries.erase(retries.begin(), it);
+        if (!retries.empty()) next = retries.begin()->first - now;
+    }
+    for (auto &request : failed) give_up(request.first, request.second);
+    for (WriteRequest *request : due) async_query_execute(request, true);
+    return next;
 }
 
-void WriterThread::set_error_occurred(std::string error, const void* writer_p, const void *keys_p, const void *values_p) {
-    ++error_count;
+/* Adds a row to the open batch of its Writer and partition, sending the batch once it is full */
+void WriterThread::add_to_batch(const WriteItem &item) {
+    const Writer *w = std::get<0>(item);
+    size_t row_bytes = KVCacheWeigher<TupleRow>()(*std::get<1>(item)) + KVCacheWeigher<TupleRow>()(*std::get<2>(item));
+    if (row_bytes >= w->get_batch_bytes()) {
+        // Large rows (e.g. numpy blocks) gain nothing from being batched
+        async_query_execute(new WriteRequest{this, w, {item}});
+        return;
+    }
 
-    if (error_count > MAX_ERRORS) {
-        --ncallbacks;
-        throw ModuleException("Try # " + std::to_string(MAX_ERRORS) + " :" + error);
-    } else {
-        std::cerr << "Connectivity problems: " << error_count << " (" << error << std::endl;
-        std::cerr << "  WARNING: We can NOT ensure write requests (table: " << ((Writer *)writer_p)->get_metadata()->get_table_name() << ") order->POTENTIAL INCONSISTENCY"<<std::endl;
-        std::this_thread::sleep_for(std::chrono::milliseconds(1000));
+    BatchKey batch_key(w, w->key_content(std::get<1>(item), true));
+    std::string key = w->key_content(std::get<1>(item), false);
+    auto batch = open_batches.find(batch_key);
+    if (batch != open_batches.end() &&
+        (batch->second.bytes + row_bytes > w->get_batch_bytes() ||
+         std::find(batch->second.keys.begin(), batch->second.keys.end(), key) != batch->second.keys.end())) {
+        // Rows of a batch share the write time on the server when timestamps are disabled, an overwrite must go in a later one
+        send_batch(batch);
+        batch = open_batches.end();
     }
+    if (batch == open_batches.end()) {
+        batch = open_batches.emplace(batch_key, OpenBatch()).first;
+        batch->second.opened_us = HecubaStats::now_us();
+        batches_by_age.emplace_back(batch->second.opened_us, batch_key);
+    }
+    batch->second.rows.push_back(item);
+    batch->second.keys.push_back(key);
+    batch->second.bytes += row_bytes;
+    if (batch->second.rows.size() >= w->get_batch_rows()) send_batch(batch);
+}
 
-    const Writer *w = (Writer*) writer_p;
-    const TupleRow *keys = (TupleRow *) keys_p;
-    const TupleRow *values = (TupleRow *) values_p;
+void WriterThread::send_batch(std::map<BatchKey, OpenBatch>::iterator batch) {
+    async_query_execute(new WriteRequest{this, batch->first.first, std::move(batch->second.rows)});
+    open_batches.erase(batch);
+}
 
-    /** write the data which hasn't been written successfully **/
-    async_query_execute(w, keys, values);
+/* Sends the batches open for longer than their linger time.
+ * Returns the microseconds until the next one expires, 0 if there are no batches open */
+uint64_t WriterThread::send_expired_batches(void) {
+    uint64_t now = HecubaStats::now_us();
+    while (!batches_by_age.empty()) {
+        auto batch = open_batches.find(batches_by_age.front().second);
+        if (batch == open_batches.end() || batch->second.opened_us != batches_by_age.front().first) {
+            batches_by_age.pop_front(); // Already sent
+            continue;
+        }
+        uint64_t deadline = batch->second.opened_us + batch->first.first->get_batch_linger();
+        if (deadline > now) return deadline - now;
+        batches_by_age.pop_front();
+        send_batch(batch);
+    }
+    return 0;
 }
 
 /* Returns True if there is still work to do */
 bool WriterThread::call_async() {
 
     //current write data
-    std::tuple<const Writer*, const TupleRow *, const TupleRow *> item;
+    WriteItem item;
     ncallbacks++; // Increase BEFORE try_pop to avoid race at 'wait_writes_completion'
     if (!data.try_pop(item)) {
-        ncallbacks--;
+        finish_calls(1);
         return false;
     }
 
-    async_query_execute(std::get<0>(item), std::get<1>(item), std::get<2>(item));
+    // From now on the write can't be replaced by a newer one to the same key
+    if (std::get<0>(item)->get_coalesce_writes()) std::get<0>(item)->release_pending_write(std::get<1>(item));
+
+    if (std::get<0>(item)->get_batch_rows() > 1) add_to_batch(item);
+    else async_query_execute(new WriteRequest{this, std::get<0>(item), {item}});
 
     return true;
 }
@@ -206,7 +395,14 @@ void WriterThread::async_query_thread_code()
 {
     while(!finish_async_query_thread) {
         //std::cout<< "Writer::async_query_thread_code "<< std::this_thread::get_id() << " waits..." << std::endl;
-        sempending_data->acquire(); // Wait for pending data
+        uint64_t linger = send_expired_batches();
+        uint64_t backoff = send_due_retries();
+        if (linger == 0 || (backoff != 0 && backoff < linger)) linger = backoff;
+        if (linger == 0) {
+            sempending_data->acquire(); // Wait for pending data
+        } else if (!sempending_data->try_acquire_for(std::chrono::microseconds(linger))) {
+            continue; // Some batch or backoff expired
+        }
         //std::cout<< "Writer::async_query_thread_code "<< std::this_thread::get_id() << " awakes..." << std::endl;
         HecubaExtrae_event(HECUBATHREADASYNC, 1);
         call_async();
@@ -4,11 +4,12 @@
 #include <thread>
 #include <string>
 #include <map>
+#include <deque>
+#include <vector>
 #include "Writer.h"
 #include "TupleRow.h"
 #include "Semaphore.h"
-
-#define MAX_ERRORS 10
+#include "InflightWindow.h"
 
 #define CLONE
 
@@ -18,33 +19,71 @@ class WriterThread {
         WriterThread(WriterThread const&)   = delete;
         void operator=(WriterThread const&) = delete;
         void queue_async_query( const Writer* w, const TupleRow *keys, const TupleRow *values);
+        void queue_async_queries( const Writer* w, const std::vector<const TupleRow *> &keys, const std::vector<const TupleRow *> &values);
 
         static int async_query_thread_code_for_clone(void*);
         static void* async_query_thread_code_for_pthread_create(void*);
     private:
+        // Writer, keys, values and the time (HecubaStats::now_us) they were queued
+        typedef std::tuple<const Writer*, const TupleRow *, const TupleRow *, uint64_t> WriteItem;
+
+        // A statement on the fly: a single row or an unlogged batch of rows of the same Writer and partition
+        struct WriteRequest {
+            WriterThread *thread;
+            const Writer *writer;
+            std::vector<WriteItem> rows;
+            uint64_t sent_us; // Time the statement was allowed on the fly by the InflightWindow
+            uint32_t attempts; // Failed attempts so far
+#ifdef EXTRAE
+            long long int msgid;
+#endif /*EXTRAE*/
+        };
+
+        // Rows waiting for more rows of the same partition, only accessed by the async_query_thread
+        struct OpenBatch {
+            std::vector<WriteItem> rows;
+            std::vector<std::string> keys; // Content of the keys, a key already in the batch closes it
+            size_t bytes = 0;
+            uint64_t opened_us = 0;
+        };
+        typedef std::pair<const Writer*, std::string> BatchKey;
+
         WriterThread(std::map<std::string, std::string>& config);
         ~WriterThread();
         bool call_async();
         void async_query_thread_code();
-        void set_error_occurred(std::string error, const void *writer_p, const void *keys, const void *values);
+        void set_error_occurred(std::string error, WriteRequest *request);
+        void give_up(const std::string &error, WriteRequest *request);
+        uint64_t send_due_retries(void);
         static void callback(CassFuture *future, void *ptr);
-        void async_query_execute(const Writer* w, const TupleRow *keys, const TupleRow *values);
+        void async_query_execute(WriteRequest *request, bool retry=false);
+        void add_to_batch(const WriteItem &item);
+        void send_batch(std::map<BatchKey, OpenBatch>::iterator batch);
+        uint64_t send_expired_batches(void);
         void wait_writes_completion(void);
+        void finish_calls(uint32_t n);
         void create_working_threads(void);
 
         bool finish_async_query_thread = false;
         std::thread async_query_thread;
 
         Semaphore* sempending_data;  // Synchronization semaphore to wait for new elements in 'data'
-        Semaphore* semmaxcallbacks; //Resource limiting Semaphore to limit the number of in_flight callbacks.
-        uint32_t error_count;
-        uint32_t max_calls;
+        InflightWindow* inflight_window; // Limits the number of in_flight callbacks, adapting to the write latency
         std::atomic<uint32_t> ncallbacks;
+        std::mutex completion_mutex; // Guards the wake up of wait_writes_completion
+        std::condition_variable completion_cv;
 #ifdef EXTRAE
         std::atomic<uint32_t> msgid;
 #endif /*EXTRAE*/
 
-        tbb::concurrent_bounded_queue <std::tuple<const Writer*, const TupleRow *, const TupleRow *>> data;
+        tbb::concurrent_bounded_queue <WriteItem> data;
+
+        std::mutex retry_mutex;
+        std::multimap<uint64_t, WriteRequest*> retries; // Failed requests by the time (HecubaStats::now_us) to retry them
+        std::vector<std::pair<std::string, WriteRequest*> > given_up; // Failed requests to spill, with their error
+
+        std::map<BatchKey, OpenBatch> open_batches;
+        std::deque<std::pair<uint64_t, BatchKey> > batches_by_age; // Opening time of each batch, oldest first
 
 };
 #endif /* __WRITER_THREAD_H__ */
@@ -0,0 +1,30 @@
+#ifndef HFETCH_GILRELEASE_H
+#define HFETCH_GILRELEASE_H
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/***
+ * Releases the Python GIL for the lifetime of the object and reacquires it
+ * on destruction, also when a C++ exception leaves the scope.
+ * Only pure C++ code (no Python API calls) can run inside the scope.
+ */
+
+class GILRelease {
+public:
+
+    GILRelease() : state(PyEval_SaveThread()) {}
+
+    ~GILRelease() {
+        PyEval_RestoreThread(state);
+    }
+
+    GILRelease(const GILRelease &) = delete;
+
+    GILRelease &operator=(const GILRelease &) = delete;
+
+private:
+    PyThreadState *state;
+};
+
+#endif //HFETCH_GILRELEASE_H
@@ -73,6 +73,88 @@ static PyObject *disconnectCassandra(PyObject *self) {
 }
 
 
+/***
+ * Builds a dict with the counters and latency histograms of the given statistics, added up.
+ * The number of pending and in flight writes is derived from the write counters, the gauges are process wide.
+ * @param sources Statistics to report
+ * @return A new dict, the latencies are reported as {operation: {'count', 'total_us', 'buckets'}}, where
+ * 'buckets' maps the exclusive upper bound in microseconds of each non empty bucket to its number of samples
+ */
+static PyObject *stats_to_pydict(const std::vector<const HecubaStats *> &sources) {
+    uint64_t counters[HecubaStats::NCOUNTERS] = {0};
+    PyObject *py_stats = PyDict_New();
+    for (uint32_t c = 0; c < HecubaStats::NCOUNTERS; ++c) {
+        for (const HecubaStats *src : sources) counters[c] += src->get((HecubaStats::Counter) c);
+        PyObject *py_val = PyLong_FromUnsignedLongLong(counters[c]);
+        PyDict_SetItemString(py_stats, HecubaStats::counter_name((HecubaStats::Counter) c), py_val);
+        Py_DECREF(py_val);
+    }
+    uint64_t sent = counters[HecubaStats::WRITES_SENT];
+    uint64_t done = counters[HecubaStats::WRITES_COMPLETED] + counters[HecubaStats::WRITE_ERRORS] +
+                    counters[HecubaStats::WRITES_SPILLED];
+    PyObject *py_val = PyLong_FromUnsignedLongLong(counters[HecubaStats::WRITES_QUEUED] - sent);
+    PyDict_SetItemString(py_stats, "writes_pending", py_val);
+    Py_DECREF(py_val);
+    py_val = PyLong_FromUnsignedLongLong(sent > done ? sent - done : 0);
+    PyDict_SetItemString(py_stats, "writes_in_flight", py_val);
+    Py_DECREF(py_val);
+    for (uint32_t g = 0; g < HecubaStats::NGAUGES; ++g) {
+        // The WriterThread is shared by the whole process, so are its gauges
+        py_val = PyLong_FromUnsignedLongLong(HecubaStats::global().get_gauge((HecubaStats::Gauge) g));
+        PyDict_SetItemString(py_stats, HecubaStats::gauge_name((HecubaStats::Gauge) g), py_val);
+        Py_DECREF(py_val);
+    }
+
+    PyObject *py_latencies = PyDict_New();
+    for (uint32_t op = 0; op < HecubaStats::NOPERATIONS; ++op) {
+        uint64_t count = 0, total_us = 0;
+        PyObject *py_buckets = PyDict_New();
+        for (uint32_t i = 0; i < LatencyHistogram::nbuckets; ++i) {
+            uint64_t n = 0;
+            for (const HecubaStats *src : sources) {
+                n += src->get_latency((HecubaStats::Operation) op).get_bucket(i);
+            }
+            if (!n) continue;
+            PyObject *py_bound = PyLong_FromUnsignedLongLong(LatencyHistogram::bucket_upper_bound(i));
+            PyObject *py_n = PyLong_FromUnsignedLongLong(n);
+            PyDict_SetItem(py_buckets, py_bound, py_n);
+            Py_DECREF(py_bound);
+            Py_DECREF(py_n);
+        }
+        for (const HecubaStats *src : sources) {
+            count += src->get_latency((HecubaStats::Operation) op).get_count();
+            total_us += src->get_latency((HecubaStats::Operation) op).get_total_us();
+        }
+        PyObject *py_histogram = Py_BuildValue("{s:K,s:K,s:N}", "count", (unsigned long long) count,
+                                               "total_us", (unsigned long long) total_us, "buckets", py_buckets);
+        PyDict_SetItemString(py_latencies, HecubaStats::operation_name((HecubaStats::Operation) op), py_histogram);
+        Py_DECREF(py_histogram);
+    }
+    PyDict_SetItemString(py_stats, "latency", py_latencies);
+    Py_DECREF(py_latencies);
+    return py_stats;
+}
+
+/* Adds the number of entries and bytes held by the caches of the given tables to the stats dict */
+static void add_cache_usage(PyObject *py_stats, const std::vector<const CacheTable *> &tables) {
+    size_t entries = 0, nbytes = 0;
+    for (const CacheTable *table : tables) {
+        entries += table->get_cache_entries();
+        nbytes += table->get_cache_bytes();
+    }
+    PyObject *py_val = PyLong_FromSize_t(entries);
+    PyDict_SetItemString(py_stats, "cache_entries", py_val);
+    Py_DECREF(py_val);
+    py_val = PyLong_FromSize_t(nbytes);
+    PyDict_SetItemString(py_stats, "cache_bytes", py_val);
+    Py_DECREF(py_val);
+}
+
+static PyObject *process_stats(PyObject *self) {
+    return stats_to_pydict({&HecubaStats::global()});
+}
+
+
 /*** HCACHE DATA TYPE METHODS AND SETUP ***/
 
 static PyObject *add_to_cache(HCache *self, PyObject *args) {
@@ -144,6 +226,7 @@ static PyObject *put_row(HCache *self, PyObject *args) {
     }
     try {
         TupleRow *v = self->valuesParser->make_tuple(py_values);
+        GILRelease nogil;
         self->T->put_crow(k, v);
         delete (k);
         delete (v);
@@ -160,6 +243,65 @@ static PyObject *put_row(HCache *self, PyObject *args) {
     Py_RETURN_NONE;
 }
 
+/***
+ * Writes a set of rows building all of them in a single call
+ * @param self Python HCache object upon method invocation
+ * @param args Arg tuple containing a list of keys and a list of values with the same length,
+ * each key and each value being a list with its columns
+ * @return None
+ */
+static PyObject *put_rows(HCache *self, PyObject *args) {
+    PyObject *py_keys_list, *py_values_list;
+    if (!PyArg_ParseTuple(args, "OO", &py_keys_list, &py_values_list)) {
+        return NULL;
+    }
+    if (!PyList_Check(py_keys_list) || !PyList_Check(py_values_list)) {
+        PyErr_SetString(PyExc_TypeError, "Put rows expects a list of keys and a list of values");
+        return NULL;
+    }
+    Py_ssize_t nrows = PyList_Size(py_keys_list);
+    if (PyList_Size(py_values_list) != nrows) {
+        PyErr_SetString(PyExc_ValueError, "Put rows expects the same number of keys and values");
+        return NULL;
+    }
+
+    std::vector<const TupleRow *> keys, values;
+    keys.reserve(nrows);
+    values.reserve(nrows);
+    try {
+        for (Py_ssize_t i = 0; i < nrows; ++i) {
+            PyObject *py_keys = PyList_GetItem(py_keys_list, i);
+            for (uint16_t key_i = 0; key_i < PyList_Size(py_keys); ++key_i) {
+                if (PyList_GetItem(py_keys, key_i) == Py_None) {
+                    std::string error_msg = "Keys can't be None, key_position: " + std::to_string(key_i);
+                    throw TypeErrorException(error_msg);
+                }
+            }
+            keys.push_back(self->keysParser->make_tuple(py_keys));
+            values.push_back(self->valuesParser->make_tuple(PyList_GetItem(py_values_list, i)));
+        }
+
+        GILRelease nogil;
+        self->T->put_crows(keys, values);
+        for (const TupleRow *k : keys) delete (k);
+        for (const TupleRow *v : values) delete (v);
+    }
+    catch (TypeErrorException &e) {
+        for (const TupleRow *k : keys) delete (k);
+        for (const TupleRow *v : values) delete (v);
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return NULL;
+    }
+    catch (std::exception &e) {
+        for (const TupleRow *k : keys) delete (k);
+        for (const TupleRow *v : values) delete (v);
+        std::string err_msg = "Put rows " + std::string(e.what());
+        PyErr_SetString(PyExc_RuntimeError, err_msg.c_str());
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
 static PyObject *get_row(HCache *self, PyObject *args) {
     PyObject *py_keys, *py_row;
     if (!PyArg_ParseTuple(args, "O", &py_keys)) {
@@ -190,6 +332,7 @@ static PyObject *get_row(HCache *self, PyObject *args) {
     }
     std::vector<const TupleRow *> v;
     try {
+        GILRelease nogil;
         v = self->T->get_crow(k);
     }
     catch (std::exception &e) {
@@ -228,6 +371,98 @@ static PyObject *get_row(HCache *self, PyObject *args) {
     return py_row;
 }
 
+/***
+ * Retrieves the values of a list of keys with concurrent queries
+ * @param self Python HCache object upon method invocation
+ * @param args Arg tuple containing a list of keys, each key being a list with its columns
+ * @return A list with the values of each key in the same order, None for the keys not found
+ */
+static PyObject *get_rows(HCache *self, PyObject *args) {
+    PyObject *py_keys_list;
+    if (!PyArg_ParseTuple(args, "O", &py_keys_list)) {
+        return NULL;
+    }
+    if (!PyList_Check(py_keys_list)) {
+        PyErr_SetString(PyExc_TypeError, "Get rows expects a list of keys");
+        return NULL;
+    }
+
+    Py_ssize_t nkeys = PyList_Size(py_keys_list);
+    std::vector<const TupleRow *> keys;
+    keys.reserve(nkeys);
+    for (Py_ssize_t i = 0; i < nkeys; ++i) {
+        PyObject *py_keys = PyList_GetItem(py_keys_list, i);
+        for (uint16_t key_i = 0; key_i < PyList_Size(py_keys); ++key_i) {
+            if (PyList_GetItem(py_keys, key_i) == Py_None) {
+                for (const TupleRow *k : keys) delete (k);
+                std::string error_msg = "Keys can't be None, key_position: " + std::to_string(key_i);
+                PyErr_SetString(PyExc_TypeError, error_msg.c_str());
+                return NULL;
+            }
+        }
+        try {
+            keys.push_back(self->keysParser->make_tuple(py_keys));
+        }
+        catch (TypeErrorException &e) {
+            for (const TupleRow *k : keys) delete (k);
+            PyErr_SetString(PyExc_TypeError, e.what());
+            return NULL;
+        }
+        catch (std::exception &e) {
+            for (const TupleRow *k : keys) delete (k);
+            std::string error_msg = "Get rows, keys error: " + std::string(e.what());
+            PyErr_SetString(PyExc_RuntimeError, error_msg.c_str());
+            return NULL;
+        }
+    }
+
+    std::vector<std::vector<const TupleRow *> > v;
+    try {
+        GILRelease nogil;
+        v = self->T->get_crows(keys);
+        for (const TupleRow *k : keys) delete (k);
+    }
+    catch (std::exception &e) {
+        for (const TupleRow *k : keys) delete (k);
+        std::string error_msg = "Get rows error: " + std::string(e.what());
+        PyErr_SetString(PyExc_RuntimeError, error_msg.c_str());
+        return NULL;
+    }
+
+    PyObject *py_rows = PyList_New(nkeys);
+    try {
+        for (Py_ssize_t i = 0; i < nkeys; ++i) {
+            if (v[i].empty()) {
+                Py_INCREF(Py_None);
+                PyList_SET_ITEM(py_rows, i, Py_None);
+            } else {
+                PyList_SET_ITEM(py_rows, i, self->valuesParser->make_pylist(v[i]));
+                for (const TupleRow *value : v[i]) delete (value);
+                v[i].clear();
+            }
+        }
+    }
+    catch (TypeErrorException &e) {
+        for (auto &values : v) {
+            for (const TupleRow *value : values) delete (value);
+        }
+        Py_DECREF(py_rows);
+        PyErr_SetString(PyExc_TypeError, e.what());
+        return NULL;
+    }
+    catch (std::exception &e) {
+        for (auto &values : v) {
+            for (const TupleRow *value : values) delete (value);
+        }
+        Py_DECREF(py_rows);
+        std::string error_msg = "Get rows, error parsing values: " + std::string(e.what());
+        PyErr_SetString(PyExc_RuntimeError, error_msg.c_str());
+        return NULL;
+    }
+
+    return py_rows;
+}
+
 
 static PyObject *delete_row(HCache *self, PyObject *args) {
     PyObject *py_keys;
@@ -255,6 +490,7 @@ static PyObject *delete_row(HCache *self, PyObject *args) {
         return NULL;
     }
     try {
+        GILRelease nogil;
         self->T->delete_crow(k);
         delete (k);
     }
@@ -271,8 +507,20 @@ static PyObject *delete_row(HCache *self, PyObject *args) {
 }
 
 
+static PyObject *stats(HCache *self) {
+    if (!self->T) {
+        PyErr_SetString(PyExc_RuntimeError, "Tried to get the stats, but the cache didn't exist");
+        return NULL;
+    }
+    PyObject *py_stats = stats_to_pydict({&self->T->get_stats()});
+    add_cache_usage(py_stats, {self->T});
+    return py_stats;
+}
+
+
 static PyObject *flush(HCache *self, PyObject *args) {
     try {
+        GILRelease nogil;
         self->T->flush_elements();
     }
     catch (TypeErrorException &e) {
@@ -288,6 +536,20 @@ static PyObject *flush(HCache *self, PyObject *args) {
     Py_RETURN_NONE;
 }
 
+static PyObject *replay_spilled(HCache *self, PyObject *args) {
+    uint64_t nrows;
+    try {
+        GILRelease nogil;
+        nrows = self->T->get_writer()->replay_spilled_writes();
+    }
+    catch (std::exception &e) {
+        std::string err_msg = "Replaying spilled writes failed with " + std::string(e.what());
+        PyErr_SetString(PyExc_RuntimeError, err_msg.c_str());
+        return NULL;
+    }
+    return PyLong_FromUnsignedLongLong(nrows);
+}
+
 static PyObject * enable_stream(HCache *self, PyObject *args);
 static PyObject * enable_stream_producer(HCache *self);
 static PyObject * enable_stream_consumer(HCache *self);
@@ -336,7 +598,7 @@ static int hcache_init(HCache *self, PyObject *args, PyObject *kwds) {
                 config[conf_key] = conf_val;
             }
             if (PyLong_Check(value)) {
-                int32_t c_val = (int32_t) PyLong_AsLong(value);
+                int64_t c_val = (int64_t) PyLong_AsLongLong(value); // cache_bytes may not fit in 32 bits
                 config[conf_key] = std::to_string(c_val);
             }
 
@@ -409,10 +671,14 @@ static int hcache_init(HCache *self, PyObject *args, PyObject *kwds) {
 
 static PyMethodDef hcache_type_methods[] = {
         {"get_row",                 (PyCFunction) get_row,              METH_VARARGS, NULL},
+        {"get_rows",                (PyCFunction) get_rows,             METH_VARARGS, NULL},
         {"put_row",                 (PyCFunction) put_row,              METH_VARARGS, NULL},
+        {"put_rows",                (PyCFunction) put_rows,             METH_VARARGS, NULL},
         {"add_to_cache",            (PyCFunction) add_to_cache,         METH_VARARGS, NULL},
         {"delete_row",              (PyCFunction) delete_row,           METH_VARARGS, NULL},
         {"flush",                   (PyCFunction) flush,                METH_VARARGS, NULL},
+        {"replay_spilled",          (PyCFunction) replay_spilled,       METH_NOARGS,  NULL},
+        {"stats",                   (PyCFunction) stats,                METH_NOARGS,  NULL},
         {"iterkeys",                (PyCFunction) create_iter_keys,     METH_VARARGS, NULL},
         {"itervalues",              (PyCFunction) create_iter_values,   METH_VARARGS, NULL},
         {"iteritems",               (PyCFunction) create_iter_items,    METH_VARARGS, NULL},
@@ -695,6 +961,7 @@ static PyObject* poll_numpy(HNumpyStore *self, PyObject* args) {
 
     try {
         DBG(" PYINTERFACE: BEFORE POLLNUMPY");
+        GILRelease nogil;
         self->NumpyDataStore->poll(np_metas->np_metas, numpy_arr);
         DBG(" PYINTERFACE: AFTER POLLNUMPY");
     }
@@ -709,7 +976,8 @@ static PyObject* poll_numpy(HNumpyStore *self, PyObject* args) {
 
 static PyObject *allocate_numpy(HNumpyStore *self, PyObject *args) {
     PyObject *py_keys, *py_np_metas;
-    if (!PyArg_ParseTuple(args, "OO", &py_keys, &py_np_metas)) {
+    int on_demand = 0;
+    if (!PyArg_ParseTuple(args, "OO|p", &py_keys, &py_np_metas, &on_demand)) {
         return NULL;
     }
 
@@ -724,7 +992,7 @@ static PyObject *allocate_numpy(HNumpyStore *self, PyObject *args) {
     const uint64_t *storage_id = parse_uuid(py_keys);
     PyObject *res;
     try {
-        res = self->NumpyDataStore->reserve_numpy_space(storage_id, np_metas->np_metas);
+        res = self->NumpyDataStore->reserve_numpy_space(storage_id, np_metas->np_metas, on_demand);
     }
     catch (std::exception &e) {
         PyErr_SetString(PyExc_RuntimeError, e.what());
@@ -736,6 +1004,36 @@ static PyObject *allocate_numpy(HNumpyStore *self, PyObject *args) {
     return result_list;
 }
 
+/***
+ * Releases the memory of a range of bytes of a numpy allocated on demand
+ * @param self Python HNumpyStore object upon method invocation
+ * @param args Arg tuple containing the numpy, the offset of the first byte of the range and its length
+ * @return None
+ */
+static PyObject *release_numpy_memory(HNumpyStore *self, PyObject *args) {
+    PyObject *numpy;
+    unsigned long long offset, length;
+    if (!PyArg_ParseTuple(args, "OKK", &numpy, &offset, &length)) {
+        return NULL;
+    }
+
+    PyArrayObject *numpy_arr;
+    if (!PyArray_OutputConverter(numpy, &numpy_arr)) {
+        std::string error_msg = "Can't convert the given numpy to a numpy ndarray";
+        PyErr_SetString(PyExc_TypeError, error_msg.c_str());
+        return NULL;
+    }
+
+    try {
+        NumpyStorage::release_numpy_space(numpy_arr, offset, length);
+    }
+    catch (std::exception &e) {
+        PyErr_SetString(PyExc_RuntimeError, e.what());
+        return NULL;
+    }
+    Py_RETURN_NONE;
+}
+
 /***
  * Receives a uuid, makes the reservation of the numpy specified in the storage_id and computes the number of elements inside each row of a block
  * @param self Python HNumpyStore object upon method invocation
@@ -801,6 +1099,7 @@ static PyObject *store_numpy_slices(HNumpyStore *self, PyObject *args) {
 
 static PyObject *wait(HNumpyStore *self, PyObject *args) {
     try {
+        GILRelease nogil;
         self->NumpyDataStore->wait_stores();
     }
     catch (TypeErrorException &e) {
@@ -927,6 +1226,23 @@ static PyObject *send_event_numpy(HNumpyStore *self, PyObject *args) {
     Py_RETURN_NONE;
 }
 
+/***
+ * Statistics of the accesses done through this store, the ones of its read and write caches added up
+ */
+static PyObject *stats_numpy(HNumpyStore *self) {
+    std::vector<const CacheTable *> tables;
+    CacheTable *write_cache = self->NumpyDataStore->getWriteCache();
+    CacheTable *read_cache = self->NumpyDataStore->getReadCache();
+    if (write_cache) tables.push_back(write_cache);
+    if (read_cache && read_cache != write_cache) tables.push_back(read_cache);
+    std::vector<const HecubaStats *> sources;
+    for (const CacheTable *table : tables) sources.push_back(&table->get_stats());
+    PyObject *py_stats = stats_to_pydict(sources);
+    add_cache_usage(py_stats, tables);
+    return py_stats;
+}
+
+
 static void hnumpy_store_dealloc(HNumpyStore *self) {
     delete (self->NumpyDataStore);
     Py_TYPE((PyObject *) self)->tp_free((PyObject *) self);
@@ -966,7 +1282,7 @@ static int hnumpy_store_init(HNumpyStore *self, PyObject *args, PyObject *kwds)
                 config[conf_key] = conf_val;
             }
             if (PyLong_Check(value)) {
-                int32_t c_val = (int32_t) PyLong_AsLong(value);
+                int64_t c_val = (int64_t) PyLong_AsLongLong(value); // cache_bytes may not fit in 32 bits
                 config[conf_key] = std::to_string(c_val);
             }
             if (PyBool_Check(value)) {
@@ -991,6 +1307,7 @@ static int hnumpy_store_init(HNumpyStore *self, PyObject *args, PyObject *kwds)
 
 static PyMethodDef hnumpy_store_type_methods[] = {
         {"allocate_numpy",       (PyCFunction) allocate_numpy,       METH_VARARGS, NULL},
+        {"release_numpy_memory", (PyCFunction) release_numpy_memory, METH_VARARGS, NULL},
         {"store_numpy_slices",   (PyCFunction) store_numpy_slices,   METH_VARARGS, NULL},
         {"wait",                 (PyCFunction) wait,                 METH_VARARGS, NULL},
         {"load_numpy_slices",    (PyCFunction) load_numpy_slices,    METH_VARARGS, NULL},
@@ -1002,6 +1319,7 @@ static PyMethodDef hnumpy_store_type_methods[] = {
         {"enable_stream_consumer",  (PyCFunction) enable_stream_consumer_numpy, METH_NOARGS, NULL},
         {"poll",                 (PyCFunction) poll_numpy,           METH_VARARGS, NULL},
         {"send_event",           (PyCFunction) send_event_numpy,     METH_VARARGS, NULL},
+        {"stats",                (PyCFunction) stats_numpy,          METH_NOARGS,  NULL},
         {NULL, NULL, 0,                                                            NULL}
 };
 
@@ -1413,6 +1731,7 @@ static int hiter_init(HIterator *self, PyObject *args, PyObject *kwds) {
 static PyObject *get_next(HIterator *self) {
     const TupleRow *result;
     try {
+        GILRelease nogil;
         result = self->P->get_cnext();
     }
     catch (std::exception &e) {
@@ -1442,6 +1761,55 @@ static PyObject *get_next(HIterator *self) {
     return py_row;
 }
 
+/***
+ * Retrieves up to max_rows rows from the prefetch buffer and decodes them column by column
+ * @param args Maximum number of rows to return in the batch
+ * @return A list with one numpy array per column, StopIteration if there are no more rows
+ */
+static PyObject *get_next_batch(HIterator *self, PyObject *args) {
+    int max_rows;
+    if (!PyArg_ParseTuple(args, "i", &max_rows)) {
+        return NULL;
+    }
+    if (max_rows <= 0) {
+        PyErr_SetString(PyExc_ValueError, "The batch size must be a positive number");
+        return NULL;
+    }
+
+    std::vector<const TupleRow *> rows;
+    rows.reserve((size_t) max_rows);
+    try {
+        GILRelease nogil;
+        const TupleRow *result;
+        while (rows.size() < (size_t) max_rows && (result = self->P->get_cnext()) != nullptr) {
+            rows.push_back(result);
+        }
+    }
+    catch (std::exception &e) {
+        for (const TupleRow *row : rows) delete (row);
+        PyErr_SetString(PyExc_RuntimeError, e.what());
+        return NULL;
+    }
+    if (rows.empty()) {
+        PyErr_SetNone(PyExc_StopIteration);
+        return NULL;
+    }
+
+    PyObject *py_arrays = NULL;
+    try {
+        py_arrays = self->rowParser->make_pyarrays(rows);
+    }
+    catch (TypeErrorException &e) {
+        PyErr_SetString(PyExc_TypeError, e.what());
+    }
+    catch (std::exception &e) {
+        std::string error_msg = "Get next batch, parse result: " + std::string(e.what());
+        PyErr_SetString(PyExc_RuntimeError, error_msg.c_str());
+    }
+    for (const TupleRow *row : rows) delete (row);
+    return py_arrays;
+}
+
 static void hiter_dealloc(HIterator *self) {
     if (self->rowParser) delete (self->rowParser);
     if (self->P) delete (self->P);
@@ -1451,6 +1819,7 @@ static void hiter_dealloc(HIterator *self) {
 
 static PyMethodDef hiter_type_methods[] = {
         {"get_next", (PyCFunction) get_next, METH_NOARGS, NULL},
+        {"get_next_batch", (PyCFunction) get_next_batch, METH_VARARGS, NULL},
         {NULL, NULL, 0,                                   NULL}
 };
 
@@ -1508,6 +1877,7 @@ static PyObject *write_cass(HWriter *self, PyObject *args) {
     try {
         TupleRow *k = self->keysParser->make_tuple(py_keys);
         TupleRow *v = self->valuesParser->make_tuple(py_values);
+        GILRelease nogil;
         self->W->write_to_cassandra(k, v);
         delete (k);
         delete (v);
@@ -1698,6 +2068,7 @@ static PyTypeObject hfetch_HWriterType = {
 static PyMethodDef module_methods[] = {
         {"connectCassandra",    (PyCFunction) connectCassandra,    METH_VARARGS, NULL},
         {"disconnectCassandra", (PyCFunction) disconnectCassandra, METH_NOARGS,  NULL},
+        {"stats",               (PyCFunction) process_stats,       METH_NOARGS,  NULL},
         {NULL, NULL, 0,                                                          NULL}
 };
 
@@ -1745,7 +2116,10 @@ static PyObject *create_iter_items(HCache *self, PyObject *args) {
     }
 
     // Flush elements to avoid coherency problems
-    self->T->flush_elements();
+    {
+        GILRelease nogil;
+        self->T->flush_elements();
+    }
 
     try {
         iter->P = storage->get_iterator(self->T->get_metadata(), self->token_ranges, config);
@@ -1789,6 +2163,7 @@ static PyObject* poll(HCache *self) {
     PyObject *py_row;
     std::vector<const TupleRow *> v;
     try {
+        GILRelease nogil;
         v = self->T->poll();
     }
     catch (std::exception &e) {
@@ -35,6 +35,7 @@
 #include "../TupleRow.h"
 #include "../Prefetch.h"
 #include "PythonParser.h"
+#include "GILRelease.h"
 #include "../CacheTable.h"
 #include "../StorageInterface.h"
 
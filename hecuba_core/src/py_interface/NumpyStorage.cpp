@@ -1,6 +1,10 @@
 #include "NumpyStorage.h"
 #include "NumpyStorage.h"
 #include <iostream>
+#include <cerrno>
+#include <cstring>
+#include <sys/mman.h>
+#include <unistd.h>
 #include "debug.h"
 
 
@@ -60,8 +64,10 @@ void NumpyStorage::store_numpy(const uint64_t *storage_id, ArrayMetadata &np_met
 	if (py_order == BLOCK_MODE) {
 		if (coord != Py_None) {
 			std::list<std::vector<uint32_t> > crd = generate_coords(coord);
+			GILRelease nogil;
 			this->store_numpy_into_cas_by_coords(storage_id, np_metas, data, crd);
 		} else {
+			GILRelease nogil;
 			this->store_numpy_into_cas(storage_id, np_metas, data);
 		}
 	} else { // COLUMN_MODE
@@ -70,6 +76,7 @@ void NumpyStorage::store_numpy(const uint64_t *storage_id, ArrayMetadata &np_met
 			throw ModuleException("Storing a column range is NOT IMPLEMENTED");
 			//this->store_numpy_into_cas_by_cols_as_arrow(storage_id, np_metas, data, get_cols(coord));
 		}else {
+			GILRelease nogil;
 			this->store_numpy_into_cas_as_arrow(storage_id, np_metas, data);
 		}
 	}
@@ -80,8 +87,12 @@ void NumpyStorage::load_numpy(const uint64_t *storage_id, ArrayMetadata &np_meta
 	if (py_order == BLOCK_MODE) {
 		if (coord != Py_None) {
 			std::list<std::vector<uint32_t> > crd = generate_coords(coord);
+			GILRelease nogil;
 			this->read_numpy_from_cas_by_coords(storage_id, np_metas, crd, data);
-		} else this->read_numpy_from_cas(storage_id, np_metas, data);
+		} else {
+			GILRelease nogil;
+			this->read_numpy_from_cas(storage_id, np_metas, data);
+		}
 
 	} else { // COLUMN_MODE
 		std::vector<uint64_t> c = {};
@@ -93,11 +104,27 @@ void NumpyStorage::load_numpy(const uint64_t *storage_id, ArrayMetadata &np_meta
 				c.push_back(i);
 			}
 		}
+		GILRelease nogil;
 		this->read_numpy_from_cas_arrow(storage_id, np_metas, c, data);
 	}
 }
 
-PyObject *NumpyStorage::reserve_numpy_space(const uint64_t *storage_id, ArrayMetadata &np_metas) {
+#define NUMPY_MAPPING_CAPSULE "hecuba.NumpyMapping"
+
+static void unmap_numpy_space(PyObject *capsule) {
+    void *data = PyCapsule_GetPointer(capsule, NUMPY_MAPPING_CAPSULE);
+    size_t *size = (size_t *) PyCapsule_GetContext(capsule);
+    munmap(data, *size);
+    delete size;
+}
+
+/***
+ * Reserves the memory of a numpy with the shape and type described by np_metas
+ * @param on_demand If true, the memory is an anonymous mapping without swap reservation. Its pages are only
+ * committed when the blocks are loaded into them and can be given back with release_numpy_space, so the
+ * numpy may be larger than the memory of the node
+ */
+PyObject *NumpyStorage::reserve_numpy_space(const uint64_t *storage_id, ArrayMetadata &np_metas, bool on_demand) {
     npy_intp *dims = new npy_intp[np_metas.dims.size()];
     for (uint32_t i = 0; i < np_metas.dims.size(); ++i) {
         dims[i] = np_metas.dims[i];
@@ -116,11 +143,33 @@ PyObject *NumpyStorage::reserve_numpy_space(const uint64_t *storage_id, ArrayMet
         }else{
             fortran_layout=0;
         }
-        resulting_array = PyArray_ZEROS((int32_t) np_metas.dims.size(), dims, type, fortran_layout);
-        // it was : resulting_array = PyArray_ZEROS((int32_t) np_metas.dims.size(), dims, type, 0);
-        PyArrayObject *converted_array;
-        PyArray_OutputConverter(resulting_array, &converted_array);
-        PyArray_ENABLEFLAGS(converted_array, NPY_ARRAY_OWNDATA);
+        if (on_demand) {
+            size_t size = np_metas.elem_size;
+            for (uint32_t i = 0; i < np_metas.dims.size(); ++i) {
+                size *= np_metas.dims[i];
+            }
+            size = std::max(size, (size_t) 1);
+            void *data = mmap(nullptr, size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS | MAP_NORESERVE, -1, 0);
+            if (data == MAP_FAILED) {
+                throw ModuleException("Can't reserve " + std::to_string(size) + " bytes for the numpy: " + strerror(errno));
+            }
+            resulting_array = PyArray_New(&PyArray_Type, (int32_t) np_metas.dims.size(), dims, type, nullptr, data, 0,
+                                          fortran_layout ? NPY_ARRAY_FARRAY : NPY_ARRAY_CARRAY, nullptr);
+            if (!resulting_array) {
+                munmap(data, size);
+                throw ModuleException("Can't create the numpy on the reserved memory");
+            }
+            // The mapping lives as long as the numpy
+            PyObject *owner = PyCapsule_New(data, NUMPY_MAPPING_CAPSULE, unmap_numpy_space);
+            PyCapsule_SetContext(owner, new size_t(size));
+            PyArray_SetBaseObject((PyArrayObject *) resulting_array, owner);
+        } else {
+            resulting_array = PyArray_ZEROS((int32_t) np_metas.dims.size(), dims, type, fortran_layout);
+            // it was : resulting_array = PyArray_ZEROS((int32_t) np_metas.dims.size(), dims, type, 0);
+            PyArrayObject *converted_array;
+            PyArray_OutputConverter(resulting_array, &converted_array);
+            PyArray_ENABLEFLAGS(converted_array, NPY_ARRAY_OWNDATA);
+        }
     }
     catch (std::exception &e) {
         if (PyErr_Occurred()) PyErr_Print();
@@ -131,6 +180,33 @@ PyObject *NumpyStorage::reserve_numpy_space(const uint64_t *storage_id, ArrayMet
     return resulting_array;
 }
 
+/***
+ * Gives back to the system the memory of a range of bytes of a numpy reserved on demand, the range reads as
+ * zeros afterwards. Only the pages entirely inside the range are released, the pages shared with the
+ * neighbouring data are kept.
+ * @param numpy Numpy returned by reserve_numpy_space with on_demand
+ * @param offset First byte of the range, from the start of the data of the numpy
+ * @param length Number of bytes of the range
+ */
+void NumpyStorage::release_numpy_space(PyArrayObject *numpy, uint64_t offset, uint64_t length) {
+    PyObject *owner = PyArray_BASE(numpy);
+    if (!owner || !PyCapsule_IsValid(owner, NUMPY_MAPPING_CAPSULE)) {
+        throw ModuleException("Only the memory of a numpy reserved on demand can be released");
+    }
+    if (offset + length > (uint64_t) PyArray_NBYTES(numpy)) {
+        throw ModuleException("The memory to release is out of the bounds of the numpy");
+    }
+    uint64_t page = (uint64_t) sysconf(_SC_PAGESIZE);
+    uint64_t start = (uint64_t) PyArray_DATA(numpy) + offset;
+    uint64_t end = start + length;
+    start = (start + page - 1) / page * page;
+    end = end / page * page;
+    if (end <= start) return;
+    if (madvise((void *) start, end - start, MADV_DONTNEED) != 0) {
+        throw ModuleException(std::string("Can't release the memory of the numpy: ") + strerror(errno));
+    }
+}
+
 PyObject *NumpyStorage::get_row_elements(const uint64_t *storage_id, ArrayMetadata &np_metas) {
     uint32_t ndims = (uint32_t) np_metas.dims.size();
     uint64_t block_size = BLOCK_SIZE - (BLOCK_SIZE % np_metas.elem_size);
@@ -12,6 +12,7 @@
 
 #include "numpy/arrayobject.h"
 #include "UnitParser.h"
+#include "GILRelease.h"
 
 /***
  * Responsible to store a numpy to the keyspace.table_numpies, associating an attribute_name and a storage_id(uuid)
@@ -28,7 +29,9 @@ public:
 
     std::list<std::vector<uint32_t> > generate_coords(PyObject *coord) const;
 
-    PyObject *reserve_numpy_space(const uint64_t *storage_id, ArrayMetadata &np_metas);
+    PyObject *reserve_numpy_space(const uint64_t *storage_id, ArrayMetadata &np_metas, bool on_demand = false);
+
+    static void release_numpy_space(PyArrayObject *numpy, uint64_t offset, uint64_t length);
 
     PyObject *get_row_elements(const uint64_t *storage_id, ArrayMetadata &np_metas);
 
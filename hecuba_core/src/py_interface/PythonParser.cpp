@@ -60,13 +60,12 @@ TupleRow *PythonParser::make_tuple(PyObject *obj) const {
     if (size_t(PyList_Size(obj)) != parsers.size())
         throw ModuleException("PythonParser: Got less python elements than columns configured");
     uint32_t total_bytes = 0;
-    char *buffer = nullptr;
     if (!metas->empty()) {
         total_bytes = metas->at(metas->size() - 1).position + metas->at(metas->size() - 1).size;
-        buffer = (char *) malloc(total_bytes);
     }
 
-    TupleRow *new_tuple = new TupleRow(metas, total_bytes, buffer);
+    TupleRow *new_tuple = new TupleRow(metas, total_bytes);
+    char *buffer = (char *) new_tuple->get_payload();
 
     for (uint32_t i = 0; i < PyList_Size(obj); ++i) {
         PyObject *some = PyList_GetItem(obj, i);
@@ -91,7 +90,7 @@ PyObject *PythonParser::make_pylist(std::vector<const TupleRow *> &values) const
 
     PyObject *list = PyList_New(tuple->n_elem());
     for (uint16_t i = 0; i < tuple->n_elem(); i++) {
-        if (!tuple->isNull(i)) PyList_SetItem(list, i, this->parsers[i]->c_to_py(tuple->get_element(i)));
+        if (!tuple->isNull(i)) PyList_SetItem(list, i, this->parsers[i]->row_to_py(tuple, i));
         else {
             Py_INCREF(Py_None);
             PyList_SetItem(list, i, Py_None);
@@ -99,3 +98,92 @@ PyObject *PythonParser::make_pylist(std::vector<const TupleRow *> &values) const
     }
     return list;
 }
+
+/***
+ * Builds one numpy array per column out of a batch of rows.
+ * Fixed size types are copied straight from the TupleRow payloads into typed arrays,
+ * the rest of types and the columns containing nulls are stored in arrays of objects
+ * built with the column parser.
+ * @param rows Rows to be converted, all of them following the metadata of this parser
+ * @return A list with as many numpy arrays as columns, each of them of length rows.size()
+ */
+PyObject *PythonParser::make_pyarrays(const std::vector<const TupleRow *> &rows) const {
+    npy_intp nrows = (npy_intp) rows.size();
+    for (const TupleRow *row : rows) {
+        if (row == nullptr)
+            throw ModuleException("PythonParser: Marshalling from c to python a NULL tuple, unsupported");
+        if (row->n_elem() != parsers.size())
+            throw ModuleException("PythonParser: Found " + std::to_string(row->n_elem()) +
+                                  " elements from a max of " + std::to_string(parsers.size()));
+    }
+
+    PyObject *arrays = PyList_New(parsers.size());
+    for (uint16_t col = 0; col < parsers.size(); ++col) {
+        int npy_type;
+        switch (metas->at(col).type) {
+            case CASS_VALUE_TYPE_INT:
+                npy_type = NPY_INT32;
+                break;
+            case CASS_VALUE_TYPE_VARINT:
+            case CASS_VALUE_TYPE_BIGINT:
+                npy_type = NPY_INT64;
+                break;
+            case CASS_VALUE_TYPE_DOUBLE:
+                npy_type = NPY_FLOAT64;
+                break;
+            case CASS_VALUE_TYPE_FLOAT:
+                npy_type = NPY_FLOAT32;
+                break;
+            case CASS_VALUE_TYPE_BOOLEAN:
+                npy_type = NPY_BOOL;
+                break;
+            case CASS_VALUE_TYPE_SMALL_INT:
+                npy_type = NPY_INT16;
+                break;
+            case CASS_VALUE_TYPE_TINY_INT:
+                npy_type = NPY_INT8;
+                break;
+            default:
+                npy_type = NPY_OBJECT;
+        }
+        if (npy_type != NPY_OBJECT) {
+            for (const TupleRow *row : rows) {
+                if (row->isNull(col)) {
+                    // numpy has no null for these types, fall back to objects to keep the None
+                    npy_type = NPY_OBJECT;
+                    break;
+                }
+            }
+        }
+
+        PyObject *array = PyArray_SimpleNew(1, &nrows, npy_type);
+        if (!array) {
+            Py_DECREF(arrays);
+            throw ModuleException("PythonParser: Can't allocate the numpy array for column " + std::to_string(col));
+        }
+        if (npy_type == NPY_OBJECT) {
+            // Object arrays are created zero filled, the slots not yet set are skipped on deallocation
+            PyObject **data = (PyObject **) PyArray_DATA((PyArrayObject *) array);
+            try {
+                for (npy_intp i = 0; i < nrows; ++i) {
+                    if (rows[i]->isNull(col)) {
+                        Py_INCREF(Py_None);
+                        data[i] = Py_None;
+                    } else data[i] = this->parsers[col]->row_to_py(rows[i], col);
+                }
+            } catch (...) {
+                Py_DECREF(array);
+                Py_DECREF(arrays);
+                throw;
+            }
+        } else {
+            char *data = (char *) PyArray_DATA((PyArrayObject *) array);
+            npy_intp itemsize = PyArray_ITEMSIZE((PyArrayObject *) array);
+            for (npy_intp i = 0; i < nrows; ++i) {
+                memcpy(data + i * itemsize, rows[i]->get_element(col), itemsize);
+            }
+        }
+        PyList_SetItem(arrays, col, array);
+    }
+    return arrays;
+}
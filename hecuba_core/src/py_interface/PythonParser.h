@@ -28,6 +28,8 @@ public:
 
     PyObject *make_pylist(std::vector<const TupleRow *> &values) const;
 
+    PyObject *make_pyarrays(const std::vector<const TupleRow *> &rows) const;
+
 private:
     std::vector<UnitParser *> parsers;
     std::shared_ptr<const std::vector<ColumnMeta> > metas; //TODO To be removed
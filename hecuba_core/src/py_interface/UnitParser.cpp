@@ -350,30 +350,74 @@ BytesParser::BytesParser(const ColumnMeta &CM) : UnitParser(CM) {
 
 int16_t BytesParser::py_to_c(PyObject *obj, void *payload) const {
     if (obj == Py_None) return -1;
-    if (PyByteArray_Check(obj)) {
-        Py_ssize_t l_size = PyByteArray_Size(obj);
-        char *l_temp = PyByteArray_AsString(obj);
-        char *permanent = (char *) malloc(l_size + sizeof(uint64_t));
-        uint64_t int_size = (uint64_t) l_size;
+    // Any object exporting a contiguous buffer: bytes, bytearray, memoryview, numpy arrays...
+    Py_buffer view;
+    if (PyObject_GetBuffer(obj, &view, PyBUF_C_CONTIGUOUS) == 0) {
+        uint64_t int_size = (uint64_t) view.len;
         if (int_size == 0) std::cerr << "array bytes has size 0" << std::endl; //Warning
+        char *permanent = (char *) malloc(int_size + sizeof(uint64_t));
         //copy num bytes
         memcpy(permanent, &int_size, sizeof(uint64_t));
         //copybytes
-        memcpy(permanent + sizeof(uint64_t), l_temp, int_size);
+        memcpy(permanent + sizeof(uint64_t), view.buf, int_size);
         //copy pointer
         memcpy(payload, &permanent, sizeof(char *));
+        PyBuffer_Release(&view);
         return 0;
     }
-    error_parsing("PyByteArray", obj);
+    PyErr_Clear();
+    error_parsing("bytes-like object", obj);
     return -2;
 }
 
 PyObject *BytesParser::c_to_py(const void *payload) const {
-    if (!payload) throw ModuleException("Error parsing from C to Py, expected ptr to txtptr, found NULL");
-    int64_t *addr = (int64_t *) ((char *) payload);
-    char *d = reinterpret_cast<char *>(*addr);
-    if (d == nullptr) throw ModuleException("Error parsing from C to Py, expected ptr to text, found NULL");
-    return PyUnicode_FromString(d);
+    if (!payload) throw ModuleException("Error parsing from C to Py, expected ptr to bytes, found NULL");
+    const char *d = *(char *const *) payload;
+    if (d == nullptr) throw ModuleException("Error parsing from C to Py, expected ptr to bytes, found NULL");
+    uint64_t size;
+    memcpy(&size, d, sizeof(uint64_t));
+    return PyBytes_FromStringAndSize(d + sizeof(uint64_t), size);
+}
+
+static void release_row(PyObject *capsule) {
+    delete ((TupleRow *) PyCapsule_GetPointer(capsule, "hecuba.TupleRow"));
+}
+
+/***
+ * Exposes the bytes without copying them: a read-only memoryview of a uint8 numpy array whose
+ * base object holds a reference to the row, so the bytes live as long as any view of them
+ */
+PyObject *BytesParser::row_to_py(const TupleRow *row, uint16_t position) const {
+    const void *payload = row->get_element(position);
+    if (!payload) throw ModuleException("Error parsing from C to Py, expected ptr to bytes, found NULL");
+    char *d = *(char *const *) payload;
+    if (d == nullptr) throw ModuleException("Error parsing from C to Py, expected ptr to bytes, found NULL");
+    uint64_t size;
+    memcpy(&size, d, sizeof(uint64_t));
+
+    npy_intp dims = (npy_intp) size;
+    PyObject *array = PyArray_New(&PyArray_Type, 1, &dims, NPY_UINT8, nullptr, d + sizeof(uint64_t), 0,
+                                  NPY_ARRAY_C_CONTIGUOUS | NPY_ARRAY_ALIGNED, nullptr);
+    if (!array) throw ModuleException("Error parsing from C to Py, can't wrap the bytes of column " +
+                                      std::to_string(position));
+    TupleRow *owner = new TupleRow(row); // Shares the payload, which owns the bytes
+    PyObject *capsule = PyCapsule_New(owner, "hecuba.TupleRow", release_row);
+    if (!capsule) {
+        delete (owner);
+        Py_DECREF(array);
+        throw ModuleException("Error parsing from C to Py, can't reference the row of column " +
+                              std::to_string(position));
+    }
+    if (PyArray_SetBaseObject((PyArrayObject *) array, capsule) < 0) { // Steals the capsule
+        Py_DECREF(array);
+        throw ModuleException("Error parsing from C to Py, can't reference the row of column " +
+                              std::to_string(position));
+    }
+    PyObject *view = PyMemoryView_FromObject(array);
+    Py_DECREF(array);
+    if (!view) throw ModuleException("Error parsing from C to Py, can't build the view of column " +
+                                     std::to_string(position));
+    return view;
 }
 
 
@@ -58,6 +58,15 @@ public:
      */
     virtual PyObject *c_to_py(const void *payload) const;
 
+    /***
+     * @param row Row holding the element
+     * @param position Column of the element inside the row
+     * @return Python Object representing the element, which may share the memory of the row instead of copying it
+     */
+    virtual PyObject *row_to_py(const TupleRow *row, uint16_t position) const {
+        return c_to_py(row->get_element(position));
+    }
+
     void error_parsing(std::string type, PyObject *obj) const {
         std::string error_message;
         PyObject *repr = PyObject_Str(obj);
@@ -153,9 +162,11 @@ class BytesParser : public UnitParser {
 public:
     BytesParser(const ColumnMeta &CM);
 
-    virtual int16_t py_to_c(PyObject *text, void *payload) const;
+    virtual int16_t py_to_c(PyObject *obj, void *payload) const;
 
     virtual PyObject *c_to_py(const void *payload) const;
+
+    virtual PyObject *row_to_py(const TupleRow *row, uint16_t position) const;
 };
 
 
@@ -3,6 +3,11 @@
 #include "gtest/gtest.h"
 #include "../src/KVCache.h"
 #include "../src/TupleRow.h"
+#include "../src/TimestampGenerator.h"
+#include <thread>
+#include <vector>
+#include <algorithm>
+#include <set>
 
 /** TEST SETUP **/
 
@@ -279,6 +284,49 @@ TEST(TestCache, VerifyDeleteIsCalled) {
 
 
 
+
+/***
+ * Ensure the payloads released are reused by the next rows of the same size, also across threads
+ */
+TEST(TestTupleRowPool, ReusesReleasedBlocks) {
+    std::map<std::string, std::string> info = {};
+    std::vector<ColumnMeta> col_meta = {{info, CASS_VALUE_TYPE_BIGINT, nullptr, 0, sizeof(uint64_t)}};
+    std::shared_ptr<const std::vector<ColumnMeta> > metas = std::make_shared<std::vector<ColumnMeta> >(col_meta);
+
+    TupleRow *row = new TupleRow(metas, sizeof(uint64_t));
+    *(uint64_t *) row->get_payload() = 12345;
+    EXPECT_FALSE(row->isNull(0));
+    void *payload = row->get_payload();
+    delete (row);
+
+    row = new TupleRow(metas, sizeof(uint64_t));
+    EXPECT_EQ(row->get_payload(), payload);
+    delete (row);
+
+    // Rows built by one thread and released by another are recycled through the shared depot
+    uint32_t n_rows = 10000;
+    std::vector<TupleRow *> rows(n_rows);
+    std::thread producer([&]() {
+        for (uint32_t i = 0; i < n_rows; ++i) {
+            rows[i] = new TupleRow(metas, sizeof(uint64_t));
+            *(uint64_t *) rows[i]->get_payload() = i;
+        }
+    });
+    producer.join();
+    std::set<void *> released;
+    for (uint32_t i = 0; i < n_rows; ++i) {
+        EXPECT_EQ(*(uint64_t *) rows[i]->get_payload(), i);
+        released.insert(rows[i]->get_payload());
+        delete (rows[i]);
+    }
+    std::thread consumer([&]() {
+        TupleRow *reused = new TupleRow(metas, sizeof(uint64_t));
+        EXPECT_EQ(released.count(reused->get_payload()), 1u);
+        delete (reused);
+    });
+    consumer.join();
+}
+
 
 /*** PERFORMANCE ***/
 
@@ -344,3 +392,67 @@ TEST(TestCache, MixedPerformance) {
     EXPECT_GE(ret, size_t(0));
 }
 
+
+/***
+ * Measure the contention of many writer threads on a shared TimestampGenerator,
+ * the timestamps must be strictly increasing per thread and unique among all of them
+ */
+TEST(TestTimestampGenerator, ContentionManyThreads) {
+    uint32_t n_threads = std::max(8u, std::thread::hardware_concurrency());
+    uint64_t n_timestamps = std::pow(10, 5);
+
+    TimestampGenerator generator;
+    std::vector<std::vector<int64_t> > generated(n_threads, std::vector<int64_t>(n_timestamps));
+    std::vector<std::thread> threads;
+
+    auto start = std::chrono::steady_clock::now();
+    for (uint32_t t = 0; t < n_threads; ++t) {
+        threads.emplace_back([&generator, &generated, t, n_timestamps]() {
+            for (uint64_t i = 0; i < n_timestamps; ++i) generated[t][i] = generator.next();
+        });
+    }
+    for (std::thread &thread : threads) thread.join();
+    double elapsed_ns = std::chrono::duration_cast<std::chrono::nanoseconds>(
+            std::chrono::steady_clock::now() - start).count();
+    std::cout << n_threads << " threads: " << elapsed_ns / (n_threads * n_timestamps)
+              << " ns per timestamp" << std::endl;
+
+    std::vector<int64_t> all;
+    for (const std::vector<int64_t> &ts : generated) {
+        EXPECT_TRUE(std::is_sorted(ts.begin(), ts.end()));
+        EXPECT_TRUE(std::adjacent_find(ts.begin(), ts.end()) == ts.end());
+        all.insert(all.end(), ts.begin(), ts.end());
+    }
+    std::sort(all.begin(), all.end());
+    EXPECT_TRUE(std::adjacent_find(all.begin(), all.end()) == all.end());
+}
+
+
+/***
+ * Measure the allocation of rows produced by a thread and released by another one, as in the prefetch
+ */
+TEST(TestTupleRowPool, ProducerConsumer1M) {
+    std::map<std::string, std::string> info = {};
+    std::vector<ColumnMeta> col_meta = {{info, CASS_VALUE_TYPE_BIGINT, nullptr, 0, sizeof(uint64_t)},
+                                        {info, CASS_VALUE_TYPE_DOUBLE, nullptr, sizeof(uint64_t), sizeof(double)}};
+    std::shared_ptr<const std::vector<ColumnMeta> > metas = std::make_shared<std::vector<ColumnMeta> >(col_meta);
+    uint64_t n_rows = std::pow(10, 6);
+    uint64_t batch = 1000;
+
+    std::vector<TupleRow *> rows(batch);
+    uint64_t sum = 0;
+    for (uint64_t done = 0; done < n_rows; done += batch) {
+        std::thread producer([&]() {
+            for (uint64_t i = 0; i < batch; ++i) {
+                rows[i] = new TupleRow(metas, 2 * sizeof(uint64_t));
+                *(uint64_t *) rows[i]->get_payload() = done + i;
+            }
+        });
+        producer.join();
+        for (uint64_t i = 0; i < batch; ++i) {
+            sum += *(uint64_t *) rows[i]->get_payload();
+            delete (rows[i]);
+        }
+    }
+    EXPECT_EQ(sum, n_rows * (n_rows - 1) / 2);
+}
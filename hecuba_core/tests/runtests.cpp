@@ -3,6 +3,8 @@
 #include "gtest/gtest.h"
 #include "../src/CacheTable.h"
 #include "../src/StorageInterface.h"
+#include "../src/InflightWindow.h"
+#include "../src/BlockCodec.h"
 
 using namespace std;
 
@@ -902,6 +904,54 @@ TEST(TestMakePartitions, ReadBlockOnlyOnce) {
     delete (partitioner);
 }
 
+// The compression bits of the partition_type do not change the partitioning
+// and the compressed blocks are decompressed to the original ones
+TEST(TestMakePartitions, CompressedBlocks) {
+    uint32_t nrows = 463;
+    uint32_t ncols = 53;
+    ArrayMetadata arr_metas = ArrayMetadata();
+    arr_metas.dims = {nrows, ncols};
+    arr_metas.elem_size = sizeof(double);
+
+    double *data = new double[ncols * nrows];
+    for (uint32_t pos = 0; pos < ncols * nrows; ++pos) data[pos] = pos / 64;
+
+    std::vector<uint8_t> codecs;
+#ifdef HAVE_LZ4
+    codecs.push_back(COMPRESSION_LZ4);
+#endif
+#ifdef HAVE_ZSTD
+    codecs.push_back(COMPRESSION_ZSTD);
+#endif
+    for (uint8_t codec : codecs) {
+        for (uint8_t shuffle : {0, COMPRESSION_SHUFFLE}) {
+            arr_metas.partition_type = ZORDER_ALGORITHM | codec | shuffle;
+            EXPECT_EQ(arr_metas.get_partition_algorithm(), ZORDER_ALGORITHM);
+            SpaceFillingCurve::PartitionGenerator *partitioner =
+                    SpaceFillingCurve::make_partitions_generator(arr_metas, data);
+            double *result = new double[ncols * nrows]();
+            std::vector<Partition> blocks;
+            uint64_t raw = 0, compressed = 0;
+            while (!partitioner->isDone()) {
+                Partition chunk = partitioner->getNextPartition();
+                void *zchunk = BlockCodec::compress(arr_metas, chunk.data);
+                raw += *(uint64_t *) chunk.data;
+                compressed += *(uint64_t *) zchunk;
+                free(chunk.data);
+                blocks.emplace_back(chunk.cluster_id, chunk.block_id, BlockCodec::decompress(arr_metas, zchunk));
+                free(zchunk);
+            }
+            partitioner->merge_partitions(arr_metas, blocks, result);
+            EXPECT_EQ(memcmp(data, result, ncols * nrows * sizeof(double)), 0);
+            EXPECT_LT(compressed, raw);
+            for (const Partition &block : blocks) free(block.data);
+            delete[](result);
+            delete (partitioner);
+        }
+    }
+    delete[](data);
+}
+
 
 /** Test to asses KV Cache is performing as expected with pointer **/
 TEST(TestingKVCache, InsertGetDeleteOps) {
@@ -1027,6 +1077,89 @@ TEST(TestingKVCache, ReplaceOp) {
 }
 
 
+/** Test the cache is bounded by bytes and each shard evicts on its own **/
+TEST(TestingKVCache, BytesBound) {
+    KVCache<uint64_t, uint64_t> myCache(0, sizeof(uint64_t) * 2 * 10, KVCachePolicy::LRU, 1);
+    for (uint64_t i = 0; i < 100; ++i) myCache.add(i, i);
+    EXPECT_EQ(myCache.size(), 10);
+    EXPECT_EQ(myCache.bytes(), sizeof(uint64_t) * 2 * 10);
+    EXPECT_EQ(myCache.get(99), 99);
+    EXPECT_THROW(myCache.get(0), std::out_of_range);
+
+    KVCache<uint64_t, uint64_t> sharded(4096, 0, KVCachePolicy::CLOCK);
+    EXPECT_GT(sharded.get_nshards(), 1);
+    for (uint64_t i = 0; i < 10000; ++i) sharded.add(i, i);
+    EXPECT_LE(sharded.size(), 4096);
+}
+
+
+/** Test a scan doesn't evict the entries read more than once with the 2Q policy **/
+TEST(TestingKVCache, ScanResistance) {
+    KVCache<uint64_t, uint64_t> myCache(100, 0, KVCachePolicy::TWO_Q, 1);
+    // Read the hot keys twice, a miss is followed by an add as in CacheTable::get_crow
+    for (uint16_t round = 0; round < 2; ++round) {
+        for (uint64_t i = 0; i < 100; ++i) {
+            try {
+                myCache.get(i % 10);
+            } catch (std::out_of_range &e) {
+                myCache.add(i % 10, i % 10);
+            }
+            myCache.add(1000 + round * 100 + i, i);
+        }
+    }
+    // Scan
+    for (uint64_t i = 10000; i < 20000; ++i) myCache.add(i, i);
+    for (uint64_t i = 0; i < 10; ++i) EXPECT_EQ(myCache.get(i), i);
+}
+
+
+/** Test the statistics are added up to the parent and the latencies fall in their power of two bucket **/
+TEST(TestingStats, CountersAndHistograms) {
+    HecubaStats parent(nullptr);
+    HecubaStats stats(&parent);
+    stats.add(HecubaStats::CACHE_HITS);
+    stats.add(HecubaStats::READ_BYTES, 100);
+    stats.record(HecubaStats::READ, 0);
+    stats.record(HecubaStats::READ, 5);
+    stats.record(HecubaStats::READ, 8);
+    EXPECT_EQ(stats.get(HecubaStats::CACHE_HITS), 1);
+    EXPECT_EQ(parent.get(HecubaStats::READ_BYTES), 100);
+    const LatencyHistogram &h = parent.get_latency(HecubaStats::READ);
+    EXPECT_EQ(h.get_count(), 3);
+    EXPECT_EQ(h.get_total_us(), 13);
+    EXPECT_EQ(h.get_bucket(0), 1); // [0, 1)
+    EXPECT_EQ(h.get_bucket(3), 1); // [4, 8)
+    EXPECT_EQ(h.get_bucket(4), 1); // [8, 16)
+}
+
+TEST(TestingStats, InflightWindowAIMD) {
+    InflightWindow window(4, 2, 8, 1000000000);
+    EXPECT_EQ(window.get_window(), 4);
+    EXPECT_EQ(HecubaStats::global().get_gauge(HecubaStats::WRITE_WINDOW), 4);
+    // Successful rounds which fill the window make it grow up to the maximum
+    for (uint32_t round = 0; round < 100; ++round) {
+        std::vector<uint64_t> sent;
+        uint32_t size = window.get_window();
+        for (uint32_t i = 0; i < size; ++i) sent.push_back(window.acquire());
+        EXPECT_EQ(window.get_inflight(), size);
+        for (uint64_t sent_us : sent) window.release(sent_us, false);
+    }
+    EXPECT_EQ(window.get_window(), 8);
+    EXPECT_EQ(HecubaStats::global().get_gauge(HecubaStats::WRITE_WINDOW), 8);
+
+    // Errors halve it once per round trip, but never below the minimum
+    uint64_t first = window.acquire();
+    uint64_t second = window.acquire();
+    window.release(first, true);
+    EXPECT_EQ(window.get_window(), 4);
+    window.release(second, true); // Sent before the decrease
+    EXPECT_EQ(window.get_window(), 4);
+    for (uint32_t i = 0; i < 3; ++i) window.release(window.acquire(), true);
+    EXPECT_EQ(window.get_window(), 2);
+    EXPECT_EQ(window.get_inflight(), 0);
+}
+
+
 
 /** Testing custom comparators for TupleRow **/
 TEST(TupleTest, TestNulls) {
@@ -1257,6 +1390,73 @@ TEST(TestingCacheTable, GetRowC) {
 }
 
 
+/** Reads many keys concurrently, consuming each value as soon as it arrives **/
+TEST(TestingCacheTable, GetRowsStreamed) {
+    CassSession *test_session = NULL;
+    CassCluster *test_cluster = NULL;
+
+    CassFuture *connect_future = NULL;
+    test_cluster = cass_cluster_new();
+    test_session = cass_session_new();
+
+    cass_cluster_set_contact_points(test_cluster, contact_p);
+    cass_cluster_set_port(test_cluster, nodePort);
+
+    connect_future = cass_session_connect_keyspace(test_session, test_cluster, keyspace);
+    CassError rc = cass_future_error_code(connect_future);
+    EXPECT_TRUE(rc == CASS_OK);
+    cass_future_free(connect_future);
+
+    std::vector<std::map<std::string, std::string> > keysnames = {{{"name", "partid"}},
+                                                                  {{"name", "time"}}};
+    std::vector<std::map<std::string, std::string> > colsnames = {{{"name", "x"}},
+                                                                  {{"name", "y"}},
+                                                                  {{"name", "z"}}};
+    std::map<std::string, std::string> config;
+    config["reader_par"] = "8";
+    config["cache_size"] = "100";
+
+    TableMetadata *table_meta = new TableMetadata(particles_table, keyspace, keysnames, colsnames, test_session);
+    CacheTable *cache = new CacheTable(table_meta, test_session, config);
+
+    // The keys of the rows written by setupcassandra and a missing key at the end
+    uint32_t nkeys = 1000;
+    std::vector<const TupleRow *> keys;
+    for (uint32_t i = 0; i <= nkeys; ++i) {
+        char *buffer = (char *) malloc(sizeof(int) + sizeof(float));
+        int partid = i < nkeys ? (int) i : -1;
+        float time = (float) (i / .1);
+        memcpy(buffer, &partid, sizeof(int));
+        memcpy(buffer + sizeof(int), &time, sizeof(float));
+        keys.push_back(new TupleRow(table_meta->get_keys(), sizeof(int) + sizeof(float), buffer));
+    }
+    delete (cache->get_crow(keys[0])[0]); // The first key is served by the cache
+
+    std::vector<uint32_t> consumed(keys.size(), 0);
+    cache->get_crows(keys, [&](size_t pos, std::vector<const TupleRow *> &values) {
+        ++consumed[pos];
+        if (pos == nkeys) {
+            EXPECT_TRUE(values.empty());
+        } else {
+            ASSERT_EQ(values.size(), 1u);
+            EXPECT_FLOAT_EQ(*(const float *) values[0]->get_element(0), (float) (pos / .2));
+        }
+        for (const TupleRow *v : values) delete (v);
+    });
+    for (uint32_t n : consumed) EXPECT_EQ(n, 1u);
+
+    for (const TupleRow *key : keys) delete (key);
+    delete (cache);
+
+    CassFuture *close_future = cass_session_close(test_session);
+    cass_future_wait(close_future);
+    cass_future_free(close_future);
+
+    cass_cluster_free(test_cluster);
+    cass_session_free(test_session);
+}
+
+
 TEST(TestingEmptyValues, WriteSimple) {
     /** CONNECT **/
     CassSession *test_session = NULL;
@@ -1535,6 +1735,348 @@ TEST(TestingCacheTable, StoreNullBulk) {
 }
 
 
+TEST(TestingCacheTable, StoreBatched) {
+    CassSession *test_session = NULL;
+    CassCluster *test_cluster = NULL;
+
+    CassFuture *connect_future = NULL;
+    test_cluster = cass_cluster_new();
+    test_session = cass_session_new();
+
+    cass_cluster_set_contact_points(test_cluster, contact_p);
+    cass_cluster_set_port(test_cluster, nodePort);
+
+    connect_future = cass_session_connect_keyspace(test_session, test_cluster, keyspace);
+    CassError rc = cass_future_error_code(connect_future);
+    EXPECT_TRUE(rc == CASS_OK);
+    cass_future_free(connect_future);
+
+    std::vector<std::map<std::string, std::string> > keysnames = {{{"name", "partid"}},
+                                                                  {{"name", "time"}}};
+    std::vector<std::map<std::string, std::string> > colsnames = {{{"name", "x"}},
+                                                                  {{"name", "y"}},
+                                                                  {{"name", "z"}}};
+
+    std::map<std::string, std::string> config;
+    config["writer_par"] = "4";
+    config["writer_buffer"] = "20";
+    config["writer_batch_rows"] = "50";
+    config["cache_size"] = "0";
+
+    TableMetadata *table_meta = new TableMetadata(particles_wr_table, keyspace, keysnames, colsnames, test_session);
+    CacheTable *cache = new CacheTable(table_meta, test_session, config);
+
+    uint32_t npartitions = 10, nrows = 100;
+    for (uint32_t id = 0; id < npartitions * nrows; ++id) {
+        char *buffer = (char *) malloc(sizeof(int) + sizeof(float)); //keys
+        int partid = 100000 + id % npartitions;
+        float time = (float) id;
+        memcpy(buffer, &partid, sizeof(int));
+        memcpy(buffer + sizeof(int), &time, sizeof(float));
+
+        float v[] = {time, 1.25, 0.98};
+        char *buffer2 = (char *) malloc(sizeof(float) * 3); //values
+        memcpy(buffer2, &v, sizeof(float) * 3);
+
+        cache->put_crow(buffer, buffer2);
+    }
+    cache->wait_elements();
+
+    const HecubaStats &stats = cache->get_stats();
+    EXPECT_EQ(stats.get(HecubaStats::WRITES_COMPLETED), npartitions * nrows);
+    EXPECT_GE(stats.get(HecubaStats::WRITE_BATCHES), 1u);
+    EXPECT_LT(stats.get(HecubaStats::WRITE_BATCHES), npartitions * nrows);
+
+    for (uint32_t id = 0; id < npartitions * nrows; id += 37) {
+        char *buffer = (char *) malloc(sizeof(int) + sizeof(float));
+        int partid = 100000 + id % npartitions;
+        float time = (float) id;
+        memcpy(buffer, &partid, sizeof(int));
+        memcpy(buffer + sizeof(int), &time, sizeof(float));
+
+        std::vector<const TupleRow *> results = cache->get_crow(buffer);
+        ASSERT_EQ(results.size(), 1u);
+        EXPECT_FLOAT_EQ(*(const float *) results[0]->get_element(0), time);
+        for (const TupleRow *t_unit:results) delete (t_unit);
+    }
+
+    delete (cache);
+
+    CassFuture *close_future = cass_session_close(test_session);
+    cass_future_wait(close_future);
+    cass_future_free(close_future);
+
+    cass_cluster_free(test_cluster);
+    cass_session_free(test_session);
+}
+
+
+TEST(TestingCacheTable, StoreCoalesced) {
+    CassSession *test_session = NULL;
+    CassCluster *test_cluster = NULL;
+
+    CassFuture *connect_future = NULL;
+    test_cluster = cass_cluster_new();
+    test_session = cass_session_new();
+
+    cass_cluster_set_contact_points(test_cluster, contact_p);
+    cass_cluster_set_port(test_cluster, nodePort);
+
+    connect_future = cass_session_connect_keyspace(test_session, test_cluster, keyspace);
+    CassError rc = cass_future_error_code(connect_future);
+    EXPECT_TRUE(rc == CASS_OK);
+    cass_future_free(connect_future);
+
+    std::vector<std::map<std::string, std::string> > keysnames = {{{"name", "partid"}},
+                                                                  {{"name", "time"}}};
+    std::vector<std::map<std::string, std::string> > colsnames = {{{"name", "x"}},
+                                                                  {{"name", "y"}},
+                                                                  {{"name", "z"}}};
+
+    std::map<std::string, std::string> config;
+    config["writer_par"] = "4";
+    config["writer_buffer"] = "20";
+    config["writer_coalesce"] = "true";
+    config["cache_size"] = "0";
+
+    TableMetadata *table_meta = new TableMetadata(particles_wr_table, keyspace, keysnames, colsnames, test_session);
+    CacheTable *cache = new CacheTable(table_meta, test_session, config);
+
+    uint32_t nwrites = 5000;
+    int partid = 200000;
+    float time = 1.5;
+    for (uint32_t i = 0; i < nwrites; ++i) {
+        char *buffer = (char *) malloc(sizeof(int) + sizeof(float)); //keys
+        memcpy(buffer, &partid, sizeof(int));
+        memcpy(buffer + sizeof(int), &time, sizeof(float));
+
+        float v[] = {(float) i, 1.25, 0.98};
+        char *buffer2 = (char *) malloc(sizeof(float) * 3); //values
+        memcpy(buffer2, &v, sizeof(float) * 3);
+
+        cache->put_crow(buffer, buffer2);
+    }
+    cache->wait_elements();
+
+    // Every write is either sent or replaced by a later one while it was queued
+    const HecubaStats &stats = cache->get_stats();
+    EXPECT_EQ(stats.get(HecubaStats::WRITES_COMPLETED) + stats.get(HecubaStats::WRITES_COALESCED), nwrites);
+
+    char *buffer = (char *) malloc(sizeof(int) + sizeof(float));
+    memcpy(buffer, &partid, sizeof(int));
+    memcpy(buffer + sizeof(int), &time, sizeof(float));
+    std::vector<const TupleRow *> results = cache->get_crow(buffer);
+    ASSERT_EQ(results.size(), 1u);
+    EXPECT_FLOAT_EQ(*(const float *) results[0]->get_element(0), (float) (nwrites - 1));
+    for (const TupleRow *t_unit:results) delete (t_unit);
+
+    delete (cache);
+
+    CassFuture *close_future = cass_session_close(test_session);
+    cass_future_wait(close_future);
+    cass_future_free(close_future);
+
+    cass_cluster_free(test_cluster);
+    cass_session_free(test_session);
+}
+
+TEST(TestingCacheTable, StoreSpilledReplay) {
+    CassSession *test_session = NULL;
+    CassCluster *test_cluster = NULL;
+
+    CassFuture *connect_future = NULL;
+    test_cluster = cass_cluster_new();
+    test_session = cass_session_new();
+
+    cass_cluster_set_contact_points(test_cluster, contact_p);
+    cass_cluster_set_port(test_cluster, nodePort);
+
+    connect_future = cass_session_connect_keyspace(test_session, test_cluster, keyspace);
+    CassError rc = cass_future_error_code(connect_future);
+    EXPECT_TRUE(rc == CASS_OK);
+    cass_future_free(connect_future);
+
+    std::vector<std::map<std::string, std::string> > keysnames = {{{"name", "partid"}},
+                                                                  {{"name", "time"}}};
+    std::vector<std::map<std::string, std::string> > colsnames = {{{"name", "x"}},
+                                                                  {{"name", "y"}},
+                                                                  {{"name", "z"}}};
+
+    char spill_dir[] = "/tmp/hecuba_spillXXXXXX";
+    ASSERT_TRUE(mkdtemp(spill_dir) != NULL);
+
+    std::map<std::string, std::string> config;
+    config["writer_par"] = "4";
+    config["writer_buffer"] = "20";
+    config["writer_spill_dir"] = spill_dir;
+    config["cache_size"] = "0";
+
+    TableMetadata *table_meta = new TableMetadata(particles_wr_table, keyspace, keysnames, colsnames, test_session);
+    CacheTable *cache = new CacheTable(table_meta, test_session, config);
+    TupleRowFactory keys_factory(table_meta->get_keys());
+    TupleRowFactory values_factory(table_meta->get_values());
+
+    int partid = 300000;
+    float time = 2.5;
+    char *buffer = (char *) malloc(sizeof(int) + sizeof(float)); //keys
+    memcpy(buffer, &partid, sizeof(int));
+    memcpy(buffer + sizeof(int), &time, sizeof(float));
+    float v[] = {7.0, 1.25, 0.98};
+    char *buffer2 = (char *) malloc(sizeof(float) * 3); //values
+    memcpy(buffer2, &v, sizeof(float) * 3);
+    TupleRow *keys = keys_factory.make_tuple(buffer);
+    TupleRow *values = values_factory.make_tuple(buffer2);
+    keys->set_timestamp(std::chrono::duration_cast<std::chrono::microseconds>(
+            std::chrono::system_clock::now().time_since_epoch()).count());
+
+    // A write given up is saved locally and written by the replay, only once
+    EXPECT_TRUE(cache->get_writer()->spill_write(keys, values));
+    EXPECT_EQ(cache->get_writer()->replay_spilled_writes(), 1u);
+    EXPECT_EQ(cache->get_writer()->replay_spilled_writes(), 0u);
+    delete (keys);
+    delete (values);
+
+    buffer = (char *) malloc(sizeof(int) + sizeof(float));
+    memcpy(buffer, &partid, sizeof(int));
+    memcpy(buffer + sizeof(int), &time, sizeof(float));
+    std::vector<const TupleRow *> results = cache->get_crow(buffer);
+    ASSERT_EQ(results.size(), 1u);
+    EXPECT_FLOAT_EQ(*(const float *) results[0]->get_element(0), 7.0);
+    for (const TupleRow *t_unit:results) delete (t_unit);
+
+    delete (cache);
+    rmdir(spill_dir);
+
+    CassFuture *close_future = cass_session_close(test_session);
+    cass_future_wait(close_future);
+    cass_future_free(close_future);
+
+    cass_cluster_free(test_cluster);
+    cass_session_free(test_session);
+}
+
+
+/** Decodes and binds the rows of the particle table through the column plans of the factories and reports the cost per row **/
+TEST(TupleTest, DecodeBindBenchmark) {
+    CassSession *test_session = NULL;
+    CassCluster *test_cluster = NULL;
+
+    CassFuture *connect_future = NULL;
+    test_cluster = cass_cluster_new();
+    test_session = cass_session_new();
+
+    cass_cluster_set_contact_points(test_cluster, contact_p);
+    cass_cluster_set_port(test_cluster, nodePort);
+
+    connect_future = cass_session_connect_keyspace(test_session, test_cluster, keyspace);
+    CassError rc = cass_future_error_code(connect_future);
+    EXPECT_TRUE(rc == CASS_OK);
+    cass_future_free(connect_future);
+
+    std::vector<std::map<std::string, std::string> > keysnames = {{{"name", "partid"}},
+                                                                  {{"name", "time"}}};
+    std::vector<std::map<std::string, std::string> > fixed_colsnames = {{{"name", "x"}},
+                                                                        {{"name", "y"}},
+                                                                        {{"name", "z"}}};
+    std::vector<std::map<std::string, std::string> > mixed_colsnames = {{{"name", "x"}},
+                                                                        {{"name", "y"}},
+                                                                        {{"name", "z"}},
+                                                                        {{"name", "ciao"}}};
+
+    TableMetadata *fixed_meta = new TableMetadata(particles_table, keyspace, keysnames, fixed_colsnames, test_session);
+    TableMetadata *mixed_meta = new TableMetadata(particles_table, keyspace, keysnames, mixed_colsnames, test_session);
+
+    CassStatement *statement = cass_statement_new("SELECT partid, time, x, y, z, ciao FROM test.particle", 0);
+    cass_statement_set_paging_size(statement, -1);
+    CassFuture *query_future = cass_session_execute(test_session, statement);
+    const CassResult *result = cass_future_get_result(query_future);
+    ASSERT_TRUE(result != NULL);
+    cass_future_free(query_future);
+    cass_statement_free(statement);
+
+    std::vector<const CassRow *> cass_rows;
+    CassIterator *it = cass_iterator_from_result(result);
+    while (cass_iterator_next(it)) cass_rows.push_back(cass_iterator_get_row(it));
+    cass_iterator_free(it);
+    ASSERT_GT(cass_rows.size(), 10000u);
+
+    const uint32_t passes = 20;
+    for (TableMetadata *table_meta : {fixed_meta, mixed_meta}) {
+        TupleRowFactory row_factory(table_meta->get_items());
+        TupleRowFactory k_factory(table_meta->get_keys());
+        TupleRowFactory v_factory(table_meta->get_values());
+        uint16_t nkeys = k_factory.n_elements();
+        uint16_t ncols = nkeys + v_factory.n_elements();
+
+        auto start = std::chrono::steady_clock::now();
+        std::vector<TupleRow *> rows;
+        for (uint32_t pass = 0; pass < passes; ++pass) {
+            for (const CassRow *cass_row : cass_rows) rows.push_back(row_factory.make_tuple(cass_row));
+            if (pass + 1 < passes) {
+                for (TupleRow *row : rows) delete (row);
+                rows.clear();
+            }
+        }
+        double decode_ns = std::chrono::duration<double, std::nano>(std::chrono::steady_clock::now() - start).count()
+                           / (passes * cass_rows.size());
+        ASSERT_EQ(rows.size(), cass_rows.size());
+        EXPECT_FALSE(rows[0]->isNull(0));
+
+        // Bind the keys and values of every row as put_row does
+        std::vector<TupleRow *> keys, values;
+        for (TupleRow *row : rows) {
+            std::vector<char *> buffers;
+            for (TupleRowFactory *factory : {&k_factory, &v_factory}) {
+                char *buffer = (char *) malloc(factory->get_nbytes());
+                uint16_t first = factory == &k_factory ? 0 : nkeys;
+                for (uint16_t j = 0; j < factory->n_elements(); ++j) {
+                    const ColumnMeta &meta = factory->get_metadata()->at(j);
+                    const void *element = row->get_element(first + j);
+                    if (meta.type == CASS_VALUE_TYPE_TEXT || meta.type == CASS_VALUE_TYPE_VARCHAR) {
+                        char *copy = strdup(element ? *(char *const *) element : "");
+                        memcpy(buffer + meta.position, &copy, sizeof(char *));
+                    } else {
+                        memcpy(buffer + meta.position, element, meta.size);
+                    }
+                }
+                buffers.push_back(buffer);
+            }
+            keys.push_back(k_factory.make_tuple(buffers[0]));
+            values.push_back(v_factory.make_tuple(buffers[1]));
+        }
+        start = std::chrono::steady_clock::now();
+        for (uint32_t pass = 0; pass < passes; ++pass) {
+            for (uint32_t i = 0; i < keys.size(); ++i) {
+                CassStatement *insert = cass_statement_new(table_meta->get_insert_query(), ncols);
+                k_factory.bind(insert, keys[i], 0);
+                v_factory.bind(insert, values[i], nkeys);
+                cass_statement_free(insert);
+            }
+        }
+        double bind_ns = std::chrono::duration<double, std::nano>(std::chrono::steady_clock::now() - start).count()
+                         / (passes * keys.size());
+
+        std::cout << (table_meta == fixed_meta ? "fixed width" : "with text") << " rows: decode " << decode_ns
+                  << " ns/row, bind " << bind_ns << " ns/row" << std::endl;
+
+        for (TupleRow *row : rows) delete (row);
+        for (TupleRow *row : keys) delete (row);
+        for (TupleRow *row : values) delete (row);
+    }
+
+    cass_result_free(result);
+    delete (fixed_meta);
+    delete (mixed_meta);
+
+    CassFuture *close_future = cass_session_close(test_session);
+    cass_future_wait(close_future);
+    cass_future_free(close_future);
+
+    cass_cluster_free(test_cluster);
+    cass_session_free(test_session);
+}
+
+
 TEST(TestingCacheTable, StoreNullBulkText) {
 
     /** CONNECT **/
@@ -231,6 +231,38 @@ class Config:
             log.warn('using default MAX_CACHE_SIZE: %d', singleton.max_cache_size)
         singleton.configdir['max_cache_size'] = str(singleton.max_cache_size)
 
+        try:
+            singleton.max_cache_bytes = int(os.environ['MAX_CACHE_BYTES'])
+            log.info('MAX_CACHE_BYTES: %d', singleton.max_cache_bytes)
+        except KeyError:
+            singleton.max_cache_bytes = 0
+            log.warn('using default MAX_CACHE_BYTES: %d', singleton.max_cache_bytes)
+        singleton.configdir['max_cache_bytes'] = str(singleton.max_cache_bytes)
+
+        try:
+            singleton.cache_policy = os.environ['CACHE_POLICY'].lower()
+            log.info('CACHE_POLICY: %s', singleton.cache_policy)
+        except KeyError:
+            singleton.cache_policy = 'lru'
+            log.warn('using default CACHE_POLICY: %s', singleton.cache_policy)
+        singleton.configdir['cache_policy'] = singleton.cache_policy
+
+        try:
+            singleton.negative_cache_size = int(os.environ['NEGATIVE_CACHE_SIZE'])
+            log.info('NEGATIVE_CACHE_SIZE: %d', singleton.negative_cache_size)
+        except KeyError:
+            singleton.negative_cache_size = 0
+            log.warn('using default NEGATIVE_CACHE_SIZE: %d', singleton.negative_cache_size)
+        singleton.configdir['negative_cache_size'] = str(singleton.negative_cache_size)
+
+        try:
+            singleton.negative_cache_ttl = int(os.environ['NEGATIVE_CACHE_TTL'])
+            log.info('NEGATIVE_CACHE_TTL: %d', singleton.negative_cache_ttl)
+        except KeyError:
+            singleton.negative_cache_ttl = 1000
+            log.warn('using default NEGATIVE_CACHE_TTL: %d', singleton.negative_cache_ttl)
+        singleton.configdir['negative_cache_ttl'] = str(singleton.negative_cache_ttl)
+
         try:
             singleton.replication_strategy = os.environ['REPLICATION_STRATEGY']
             log.info('REPLICATION_STRATEGY: %s', singleton.replication_strategy)
@@ -270,6 +302,22 @@ class Config:
             log.warn('using default PREFETCH_SIZE: %s', singleton.prefetch_size)
         singleton.configdir['prefetch_size'] = str(singleton.prefetch_size)
 
+        try:
+            singleton.prefetch_parallelism = int(os.environ['PREFETCH_PARALLELISM'])
+            log.info('PREFETCH_PARALLELISM: %s', singleton.prefetch_parallelism)
+        except KeyError:
+            singleton.prefetch_parallelism = 4
+            log.warn('using default PREFETCH_PARALLELISM: %s', singleton.prefetch_parallelism)
+        singleton.configdir['prefetch_parallelism'] = str(singleton.prefetch_parallelism)
+
+        try:
+            singleton.prefetch_page_size = int(os.environ['PREFETCH_PAGE_SIZE'])
+            log.info('PREFETCH_PAGE_SIZE: %s', singleton.prefetch_page_size)
+        except KeyError:
+            singleton.prefetch_page_size = 5000
+            log.warn('using default PREFETCH_PAGE_SIZE: %s', singleton.prefetch_page_size)
+        singleton.configdir['prefetch_page_size'] = str(singleton.prefetch_page_size)
+
         try:
             singleton.write_buffer_size = int(os.environ['WRITE_BUFFER_SIZE'])
             log.info('WRITE_BUFFER_SIZE: %s', singleton.write_buffer_size)
@@ -287,6 +335,177 @@ class Config:
             log.warn('using default WRITE_CALLBACKS_NUMBER: %s', singleton.write_callbacks_number)
         singleton.configdir['write_callbacks_number'] = str(singleton.write_callbacks_number)
 
+        try:
+            singleton.write_callbacks_min = int(os.environ['WRITE_CALLBACKS_MIN'])
+            log.info('WRITE_CALLBACKS_MIN: %s', singleton.write_callbacks_min)
+        except KeyError:
+            singleton.write_callbacks_min = singleton.write_callbacks_number
+            log.warn('using default WRITE_CALLBACKS_MIN: %s', singleton.write_callbacks_min)
+        singleton.configdir['write_callbacks_min'] = str(singleton.write_callbacks_min)
+
+        try:
+            singleton.write_callbacks_max = int(os.environ['WRITE_CALLBACKS_MAX'])
+            log.info('WRITE_CALLBACKS_MAX: %s', singleton.write_callbacks_max)
+        except KeyError:
+            singleton.write_callbacks_max = singleton.write_callbacks_number
+            log.warn('using default WRITE_CALLBACKS_MAX: %s', singleton.write_callbacks_max)
+        singleton.configdir['write_callbacks_max'] = str(singleton.write_callbacks_max)
+
+        try:
+            singleton.write_latency_target = int(os.environ['WRITE_LATENCY_TARGET'])
+            log.info('WRITE_LATENCY_TARGET: %s', singleton.write_latency_target)
+        except KeyError:
+            singleton.write_latency_target = 0
+            log.warn('using default WRITE_LATENCY_TARGET: %s', singleton.write_latency_target)
+        singleton.configdir['write_latency_target'] = str(singleton.write_latency_target)
+
+        try:
+            singleton.write_batch_rows = int(os.environ['WRITE_BATCH_ROWS'])
+            log.info('WRITE_BATCH_ROWS: %s', singleton.write_batch_rows)
+        except KeyError:
+            singleton.write_batch_rows = 0
+            log.warn('using default WRITE_BATCH_ROWS: %s', singleton.write_batch_rows)
+        singleton.configdir['write_batch_rows'] = str(singleton.write_batch_rows)
+
+        try:
+            singleton.write_batch_bytes = int(os.environ['WRITE_BATCH_BYTES'])
+            log.info('WRITE_BATCH_BYTES: %s', singleton.write_batch_bytes)
+        except KeyError:
+            singleton.write_batch_bytes = 32768
+            log.warn('using default WRITE_BATCH_BYTES: %s', singleton.write_batch_bytes)
+        singleton.configdir['write_batch_bytes'] = str(singleton.write_batch_bytes)
+
+        try:
+            singleton.write_batch_linger = int(os.environ['WRITE_BATCH_LINGER'])
+            log.info('WRITE_BATCH_LINGER: %s', singleton.write_batch_linger)
+        except KeyError:
+            singleton.write_batch_linger = 1000
+            log.warn('using default WRITE_BATCH_LINGER: %s', singleton.write_batch_linger)
+        singleton.configdir['write_batch_linger'] = str(singleton.write_batch_linger)
+
+        try:
+            env_var = os.environ['WRITE_COALESCE'].lower()
+            singleton.write_coalesce = env_var in ('true', 'yes', '1')
+            log.info('WRITE_COALESCE: %s', singleton.write_coalesce)
+        except KeyError:
+            singleton.write_coalesce = False
+            log.warn('using default WRITE_COALESCE: %s', singleton.write_coalesce)
+        singleton.configdir['write_coalesce'] = 'true' if singleton.write_coalesce else 'false'
+
+        try:
+            singleton.write_retries = int(os.environ['WRITE_RETRIES'])
+            log.info('WRITE_RETRIES: %s', singleton.write_retries)
+        except KeyError:
+            singleton.write_retries = 10
+            log.warn('using default WRITE_RETRIES: %s', singleton.write_retries)
+        singleton.configdir['write_retries'] = str(singleton.write_retries)
+
+        try:
+            singleton.write_retry_delay = int(os.environ['WRITE_RETRY_DELAY'])
+            log.info('WRITE_RETRY_DELAY: %s', singleton.write_retry_delay)
+        except KeyError:
+            singleton.write_retry_delay = 100
+            log.warn('using default WRITE_RETRY_DELAY: %s', singleton.write_retry_delay)
+        singleton.configdir['write_retry_delay'] = str(singleton.write_retry_delay)
+
+        try:
+            singleton.write_retry_max_delay = int(os.environ['WRITE_RETRY_MAX_DELAY'])
+            log.info('WRITE_RETRY_MAX_DELAY: %s', singleton.write_retry_max_delay)
+        except KeyError:
+            singleton.write_retry_max_delay = 10000
+            log.warn('using default WRITE_RETRY_MAX_DELAY: %s', singleton.write_retry_max_delay)
+        singleton.configdir['write_retry_max_delay'] = str(singleton.write_retry_max_delay)
+
+        try:
+            singleton.write_max_retrying = int(os.environ['WRITE_MAX_RETRYING'])
+            log.info('WRITE_MAX_RETRYING: %s', singleton.write_max_retrying)
+        except KeyError:
+            singleton.write_max_retrying = 1000
+            log.warn('using default WRITE_MAX_RETRYING: %s', singleton.write_max_retrying)
+        singleton.configdir['write_max_retrying'] = str(singleton.write_max_retrying)
+
+        try:
+            singleton.write_spill_dir = os.environ['WRITE_SPILL_DIR']
+            log.info('WRITE_SPILL_DIR: %s', singleton.write_spill_dir)
+        except KeyError:
+            singleton.write_spill_dir = ''
+            log.warn('using default WRITE_SPILL_DIR: %s', singleton.write_spill_dir)
+        singleton.configdir['write_spill_dir'] = singleton.write_spill_dir
+
+        try:
+            singleton.read_callbacks_number = int(os.environ['READ_CALLBACKS_NUMBER'])
+            log.info('READ_CALLBACKS_NUMBER: %s', singleton.read_callbacks_number)
+        except KeyError:
+            singleton.read_callbacks_number = 16
+            log.warn('using default READ_CALLBACKS_NUMBER: %s', singleton.read_callbacks_number)
+        singleton.configdir['read_callbacks_number'] = str(singleton.read_callbacks_number)
+
+        try:
+            singleton.read_ahead_blocks = int(os.environ['READ_AHEAD_BLOCKS'])
+            log.info('READ_AHEAD_BLOCKS: %s', singleton.read_ahead_blocks)
+        except KeyError:
+            singleton.read_ahead_blocks = 32
+            log.warn('using default READ_AHEAD_BLOCKS: %s', singleton.read_ahead_blocks)
+        singleton.configdir['read_ahead_blocks'] = str(singleton.read_ahead_blocks)
+
+        try:
+            singleton.read_ahead_memory = int(os.environ['READ_AHEAD_MEMORY'])
+            log.info('READ_AHEAD_MEMORY: %s', singleton.read_ahead_memory)
+        except KeyError:
+            singleton.read_ahead_memory = 64 * 1024 * 1024
+            log.warn('using default READ_AHEAD_MEMORY: %s', singleton.read_ahead_memory)
+        singleton.configdir['read_ahead_memory'] = str(singleton.read_ahead_memory)
+
+        try:
+            singleton.numpy_cache_bytes = int(os.environ['NUMPY_CACHE_BYTES'])
+            log.info('NUMPY_CACHE_BYTES: %s', singleton.numpy_cache_bytes)
+        except KeyError:
+            singleton.numpy_cache_bytes = 0
+            log.warn('using default NUMPY_CACHE_BYTES: %s', singleton.numpy_cache_bytes)
+        singleton.configdir['numpy_cache_bytes'] = str(singleton.numpy_cache_bytes)
+
+        try:
+            singleton.numpy_local_path = os.environ['HECUBA_NUMPY_PATH']
+            log.info('HECUBA_NUMPY_PATH: %s', singleton.numpy_local_path)
+        except KeyError:
+            singleton.numpy_local_path = ''
+            log.warn('using default HECUBA_NUMPY_PATH: %s', singleton.numpy_local_path)
+        singleton.configdir['numpy_local_path'] = singleton.numpy_local_path
+
+        try:
+            singleton.numpy_compression = os.environ['NUMPY_COMPRESSION'].lower()
+            log.info('NUMPY_COMPRESSION: %s', singleton.numpy_compression)
+        except KeyError:
+            singleton.numpy_compression = 'none'
+            log.warn('using default NUMPY_COMPRESSION: %s', singleton.numpy_compression)
+        singleton.configdir['numpy_compression'] = singleton.numpy_compression
+
+        try:
+            env_var = os.environ['NUMPY_SHUFFLE'].lower()
+            singleton.numpy_shuffle = False if env_var == 'no' or env_var == 'false' else True
+            log.info('NUMPY_SHUFFLE: %s', singleton.numpy_shuffle)
+        except KeyError:
+            singleton.numpy_shuffle = False
+            log.warn('using default NUMPY_SHUFFLE: %s', singleton.numpy_shuffle)
+        singleton.configdir['numpy_shuffle'] = 'true' if singleton.numpy_shuffle else 'false'
+
+        try:
+            env_var = os.environ['NUMPY_WRITE_BACK'].lower()
+            singleton.numpy_write_back = False if env_var == 'no' or env_var == 'false' else True
+            log.info('NUMPY_WRITE_BACK: %s', singleton.numpy_write_back)
+        except KeyError:
+            singleton.numpy_write_back = False
+            log.warn('using default NUMPY_WRITE_BACK: %s', singleton.numpy_write_back)
+        singleton.configdir['numpy_write_back'] = 'true' if singleton.numpy_write_back else 'false'
+
+        try:
+            singleton.numpy_flush_interval = float(os.environ['NUMPY_FLUSH_INTERVAL'])
+            log.info('NUMPY_FLUSH_INTERVAL: %s', singleton.numpy_flush_interval)
+        except KeyError:
+            singleton.numpy_flush_interval = 10
+            log.warn('using default NUMPY_FLUSH_INTERVAL: %s', singleton.numpy_flush_interval)
+        singleton.configdir['numpy_flush_interval'] = str(singleton.numpy_flush_interval)
+
         try:
             env_var = os.environ['TIMESTAMPED_WRITES'].lower()
             singleton.timestamped_writes = False if env_var == 'no' or env_var == 'false' else True
@@ -399,6 +618,17 @@ if not filter == hfilter:
     builtins.filter = hfilter
 
 
+def stats():
+    """
+    Process wide statistics of the C++ layer, the addition of the ones of every StorageDict and StorageNumpy
+    Returns:
+        dict: cache hits, misses and evictions, reads and writes to the storage (queued, sent, pending,
+              in flight, completed, retried and failed), bytes moved and the latency histograms per operation
+    """
+    from hecuba.hfetch import stats as _process_stats
+    return _process_stats()
+
+
 def _intercept_numpy_method(method_name):
     """
     Intercept Numpy.'method_name' and use StorageNumpy.'method_name' instead.
@@ -427,4 +657,4 @@ _intercept_numpy_method('dot')
 _intercept_numpy_method('array_equal')
 _intercept_numpy_method('concatenate')
 
-__all__ = ['StorageObj', 'StorageDict', 'StorageNumpy', 'StorageStream', 'Parser']
+__all__ = ['StorageObj', 'StorageDict', 'StorageNumpy', 'StorageStream', 'Parser', 'stats']
@@ -0,0 +1,101 @@
+import mmap
+from collections import OrderedDict
+
+
+class BlockCache(object):
+    """
+    Bounded set of the blocks of an array kept in memory, the rest of the array is not backed by memory.
+    The blocks are grouped in slabs, the blocks sharing their coordinate on the outermost dimension of the
+    memory layout, as a slab is the smallest contiguous range of memory made of whole blocks. When the
+    loaded blocks use more memory than the capacity, the least recently used slabs are evicted: their
+    modified blocks are flushed and their memory is released.
+    """
+
+    def __init__(self, shape, strides, fortran, row_elem, capacity, write_back, release):
+        """
+        Args:
+            shape: shape of the array
+            strides: strides of the array
+            fortran: True if the array is in Fortran order
+            row_elem: number of elements of each dimension of a block
+            capacity: max number of bytes of the array in memory
+            write_back: WriteBack with the blocks of the array modified in memory
+            release: function releasing the memory of a range of bytes (offset, length) of the array
+        """
+        ndim = len(shape)
+        self.capacity = capacity
+        self.evictions = 0
+        self._dim = ndim - 1 if fortran else 0  # Dimension identifying the slab of a block
+        self._row_elem = row_elem
+        self._extent = shape[self._dim]
+        self._stride = strides[self._dim]
+        self._write_back = write_back
+        self._release = release
+        # Each run of contiguous elements of a block lies in its own pages, unless its neighbours are loaded
+        run = row_elem * strides[0 if fortran else ndim - 1]
+        self._block_bytes = row_elem ** (ndim - 1) * -(-run // mmap.PAGESIZE) * mmap.PAGESIZE
+        self._lock = write_back.lock  # Flushes and evictions of the array are serialized
+        self._slabs = OrderedDict()  # Slab -> set with the coordinates of its blocks in memory, least recent first
+        self._pinned = set()  # Slabs of the last request, never evicted
+
+    def __contains__(self, coord):
+        blocks = self._slabs.get(coord[self._dim])
+        return blocks is not None and coord in blocks
+
+    def _slab_bytes(self, slab):
+        start = slab * self._row_elem
+        return (min(start + self._row_elem, self._extent) - start) * self._stride
+
+    def memory(self):
+        """
+        Returns:
+            number of bytes of the array in memory
+        """
+        with self._lock:
+            return sum(min(self._slab_bytes(slab), len(blocks) * self._block_bytes)
+                       for slab, blocks in self._slabs.items())
+
+    def missing(self, coords):
+        """
+        Starts a request: its slabs become the most recently used ones and are not evicted until the next request
+        Args:
+            coords: coordinates of the blocks requested
+        Returns:
+            list with the coordinates of the requested blocks not in memory
+        """
+        with self._lock:
+            self._pinned = set(coord[self._dim] for coord in coords)
+            for slab in self._pinned:
+                if slab in self._slabs:
+                    self._slabs.move_to_end(slab)
+            return [coord for coord in coords if coord not in self]
+
+    def add(self, coords):
+        """
+        Records blocks loaded into memory and evicts the least recently used slabs exceeding the capacity
+        Args:
+            coords: coordinates of the blocks loaded
+        """
+        with self._lock:
+            for coord in coords:
+                slab = coord[self._dim]
+                blocks = self._slabs.get(slab)
+                if blocks is None:
+                    blocks = self._slabs[slab] = set()
+                else:
+                    self._slabs.move_to_end(slab)
+                blocks.add(coord)
+            used = self.memory()
+            for slab in list(self._slabs):
+                if used <= self.capacity:
+                    break
+                if slab not in self._pinned:
+                    used -= min(self._slab_bytes(slab), len(self._slabs[slab]) * self._block_bytes)
+                    self._evict(slab)
+
+    def _evict(self, slab):
+        blocks = self._slabs.pop(slab)
+        self._write_back.flush(blocks)
+        start = slab * self._row_elem
+        self._release(start * self._stride, self._slab_bytes(slab))
+        self.evictions += 1
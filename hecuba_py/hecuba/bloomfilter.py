@@ -0,0 +1,67 @@
+import math
+import uuid
+from hashlib import blake2b
+
+import numpy as np
+
+# Key types whose values are normalized so that the key given by the user and the one read
+# from Cassandra hash the same (e.g. 1 and 1.0 on a double column)
+_normalizers = {'int': int, 'bigint': int, 'smallint': int, 'tinyint': int, 'varint': int, 'counter': int,
+                'double': float,
+                'float': lambda v: float(np.float32(v)),  # Stored with single precision
+                'boolean': bool,
+                'text': str, 'varchar': str, 'ascii': str,
+                'uuid': lambda v: str(v if isinstance(v, uuid.UUID) else uuid.UUID(str(v)))}
+
+
+class BloomFilter(object):
+    """
+    Probabilistic set of keys: a key never added is reported as absent with probability 1 - error_rate,
+    a key added is always reported as present.
+    """
+
+    def __init__(self, key_types, capacity, error_rate=0.01):
+        """
+        Args:
+            key_types: list with the Cassandra type of each key column
+            capacity: number of keys the filter is sized for, the error rate grows beyond it
+            error_rate: probability of reporting as present a key which was never added
+        """
+        unsupported = [key_type for key_type in key_types if key_type not in _normalizers]
+        if unsupported:
+            raise TypeError("Bloom filters do not support keys of type {}".format(unsupported))
+        if capacity <= 0:
+            raise ValueError("The capacity of a Bloom filter must be > 0")
+        if not 0 < error_rate < 1:
+            raise ValueError("The error rate of a Bloom filter must be in (0, 1)")
+        self._normalizers = [_normalizers[key_type] for key_type in key_types]
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.nbits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.nhashes = max(1, int(round(self.nbits / capacity * math.log(2))))
+        self._bits = bytearray((self.nbits + 7) // 8)
+        self.count = 0
+
+    def digest(self, key):
+        """
+        Hashes a key, given as the list of its columns, into the pair of values used to set its bits
+        """
+        key = tuple(normalize(value.item() if isinstance(value, np.generic) else value)
+                    for normalize, value in zip(self._normalizers, key))
+        h = blake2b(repr(key).encode(), digest_size=16).digest()
+        return int.from_bytes(h[:8], 'little'), int.from_bytes(h[8:], 'little') | 1
+
+    def _positions(self, digest):
+        h1, h2 = digest
+        return ((h1 + i * h2) % self.nbits for i in range(self.nhashes))
+
+    def add_digest(self, digest):
+        for pos in self._positions(digest):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def add(self, key):
+        self.add_digest(self.digest(key))
+
+    def __contains__(self, key):
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(self.digest(key)))
@@ -5,15 +5,18 @@ from collections.abc import Mapping #Since python3.10
 from collections import namedtuple
 
 from cassandra import OperationTimedOut
+from cassandra.concurrent import execute_concurrent_with_args
+from cassandra.query import SimpleStatement
 
 import numpy as np
 from . import config, log, Parser
-from .storageiter import NamedItemsIterator, NamedIterator
+from .storageiter import NamedItemsIterator, NamedIterator, BatchIterator
+from .bloomfilter import BloomFilter
 from .hnumpy import StorageNumpy
 from hecuba.hfetch import Hcache
 
 from .IStorage import IStorage
-from .tools import get_istorage_attrs, build_remotely, basic_types, _min_token, _max_token, storage_id_from_name
+from .tools import get_istorage_attrs, build_remotely, basic_types, storage_id_from_name, estimate_partitions
 
 
 class EmbeddedSet(set):
@@ -254,6 +257,8 @@ class StorageDict(IStorage, dict):
             kwargs: other parameters
         """
 
+        self._bloom_filter = None
+        self._bloom_rejections = 0
         super(StorageDict, self).__init__(name=name, storage_id=storage_id, **kwargs)
         log.debug("CREATE StorageDict(%s,%s)", primary_keys, columns)
 
@@ -411,7 +416,8 @@ class StorageDict(IStorage, dict):
             return dict.__contains__(self, key)
         else:
             try:
-                # TODO we should save this value in a cache
+                if self._known_absent(key):
+                    return False
                 self._hcache.get_row(self._make_key(key))
                 return True
             except Exception as ex:
@@ -496,8 +502,25 @@ class StorageDict(IStorage, dict):
                                self.storage_id,
                                self._tokens, key_names, persistent_values,
                                {'cache_size': config.max_cache_size,
+                                'cache_bytes': config.max_cache_bytes,
+                                'cache_policy': config.cache_policy,
+                                'negative_cache_size': config.negative_cache_size,
+                                'negative_cache_ttl': config.negative_cache_ttl,
                                 'writer_par': config.write_callbacks_number,
+                                'writer_par_min': config.write_callbacks_min,
+                                'writer_par_max': config.write_callbacks_max,
+                                'writer_latency_target': config.write_latency_target,
                                 'writer_buffer': config.write_buffer_size,
+                                'writer_retries': config.write_retries,
+                                'writer_retry_delay': config.write_retry_delay,
+                                'writer_retry_max_delay': config.write_retry_max_delay,
+                                'writer_max_retrying': config.write_max_retrying,
+                                'writer_spill_dir': config.write_spill_dir,
+                                'writer_batch_rows': config.write_batch_rows,
+                                'writer_batch_bytes': config.write_batch_bytes,
+                                'writer_batch_linger': config.write_batch_linger,
+                                'writer_coalesce': config.write_coalesce,
+                                'reader_par': config.read_callbacks_number,
                                 'timestamped_writes': config.timestamped_writes})
         log.debug("HCACHE params %s", self._hcache_params)
         self._hcache = Hcache(*self._hcache_params)
@@ -546,10 +569,19 @@ class StorageDict(IStorage, dict):
         else:
             return list(value)
 
-    def _count_elements(self, query):
+    def _count_elements(self, tokens):
+        """
+        Counts the rows within some token ranges, with one query per range and up to
+        READ_CALLBACKS_NUMBER of them on the fly.
+        Args:
+            tokens: list of (start, end) token ranges
+        """
+        pkey = self._primary_keys[0]["name"]
+        query = f"SELECT COUNT(*) FROM {self._ksp}.{self._table} WHERE token({pkey})>=? AND token({pkey})<?"
         try:
-            result = config.session.execute(query)
-            return result[0][0]
+            results = execute_concurrent_with_args(config.session, config.session.prepare(query), tokens,
+                                                   concurrency=config.read_callbacks_number)
+            return sum(result.one()[0] for _, result in results)
         except OperationTimedOut as ex:
             import warnings
             warnings.warn("len() operation on {} from class {} failed by timeout."
@@ -611,6 +643,7 @@ class StorageDict(IStorage, dict):
         super().stop_persistent()
         log.debug('STOP PERSISTENCE: %s', self._table)
         self._hcache = None
+        self._bloom_filter = None
         self.storage_id = None
 
     def delete_persistent(self):
@@ -620,6 +653,7 @@ class StorageDict(IStorage, dict):
         self.sync()
         super().delete_persistent()
         log.debug('DELETE PERSISTENT: %s', self._table)
+        self._bloom_filter = None
         query = "DROP TABLE %s.%s;" % (self._ksp, self._table)
         config.session.execute(query)
 
@@ -718,27 +752,66 @@ class StorageDict(IStorage, dict):
                 except:
                     pass
 
+            if self._known_absent(key):
+                raise KeyError("No values found for key: {}".format(key))
             persistent_result = self._hcache.get_row(self._make_key(key))
 
             log.debug("GET ITEM %s[%s]", persistent_result, persistent_result.__class__)
 
-            # we need to transform UUIDs belonging to IStorage objects and rebuild them
-            # TODO hcache should return objects of the class uuid, not str
-            final_results = []
-            for index, col in enumerate(self._columns):
-                col_type = col["type"]
-                element = persistent_result[index]
-                if col_type not in basic_types:
-                    # element is not a built-in type
-                    info = {"storage_id": element, "tokens": self._build_args.tokens, "class_name": col_type}
-                    element = build_remotely(info)
-
-                final_results.append(element)
-
-            if self._column_builder is not None:
-                return self._column_builder(*final_results)
-            else:
-                return final_results[0]
+            return self._build_value(persistent_result)
+
+    def _build_value(self, persistent_result):
+        """
+        Builds the value to return to the user from the list of columns returned by the hcache.
+        Args:
+            persistent_result: list with the value of each column
+        """
+        # we need to transform UUIDs belonging to IStorage objects and rebuild them
+        # TODO hcache should return objects of the class uuid, not str
+        final_results = []
+        for index, col in enumerate(self._columns):
+            col_type = col["type"]
+            element = persistent_result[index]
+            if col_type not in basic_types:
+                # element is not a built-in type
+                info = {"storage_id": element, "tokens": self._build_args.tokens, "class_name": col_type}
+                element = build_remotely(info)
+
+            final_results.append(element)
+
+        if self._column_builder is not None:
+            return self._column_builder(*final_results)
+        else:
+            return final_results[0]
+
+    def get_many(self, keys, default=None):
+        """
+        Retrieves the values of several keys at once. The keys not present in the cache are
+        requested concurrently to the storage (up to READ_CALLBACKS_NUMBER queries on the fly).
+        Args:
+            keys: iterable with the keys to retrieve
+            default: value returned for the keys that do not exist
+        Returns:
+            list with the value of each key, in the same order as keys
+        """
+        keys = list(keys)
+        if not self.storage_id or self._has_embedded_set:
+            return [self.get(key, default) for key in keys]
+
+        results = [default] * len(keys)
+        pending = []
+        for index, key in enumerate(keys):
+            if config.max_cache_size == 0 and dict.__contains__(self, key):  # C++ cache disabled, use Python memory
+                results[index] = dict.__getitem__(self, key)
+            elif not self._known_absent(key):
+                pending.append(index)
+
+        if pending:
+            rows = self._hcache.get_rows([self._make_key(keys[index]) for index in pending])
+            for index, persistent_result in zip(pending, rows):
+                if persistent_result is not None:
+                    results[index] = self._build_value(persistent_result)
+        return results
 
     def __make_val_persistent(self, val, col=0):
         if isinstance(val, list):
@@ -848,6 +921,8 @@ class StorageDict(IStorage, dict):
             if self._is_stream() :
                 self.__send_values_kafka(k,val) # stream values
             self._hcache.put_row(k,v) # ONLY store values in Cassandra
+            if self._bloom_filter is not None:
+                self._bloom_filter.add(k)
 
     def poll(self):
         log.debug("StorageDict: POLL ")
@@ -898,24 +973,19 @@ class StorageDict(IStorage, dict):
             return super().__len__()
 
         self.sync()
-        if self._tokens[0][0] == _min_token and self._tokens[-1][1] == _max_token:
-            query = f"SELECT COUNT(*) FROM {self._ksp}.{self._table}"
-            return self._count_elements(query)
-
-        else:
-            keys = []
-            for pkey in self._primary_keys:
-                template = "'{}'" if pkey["type"] == "text" else "{}"
-                keys.append(template.format(pkey["name"]))
-            all_keys = ",".join(keys)
+        return self._count_elements(self._tokens)
 
-            total = 0
-            for (token_start, token_end) in self._tokens:
-                query = f"SELECT COUNT(*) FROM {self._ksp}.{self._table} " \
-                    f"WHERE token({all_keys})>={token_start} AND token({all_keys})<{token_end}"
-
-                total = total + self._count_elements(query)
-            return total
+    def approx_len(self):
+        """
+        Estimates the number of elements from the statistics kept by Cassandra, without scanning the data.
+        The statistics are refreshed every few minutes and count partitions: on dicts with several keys,
+        the elements sharing the first key are counted once.
+        Returns:
+            int: the estimated number of elements, 0 if Cassandra has no estimates for the table yet
+        """
+        if not self.storage_id:
+            return super().__len__()
+        return estimate_partitions(self._ksp, self._table, self._tokens)
 
     def __repr__(self):
         """
@@ -943,28 +1013,106 @@ class StorageDict(IStorage, dict):
             in the current dict.
         """
         if other is not None:
-            if isinstance(other, StorageDict):
-                for k, v in other.items():
-                    self[k] = v
+            self.put_many(other.items() if isinstance(other, StorageDict) else other)
+        if kwargs:
+            self.put_many(kwargs)
+
+    def put_many(self, items=None, columns=None):
+        """
+        Inserts several key,val pairs at once. When all the values are basic types the rows
+        are built and queued for writing in a single call to the hcache.
+        Args:
+            items: python dictionary or iterable of (key, val) pairs
+            columns: dictionary with a sequence (list, numpy array or arrow array) for each key
+            and value field of the dict, all of them with the same length
+        """
+        key_names = [key["name"] for key in self._primary_keys]
+        value_names = [col["name"] for col in self._columns]
+        fast_path = self.storage_id is not None and not self._has_embedded_set and not self._is_stream() \
+            and config.max_cache_size != 0 and all(col["type"] in basic_types for col in self._columns)
+
+        if columns is not None:
+            missing = [name for name in key_names + value_names if name not in columns]
+            if missing:
+                raise KeyError("Missing columns {}".format(missing))
+            key_cols = [StorageDict._column_to_list(columns[name]) for name in key_names]
+            value_cols = [StorageDict._column_to_list(columns[name]) for name in value_names]
+            if fast_path:
+                keys = [list(k) for k in zip(*key_cols)]
+                self._hcache.put_rows(keys, [list(v) for v in zip(*value_cols)])
+                self._bloom_add_all(keys)
             else:
-                for k, v in other.items() if isinstance(other, Mapping) else other:
+                for k, v in zip(zip(*key_cols), zip(*value_cols)):
+                    self[k if len(k) > 1 else k[0]] = list(v) if len(v) > 1 else v[0]
+
+        if items is not None:
+            if isinstance(items, Mapping):
+                items = items.items()
+            if fast_path:
+                keys = []
+                values = []
+                for k, v in items:
+                    keys.append(self._make_key(k))
+                    values.append(self._make_value(v))
+                self._hcache.put_rows(keys, values)
+                self._bloom_add_all(keys)
+            else:
+                for k, v in items:
                     self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
 
-    def keys(self):
+    @staticmethod
+    def _column_to_list(column):
+        if hasattr(column, "to_pylist"):  # arrow array
+            return column.to_pylist()
+        if isinstance(column, np.ndarray):
+            return column.tolist()
+        return list(column)
+
+    def _check_batch_iteration(self, batch_size, as_arrays):
+        """
+        Validates the arguments of a batch iteration and returns the size of the batches
+        Args:
+            batch_size: number of rows per batch, None to use the prefetch size
+            as_arrays: False, True or 'arrow'
+        Returns:
+            The number of rows per batch, None if the iteration is not done by batches
+        """
+        if batch_size is None and not as_arrays:
+            return None
+        if not self.storage_id:
+            raise ValueError("Batch iteration is only available on persistent StorageDicts")
+        if self._has_embedded_set:
+            raise ValueError("Batch iteration is not supported on StorageDicts with embedded sets")
+        if as_arrays not in (False, True, 'arrow'):
+            raise ValueError("as_arrays must be True, False or 'arrow'")
+        if batch_size is None:
+            batch_size = config.prefetch_size
+        if batch_size <= 0:
+            raise ValueError("The batch size must be a positive number")
+        return batch_size
+
+    def keys(self, batch_size=None, as_arrays=False):
         """
         Obtains the iterator for the keys of the StorageDict
+        Args:
+            batch_size: if set, the keys are returned in lists of up to batch_size keys
+            as_arrays: if True, each batch is a dict with a numpy array per key name,
+                       if 'arrow', each batch is a pyarrow RecordBatch
         Returns:
             if persistent:
                 iterkeys(self): list of keys
             if not persistent:
                 dict.keys(self)
         """
+        batch_size = self._check_batch_iteration(batch_size, as_arrays)
         if self.storage_id:
             self.sync()
-            ik = self._hcache.iterkeys(config.prefetch_size)
+            ik = self._hcache.iterkeys({'prefetch_size': config.prefetch_size,
+                                        'prefetch_parallelism': config.prefetch_parallelism,
+                                        'prefetch_page_size': config.prefetch_page_size})
             iterator = NamedIterator(ik, self._key_builder, self)
+            if batch_size is not None:
+                return BatchIterator(iterator, batch_size, [key["name"] for key in self._primary_keys], as_arrays)
             if self._has_embedded_set:
                 iterator = iter(set(iterator))
 
@@ -972,23 +1120,33 @@ class StorageDict(IStorage, dict):
         else:
             return dict.keys(self)
 
-    def items(self):
+    def items(self, batch_size=None, as_arrays=False):
         """
         Obtains the iterator for the key,val pairs of the StorageDict
+        Args:
+            batch_size: if set, the pairs are returned in lists of up to batch_size pairs
+            as_arrays: if True, each batch is a dict with a numpy array per key and column name,
+                       if 'arrow', each batch is a pyarrow RecordBatch
         Returns:
             if persistent:
                 NamedItemsIterator(self): list of key,val pairs
             if not persistent:
                 dict.items(self)
         """
+        batch_size = self._check_batch_iteration(batch_size, as_arrays)
         if self.storage_id:
             self.sync()
-            ik = self._hcache.iteritems(config.prefetch_size)
+            ik = self._hcache.iteritems({'prefetch_size': config.prefetch_size,
+                                         'prefetch_parallelism': config.prefetch_parallelism,
+                                         'prefetch_page_size': config.prefetch_page_size})
             iterator = NamedItemsIterator(self._key_builder,
                                           self._column_builder,
                                           self._k_size,
                                           ik,
                                           self)
+            if batch_size is not None:
+                names = [key["name"] for key in self._primary_keys] + [col["name"] for col in self._columns]
+                return BatchIterator(iterator, batch_size, names, as_arrays)
             if self._has_embedded_set:
                 d = defaultdict(set)
                 # iteritems has the set values in different rows, this puts all the set values in the same row
@@ -1005,26 +1163,110 @@ class StorageDict(IStorage, dict):
         else:
             return dict.items(self)
 
-    def values(self):
+    def values(self, batch_size=None, as_arrays=False):
         """
         Obtains the iterator for the values of the StorageDict
+        Args:
+            batch_size: if set, the values are returned in lists of up to batch_size values
+            as_arrays: if True, each batch is a dict with a numpy array per column name,
+                       if 'arrow', each batch is a pyarrow RecordBatch
         Returns:
             if persistent:
                 NamedIterator(self): list of valuesStorageDict
             if not persistent:
                 dict.values(self)
         """
+        batch_size = self._check_batch_iteration(batch_size, as_arrays)
         if self.storage_id:
             self.sync()
             if self._has_embedded_set:
                 items = self.items()
                 return dict(items).values()
             else:
-                ik = self._hcache.itervalues(config.prefetch_size)
-                return NamedIterator(ik, self._column_builder, self)
+                ik = self._hcache.itervalues({'prefetch_size': config.prefetch_size,
+                                              'prefetch_parallelism': config.prefetch_parallelism,
+                                              'prefetch_page_size': config.prefetch_page_size})
+                iterator = NamedIterator(ik, self._column_builder, self)
+                if batch_size is not None:
+                    return BatchIterator(iterator, batch_size, [col["name"] for col in self._columns], as_arrays)
+                return iterator
         else:
             return dict.values(self)
 
+    def stats(self):
+        """
+        Statistics of the accesses to the storage done through this StorageDict
+        Returns:
+            dict: see hecuba.stats, plus the number of entries and bytes held by the cache
+        """
+        if not self.storage_id:
+            raise RuntimeError("Statistics are only available on persistent StorageDicts")
+        stats = self._hcache.stats()
+        if self._bloom_filter is not None:
+            stats['bloom_filter_keys'] = self._bloom_filter.count
+            stats['bloom_filter_rejections'] = self._bloom_rejections
+        return stats
+
+    def replay_spilled_writes(self):
+        """
+        Writes again the rows of this table which were given up after all their retries and saved
+        in WRITE_SPILL_DIR, including the ones spilled by other processes. The rows spilled by StorageDicts
+        still open elsewhere are skipped until they are closed. Each row keeps its original
+        write time, so it does not overwrite a newer value of its key.
+        Returns:
+            int: number of rows replayed
+        """
+        if not self.storage_id:
+            raise RuntimeError("Only persistent StorageDicts can replay spilled writes")
+        return self._hcache.replay_spilled()
+
+    def enable_bloom_filter(self, error_rate=0.01, capacity=None):
+        """
+        Builds a client side Bloom filter with all the keys of the table, afterwards the lookups of
+        keys missing from the filter (__contains__, __getitem__, get and get_many) are answered
+        without querying the storage. The keys written through this StorageDict are added to the filter,
+        but the ones written by other objects or processes are not: only enable it when this object is
+        the only writer while it is in use, or rebuild it calling this method again.
+        Args:
+            error_rate: probability of querying the storage for a key which does not exist
+            capacity: number of keys the filter is sized for, by default twice the keys in the table
+        """
+        if not self.storage_id:
+            raise ValueError("Bloom filters are only available on persistent StorageDicts")
+        if self._has_embedded_set:
+            raise ValueError("Bloom filters are not available on StorageDicts with embedded sets")
+
+        self.sync()
+        key_types = [pkey["type"] for pkey in self._primary_keys]
+        bloom = BloomFilter(key_types, 1, error_rate)  # Only used to hash the keys until their number is known
+        key_names = ",".join(pkey["name"] for pkey in self._primary_keys)
+        query = SimpleStatement("SELECT {} FROM {}.{}".format(key_names, self._ksp, self._table),
+                                fetch_size=config.prefetch_size)
+        digests = [bloom.digest(row) for row in config.session.execute(query)]
+
+        bloom = BloomFilter(key_types, max(capacity or 2 * len(digests), len(digests), 1), error_rate)
+        for digest in digests:
+            bloom.add_digest(digest)
+        self._bloom_filter = bloom
+        self._bloom_rejections = 0
+
+    def disable_bloom_filter(self):
+        self._bloom_filter = None
+
+    def _known_absent(self, key):
+        """
+        True if the Bloom filter is enabled and the key is not in it
+        """
+        if self._bloom_filter is None or self._make_key(key) in self._bloom_filter:
+            return False
+        self._bloom_rejections += 1
+        return True
+
+    def _bloom_add_all(self, keys):
+        if self._bloom_filter is not None:
+            for k in keys:
+                self._bloom_filter.add(k)
+
     def get(self, key, default=None):
         try:
             value = self.__getitem__(key)
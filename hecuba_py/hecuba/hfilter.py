@@ -247,7 +247,9 @@ class Predicate:
         '''
         conditions = self.predicate + " ALLOW FILTERING"
 
-        hiter = self.father._hcache.iteritems({'custom_select': conditions, 'prefetch_size': config.prefetch_size})
+        hiter = self.father._hcache.iteritems({'custom_select': conditions, 'prefetch_size': config.prefetch_size,
+                                               'prefetch_parallelism': config.prefetch_parallelism,
+                                               'prefetch_page_size': config.prefetch_page_size})
         iterator = NamedItemsIterator(self.father._key_builder,
                                       self.father._column_builder,
                                       self.father._k_size,
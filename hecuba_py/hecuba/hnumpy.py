@@ -1,4 +1,5 @@
 import itertools
+import os
 import uuid
 import pickle
 from collections import namedtuple
@@ -11,6 +12,10 @@ from hecuba.hfetch import HNumpyStore, HArrayMetadata
 
 from . import config, log
 from .IStorage import IStorage
+from .blockcache import BlockCache
+from .localcopy import LocalCopy
+from .readahead import ReadAhead
+from .writeback import WriteBack
 from .tools import extract_ks_tab, get_istorage_attrs, storage_id_from_name, build_remotely
 
 
@@ -18,6 +23,10 @@ class StorageNumpy(IStorage, np.ndarray):
     USE_FORTRAN_ACCESS=False
     BLOCK_MODE = 1
     COLUMN_MODE = 2
+    # Compression of the blocks, kept in the high bits of the partition_type of the metas (SpaceFillingCurve.h)
+    PARTITION_ALGORITHM_MASK = 0x0F
+    COMPRESSION_CODECS = {'none': 0x00, 'lz4': 0x10, 'zstd': 0x20}
+    COMPRESSION_SHUFFLE = 0x40
     _build_args = None
 
     _prepared_store_meta = config.session.prepare('INSERT INTO hecuba.istorage'
@@ -96,7 +105,7 @@ class StorageNumpy(IStorage, np.ndarray):
                 If False, divide by rows of blocks.
         """
         # TODO this should work for VOLATILE objects too! Now only works for PERSISTENT
-        if self._build_args.metas.partition_type == 2:
+        if self._build_args.metas.partition_type & StorageNumpy.PARTITION_ALGORITHM_MASK == 2:
             raise NotImplementedError("Split on columnar data is not supported")
 
 
@@ -287,8 +296,19 @@ class StorageNumpy(IStorage, np.ndarray):
         tokens = istorage_metas[0].tokens
 
         # Reserve array: even if we are a view we reserve space for the WHOLE numpy, as the memory
-
-        result = cls.reserve_numpy_array(storage_id, name, metas_to_reserve) # storage_id is NOT used at all
+        # With a local copy, the memory is a file shared by the processes of the node
+        # Out of core, the memory is only used by the blocks loaded and kept by the block cache
+        local_path = StorageNumpy._local_copy_path(name, base_numpy, metas_to_reserve)
+        on_demand = not local_path and StorageNumpy._out_of_core_enabled(metas_to_reserve)
+
+        local_copy = None
+        if local_path:
+            hcache = StorageNumpy._create_hcache(name)
+            local_copy = LocalCopy(local_path, metas_to_reserve,
+                                   hcache.get_elements_per_row(storage_id, metas_to_reserve))
+            result = [local_copy.array, hcache]
+        else:
+            result = cls.reserve_numpy_array(storage_id, name, metas_to_reserve, on_demand) # storage_id is NOT used at all
 
         input_array = result[0]
 
@@ -329,18 +349,43 @@ class StorageNumpy(IStorage, np.ndarray):
                 istorage_metas[0].tokens)
         obj._row_elem = obj._hcache.get_elements_per_row(storage_id, metas_to_reserve)
         obj._calculate_nblocks(myview)
+        obj._write_back = obj._create_write_back() if on_demand or config.numpy_write_back else None
+        obj._block_cache = obj._create_block_cache() if on_demand else None
+        obj._local_copy = local_copy
         return obj
 
     @staticmethod
     def _arrow_enabled(input_array):
         return (config.arrow_enabled and getattr(input_array, 'ndim', 0) == 2)
 
+    @staticmethod
+    def _out_of_core_enabled(metas):
+        """
+            Returns True if the persistent numpy described by 'metas' is kept out of core: only the blocks
+            kept by a bounded block cache are in memory. The columnar (arrow) access is not supported.
+        """
+        return config.numpy_cache_bytes > 0 and not (config.arrow_enabled and len(metas.dims) == 2)
+
+    @staticmethod
+    def _local_copy_path(name, base_numpy, metas):
+        """
+            Returns the path of the file with the copy on node-local storage (HECUBA_NUMPY_PATH) of the
+            persistent numpy 'base_numpy', or None if the copy is disabled. The columnar (arrow) access is
+            not supported.
+        """
+        if not config.numpy_local_path or (config.arrow_enabled and len(metas.dims) == 2):
+            return None
+        (ksp, _) = extract_ks_tab(name)
+        return os.path.join(config.numpy_local_path, "numpy", ksp, str(base_numpy))
+
     def __new__(cls, input_array=None, name=None, storage_id=None, block_id=None, **kwargs):
         log.debug("input_array=%s name=%s storage_id=%s ENTER ",input_array is not None, name, storage_id)
 
         if input_array is not None and not isinstance(input_array, np.ndarray):
             raise AttributeError("The 'input_array' must be a numpy.ndarray instance.")
 
+        compression = StorageNumpy._compression_bits(kwargs.pop('compression', None), kwargs.pop('shuffle', None))
+
         if name is not None:
             # Construct full qualified name to deal with cases where the name does NOT contain keyspace
             (ksp, table) = extract_ks_tab(name)
@@ -375,6 +420,7 @@ class StorageNumpy(IStorage, np.ndarray):
                     obj = np.asfortranarray(input_array.copy()).view(cls) #to set the fortran contiguous flag it is necessary to do the copy before
                     log.debug("Created ARROW")
             super(StorageNumpy, obj).__init__(name=name, storage_id=storage_id, kwargs=kwargs)
+            obj._compression = compression
 
             if name or storage_id: # The object needs to be persisted
                 load_data= (input_array is None) and (config.load_on_demand == False)
@@ -393,6 +439,28 @@ class StorageNumpy(IStorage, np.ndarray):
     def __init__(self, input_array=None, name=None, storage_id=None, **kwargs):
         pass # DO NOT REMOVE THIS FUNCTION!!! Yolanda's eyes bleed!
 
+    @staticmethod
+    def _compression_bits(compression=None, shuffle=None):
+        """
+        Args:
+            compression: codec of the blocks ('none', 'lz4' or 'zstd'), None to use NUMPY_COMPRESSION
+            shuffle: True to shuffle the bytes of the blocks before compressing them, None to use NUMPY_SHUFFLE
+        Returns:
+            bits of the partition_type selecting the compression of the blocks
+        """
+        if compression is None:
+            compression = config.numpy_compression
+        if shuffle is None:
+            shuffle = config.numpy_shuffle
+        try:
+            bits = StorageNumpy.COMPRESSION_CODECS[compression]
+        except KeyError:
+            raise ValueError("Unknown compression {}, expected one of {}".format(
+                compression, list(StorageNumpy.COMPRESSION_CODECS)))
+        if shuffle and bits:
+            bits |= StorageNumpy.COMPRESSION_SHUFFLE
+        return bits
+
     @staticmethod
     def removenones(n, maxstop=None):
         """
@@ -608,6 +676,11 @@ class StorageNumpy(IStorage, np.ndarray):
             self._persistance_needed = getattr(obj, '_persistance_needed', False)
             self._persistent_columnar = getattr(obj, '_persistent_columnar', False)
             self._numpy_full_loaded = getattr(obj, '_numpy_full_loaded', False)
+            self._read_ahead = getattr(obj, '_read_ahead', None)
+            self._block_cache = getattr(obj, '_block_cache', None)
+            self._local_copy = getattr(obj, '_local_copy', None)
+            self._write_back = getattr(obj, '_write_back', None)
+            self._compression = getattr(obj, '_compression', None)
 
             if isinstance(obj, StorageNumpy): # Instantiate or getitem
                 log.debug("  array_finalize obj == StorageNumpy")
@@ -624,6 +697,8 @@ class StorageNumpy(IStorage, np.ndarray):
 
                     obj._last_sliced_coord = None
                     self._numpy_full_loaded = True # By default assume we come from a getitem, otherwise mark it as appropiate (split)
+                    if self._block_cache is not None:
+                        self._numpy_full_loaded = False # Out of core, the blocks of the view may be evicted
 
             else:
                 # StorageNumpy from a numpy
@@ -642,6 +717,10 @@ class StorageNumpy(IStorage, np.ndarray):
             self._block_id           = getattr(obj, '_block_id', None)
             self._persistance_needed = False
             self._persistent_columnar= False
+            self._read_ahead         = None
+            self._block_cache        = None
+            self._local_copy         = None
+            self._write_back         = None
 
 
     def _get_base_array(self):
@@ -708,8 +787,18 @@ class StorageNumpy(IStorage, np.ndarray):
         log.debug("Create cache for %s %s", ksp, table)
         hcache_params = (ksp, table,
                          {'cache_size': config.max_cache_size,
+                          'cache_bytes': config.max_cache_bytes,
+                          'cache_policy': config.cache_policy,
                           'writer_par': config.write_callbacks_number,
+                          'writer_par_min': config.write_callbacks_min,
+                          'writer_par_max': config.write_callbacks_max,
+                          'writer_latency_target': config.write_latency_target,
                           'writer_buffer': config.write_buffer_size,
+                          'writer_retries': config.write_retries,
+                          'writer_retry_delay': config.write_retry_delay,
+                          'writer_retry_max_delay': config.write_retry_max_delay,
+                          'writer_max_retrying': config.write_max_retrying,
+                          'reader_par': config.read_callbacks_number,
                           'hecuba_sn_single_table':config.hecuba_sn_single_table,
                           'timestamped_writes': False})
 
@@ -738,11 +827,12 @@ class StorageNumpy(IStorage, np.ndarray):
             raise ex
 
     @staticmethod
-    def reserve_numpy_array(storage_id, name, metas):
-        '''Provides a numpy array with the number of elements obtained through storage_id'''
+    def reserve_numpy_array(storage_id, name, metas, on_demand=False):
+        '''Provides a numpy array with the number of elements obtained through storage_id
+           If on_demand, the memory is only used when the blocks are loaded and can be released'''
         log.debug(" Reserve memory for {} {} {}".format(name, storage_id, metas))
         hcache = StorageNumpy._create_hcache(name)
-        result = hcache.allocate_numpy(storage_id, metas)
+        result = hcache.allocate_numpy(storage_id, metas, on_demand)
         if len(result) == 1:
             if StorageNumpy._arrow_enabled(result[0]):
                 hcache_arrow = StorageNumpy._create_hcache(StorageNumpy.get_arrow_name(name))
@@ -766,6 +856,63 @@ class StorageNumpy(IStorage, np.ndarray):
         return new_coords
 
 
+    def _create_write_back(self):
+        """
+            Returns the bitmap of the modified blocks of the base array, shared with its views
+        """
+        base_numpy = self._get_base_array()
+        hcache = self._hcache
+        base_id = self._build_args.base_numpy
+        metas = self._base_metas
+
+        def store(coords):
+            hcache.store_numpy_slices([base_id], metas, [base_numpy], coords, StorageNumpy.BLOCK_MODE)
+
+        grid = [-(-dim // self._row_elem) for dim in base_numpy.shape]
+        return WriteBack(grid, store, config.numpy_flush_interval)
+
+    def _create_block_cache(self):
+        """
+            Returns the block cache keeping in memory the blocks of the base array, shared with its views
+        """
+        base_numpy = self._get_base_array()
+        hcache = self._hcache
+
+        def release(offset, length):
+            hcache.release_numpy_memory(base_numpy, offset, length)
+
+        return BlockCache(base_numpy.shape, base_numpy.strides, np.isfortran(base_numpy), self._row_elem,
+                          config.numpy_cache_bytes, self._write_back, release)
+
+    def _mark_dirty(self, coords):
+        """
+            Records blocks of the base array modified in memory, they are stored when flushed
+        """
+        block_cache = getattr(self, '_block_cache', None)
+        if block_cache is not None: # Out of core, only the blocks still in memory keep their modifications
+            coords = [coord for coord in coords if coord in block_cache]
+        self._write_back.mark_dirty(coords)
+
+    def _get_read_ahead(self):
+        """
+            Returns the read ahead of the blocks of the base array, shared with the views created
+            afterwards, or None if it is disabled
+        """
+        read_ahead = getattr(self, '_read_ahead', None)
+        if read_ahead is None and config.read_ahead_blocks > 0 and self._row_elem:
+            base_numpy = self._get_base_array()
+            grid = [-(-dim // self._row_elem) for dim in base_numpy.shape]
+            block_bytes = self._row_elem ** base_numpy.ndim * base_numpy.itemsize
+            memory = config.read_ahead_memory
+            block_cache = getattr(self, '_block_cache', None)
+            if block_cache is not None: # Leave room in the block cache for the blocks requested
+                memory = min(memory, block_cache.capacity // 2)
+            write_back = getattr(self, '_write_back', None)
+            read_ahead = ReadAhead(grid, block_bytes, config.read_ahead_blocks, memory,
+                                   write_back.lock if write_back is not None else None)
+            self._read_ahead = read_ahead
+        return read_ahead
+
     def _load_blocks(self, new_coords):
         """
             Load the provided block coordinates from cassandra into memory
@@ -773,30 +920,54 @@ class StorageNumpy(IStorage, np.ndarray):
                 self: The StorageNumpy to load data into
                 new_coords: The coordinates to load (using ZOrder identification)
         """
-        load = True # By default, load everything
-        if new_coords is None: # Special case: Load everything
+        base_numpy = self._get_base_array()
+        metas = self._base_metas
+        # Out of core or with a local copy, the block cache or the local copy know the blocks in memory
+        resident = getattr(self, '_block_cache', None)
+        if resident is None:
+            resident = getattr(self, '_local_copy', None)
+
+        def load(coords):
+            self._hcache.load_numpy_slices([self._build_args.base_numpy], metas, [base_numpy],
+                                   coords,
+                                   StorageNumpy.BLOCK_MODE)
+            if resident is not None:
+                resident.add(coords)
+
+        read_ahead = self._get_read_ahead()
+        load_coords = new_coords
+        loaded = None
+        if resident is not None:
+            if new_coords is None:
+                new_coords = self.calculate_block_coords(tuple([slice(None, None, None)] * base_numpy.ndim))
+            if read_ahead is not None: # Wait for the blocks being loaded in the background
+                read_ahead.claim(new_coords)
+            load_coords = resident.missing(new_coords)
+            loaded = resident
+        elif new_coords is None: # Special case: Load everything
             log.debug("LOADING ALL BLOCKS OF NUMPY")
             self._numpy_full_loaded = True
-            new_coords = None
             self._loaded_coordinates = None
         else:
             log.debug("LOADING COORDINATES")
 
-            # coordinates is the union between the loaded coordinates and the new ones
-            coordinates = list(set(itertools.chain.from_iterable((self._loaded_coordinates, new_coords))))
-            if (len(coordinates) != len(self._loaded_coordinates)):
-                self._numpy_full_loaded = (len(coordinates) == self._n_blocks)
-                self._loaded_coordinates = coordinates
+            loaded = set(self._loaded_coordinates or [])
+            if read_ahead is not None: # Blocks loaded in the background are already in memory
+                loaded.update(read_ahead.claim(new_coords))
+            # Only the blocks not in memory yet are loaded
+            load_coords = [coord for coord in new_coords if coord not in loaded]
+            loaded.update(new_coords)
+            self._numpy_full_loaded = (len(loaded) == self._n_blocks)
+            self._loaded_coordinates = list(loaded)
+
+        if load_coords is None or load_coords:
+            log.debug("  COORDINATES ARE {} ".format(load_coords))
+            if read_ahead is not None:
+                read_ahead.run(load, load_coords)
             else:
-                load = False
-
-        if load:
-            base_numpy = self._get_base_array()
-            metas = self._base_metas
-            log.debug("  COORDINATES ARE {} ".format(new_coords))
-            self._hcache.load_numpy_slices([self._build_args.base_numpy], metas, [base_numpy],
-                                   new_coords,
-                                   StorageNumpy.BLOCK_MODE)
+                load(load_coords)
+        if read_ahead is not None and new_coords is not None and not self._numpy_full_loaded:
+            read_ahead.access(new_coords, loaded, load)
 
     def is_columnar(self,sliced_coord):
         if not StorageNumpy._arrow_enabled(self._get_base_array()):
@@ -939,15 +1110,34 @@ class StorageNumpy(IStorage, np.ndarray):
             if not self._numpy_full_loaded: # Load the block before writing!
                 self._load_blocks(block_coords)
 
-            #yolandab: execute first the super to modified the base numpy
-            super(StorageNumpy, self).__setitem__(sliced_coord, values)
+            write_back = getattr(self, '_write_back', None)
+            if write_back is not None: # The blocks are stored when flushed (sync, eviction or timer)
+                with write_back.lock: # Not flushed by the timer while being modified
+                    super(StorageNumpy, self).__setitem__(sliced_coord, values)
+                    self._mark_dirty(block_coords)
+            else:
+                #yolandab: execute first the super to modified the base numpy
+                super(StorageNumpy, self).__setitem__(sliced_coord, values)
+            local_copy = getattr(self, '_local_copy', None)
+            if local_copy is not None: # Shared with the other processes of the node at sync, once stored
+                local_copy.modify(block_coords)
+            if write_back is not None:
+                return
 
             base_numpy = self._get_base_array() # self.base is  numpy.ndarray
             metas = self._base_metas
-            self._hcache.store_numpy_slices([self._build_args.base_numpy],
-                    metas, [base_numpy],
-                    block_coords,
-                    StorageNumpy.BLOCK_MODE)
+
+            def store(coords):
+                self._hcache.store_numpy_slices([self._build_args.base_numpy],
+                        metas, [base_numpy],
+                        coords,
+                        StorageNumpy.BLOCK_MODE)
+
+            read_ahead = getattr(self, '_read_ahead', None)
+            if read_ahead is not None:
+                read_ahead.run(store, block_coords)
+            else:
+                store(block_coords)
             return
         super(StorageNumpy, self).__setitem__(sliced_coord, values)
         return
@@ -1004,6 +1194,7 @@ class StorageNumpy(IStorage, np.ndarray):
             StorageNumpy to persist
             name to use
             [formato] to store the data (0-ZOrder, 2-columnar, 3-FortranOrder) # 0 ==Z_ORDER (find it at SpaceFillingCurve.h)
+                      the compression of the blocks is added to it
         """
         log.debug("_persist_data: {} format={} ENTER ".format(name, formato))
 
@@ -1025,6 +1216,10 @@ class StorageNumpy(IStorage, np.ndarray):
             self._hcache = self._create_hcache(name)
 
         log.debug("_persist_data: after create tables and cache ")
+        compression = getattr(self, '_compression', None)
+        if compression is None:
+            compression = StorageNumpy._compression_bits()
+        formato |= compression
         # Persist current object
         hfetch_metas = HArrayMetadata(list(self.shape), list(self.strides),
                                       self.dtype.kind, self.dtype.byteorder,
@@ -1043,6 +1238,9 @@ class StorageNumpy(IStorage, np.ndarray):
             self._hcache.store_numpy_slices([sid], self._build_args.metas, [self._get_base_array()], # CHECK metas del padre i memoria tienen que coincidir
                                             None,
                                             StorageNumpy.BLOCK_MODE)
+            local_path = StorageNumpy._local_copy_path(name, sid, hfetch_metas)
+            if local_path: # A copy left by a former numpy with the same storage_id is stale
+                LocalCopy.remove(local_path)
             log.debug("_persist_data: before store slices COLUMN")
             if StorageNumpy._arrow_enabled(self._get_base_array()):
                 self._hcache_arrow.store_numpy_slices([sid], self._build_args.metas, [self._get_base_array()], # CHECK metas del padre i memoria tienen que coincidir
@@ -1054,6 +1252,7 @@ class StorageNumpy(IStorage, np.ndarray):
         StorageNumpy._store_meta(self._build_args)
         log.debug("_persist_data: before get_elements_per_row")
         self._row_elem = self._hcache.get_elements_per_row(self.storage_id, self._build_args.metas)
+        self._write_back = self._create_write_back() if config.numpy_write_back else None
         log.debug("_persist_data: {} format={}".format(name, formato))
 
 
@@ -1073,7 +1272,13 @@ class StorageNumpy(IStorage, np.ndarray):
         """
             Deletes the Cassandra table where the persistent StorageObj stores data
         """
-        self.sync() # TODO: we should discard pending writes
+        write_back = getattr(self, '_write_back', None)
+        if write_back is not None: # The pending writes of the deleted data are discarded
+            write_back.discard()
+        self.sync()
+        local_path = StorageNumpy._local_copy_path(self._get_name(), self.storage_id, self._base_metas)
+        if local_path and self.storage_id == self._build_args.base_numpy:
+            LocalCopy.remove(local_path)
         super().delete_persistent()
 
         query = "DROP TABLE %s;" %(self._get_name())
@@ -1088,7 +1293,24 @@ class StorageNumpy(IStorage, np.ndarray):
         Wait until all pending stores to Cassandra have been finished.
         """
         log.debug("SYNC: %s", self.storage_id)
+        write_back = getattr(self, '_write_back', None)
+        if write_back is not None:
+            write_back.flush()
         self._hcache.wait()
+        local_copy = getattr(self, '_local_copy', None)
+        if local_copy is not None:
+            local_copy.publish()
+
+    def stats(self):
+        """
+        Statistics of the accesses to the storage done through the cache of this StorageNumpy.
+        The cache may be shared among all the StorageNumpys (HECUBA_SN_SINGLE_TABLE)
+        Returns:
+            dict: see hecuba.stats, plus the number of entries and bytes held by the cache
+        """
+        if not self.storage_id:
+            raise RuntimeError("Statistics are only available on persistent StorageNumpys")
+        return self._hcache.stats()
 
     def __iter__(self):
         if self._numpy_full_loaded:
@@ -1140,22 +1362,36 @@ class StorageNumpy(IStorage, np.ndarray):
             #    self._hcache.load_numpy_slices([self._build_args.base_numpy], metas, [base_numpy],
             #                               None,
             #                               load_method)
-        results = super(StorageNumpy, self).__array_ufunc__(ufunc, method,
-                                                            *args, **kwargs)
+        readonly_methods = ['mean', 'sum', 'reduce'] #methods that DO NOT modify the original memory, and there is NO NEED to store it
+        block_coord = None
+        write_back = None
+        if self._is_persistent and len(self.shape) and method != 'at' and method not in readonly_methods:
+            if self in outputs: # Self must store the value
+                block_coord = self._select_blocks(self._build_args.view_serialization)
+                write_back = getattr(self, '_write_back', None)
+        if write_back is not None:
+            with write_back.lock: # Not flushed by the timer while being modified
+                results = super(StorageNumpy, self).__array_ufunc__(ufunc, method,
+                                                                    *args, **kwargs)
+                if results is not NotImplemented:
+                    self._mark_dirty(block_coord)
+        else:
+            results = super(StorageNumpy, self).__array_ufunc__(ufunc, method,
+                                                                *args, **kwargs)
         if results is NotImplemented:
             return NotImplemented
         log.debug(" UFUNC: type(results)=%s results is self? %s outputs[0] is results? %s outputs[0] is self? %s", type(results), results is self, outputs[0] is results, outputs[0] is self)
         if method == 'at':
             return
 
-        if self._is_persistent and len(self.shape):
-            readonly_methods = ['mean', 'sum', 'reduce'] #methods that DO NOT modify the original memory, and there is NO NEED to store it
-            if method not in readonly_methods:
-                if self in outputs: # Self must store the value
-                    block_coord = self._select_blocks(self._build_args.view_serialization)
-                    self._hcache.store_numpy_slices([self._build_args.base_numpy], self._base_metas, [base_numpy],
-                                                block_coord,
-                                                StorageNumpy.BLOCK_MODE)
+        if block_coord is not None:
+            local_copy = getattr(self, '_local_copy', None)
+            if local_copy is not None: # Shared with the other processes of the node at sync, once stored
+                local_copy.modify(block_coord)
+            if write_back is None:
+                self._hcache.store_numpy_slices([self._build_args.base_numpy], self._base_metas, [base_numpy],
+                                            block_coord,
+                                            StorageNumpy.BLOCK_MODE)
 
         if ufunc.nout == 1:
             results = (results,)
@@ -0,0 +1,132 @@
+import fcntl
+import os
+
+import numpy as np
+
+_F_CONTIGUOUS = 0x0002  # NPY_ARRAY_F_CONTIGUOUS bit of ndarray.flags.num, kept in the flags of the metas
+
+
+def _open_shared_file(path, size):
+    """
+    Creates the file at 'path' with 'size' bytes (a sparse file, filled with zeros) unless it already exists
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)  # Processes of the node opening the same array at once
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+class LocalCopy(object):
+    """
+    Copy of a persistent array in a file on node-local storage (NVMe, tmpfs) shared by the processes of the
+    node. A second file keeps a flag per block set once the block is loaded into the copy, so the blocks
+    loaded by a process are not read again from the database by the next processes opening the array.
+    Each process maps the file privately: the blocks it modifies are copied into the shared file only once
+    they are stored, so the other processes never read modifications missing from the database.
+    """
+
+    def __init__(self, path, metas, row_elem):
+        """
+        Args:
+            path: path of the file with the copy of the array
+            metas: HArrayMetadata of the array
+            row_elem: number of elements of each dimension of a block
+        """
+        shape = tuple(metas.dims)
+        elem_size = metas.elem_size
+        if metas.typekind == 'U':
+            elem_size //= 4  # Unicode sizes are in characters
+        dtype = np.dtype('{}{}{}'.format(metas.byteorder, metas.typekind, elem_size))
+        order = 'F' if metas.flags & _F_CONTIGUOUS else 'C'
+        grid = tuple(-(-dim // row_elem) for dim in shape)
+
+        _open_shared_file(path, max(1, dtype.itemsize * int(np.prod(shape))))
+        _open_shared_file(LocalCopy._flags_path(path), max(1, int(np.prod(grid))))
+        self.path = path
+        self.array = np.memmap(path, dtype=dtype, mode='c', shape=shape, order=order)  # Copy on write
+        self._shared = np.memmap(path, dtype=dtype, mode='r+', shape=shape, order=order)
+        self._loaded = np.memmap(LocalCopy._flags_path(path), dtype=np.uint8, mode='r+', shape=grid)
+        self._row_elem = row_elem
+        self._present = np.zeros(grid, dtype=bool)  # Blocks in the memory of this process
+        self._modified = set()  # Blocks modified by this process and not copied into the shared file yet
+
+    @staticmethod
+    def _flags_path(path):
+        return path + '.blocks'
+
+    @staticmethod
+    def remove(path):
+        """
+        Removes the copy of an array at 'path', if any
+        """
+        for name in (path, LocalCopy._flags_path(path)):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, coord):
+        return bool(self._present[coord])
+
+    def _block(self, coord):
+        return tuple(slice(c * self._row_elem, (c + 1) * self._row_elem) for c in coord)
+
+    def _share(self, coord):
+        self._loaded[coord] = 0  # The processes opening the array meanwhile read the block from the database
+        block = self._block(coord)
+        self._shared[block] = self.array[block]
+        self._loaded[coord] = 1
+
+    def missing(self, coords):
+        """
+        Copies into the memory of this process the requested blocks already loaded into the copy
+        Args:
+            coords: coordinates of the blocks requested
+        Returns:
+            list with the coordinates of the requested blocks not loaded into the copy yet
+        """
+        missing = []
+        for coord in coords:
+            if self._present[coord]:
+                continue
+            if self._loaded[coord]:
+                block = self._block(coord)
+                self.array[block] = self._shared[block]
+                self._present[coord] = True
+            else:
+                missing.append(coord)
+        return missing
+
+    def add(self, coords):
+        """
+        Records blocks loaded from the database and copies them into the shared file
+        Args:
+            coords: coordinates of the blocks loaded
+        """
+        for coord in coords:
+            self._present[coord] = True
+            self._share(coord)
+
+    def modify(self, coords):
+        """
+        Records blocks modified by this process, they are kept out of the shared file until published.
+        Meanwhile, the other processes read them from the database instead of the stale shared file
+        Args:
+            coords: coordinates of the blocks modified
+        """
+        for coord in coords:
+            self._loaded[coord] = 0
+            self._modified.add(tuple(coord))
+
+    def publish(self):
+        """
+        Copies into the shared file the blocks modified by this process, once they are stored, and marks
+        them as loaded again
+        """
+        for coord in self._modified:
+            self._share(coord)
+        self._modified.clear()
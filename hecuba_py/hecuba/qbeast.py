@@ -141,8 +141,22 @@ class QbeastIterator(IStorage):
                                self.storage_id,
                                self._tokens, key_names, persistent_values,
                                {'cache_size': config.max_cache_size,
+                                'cache_bytes': config.max_cache_bytes,
+                                'cache_policy': config.cache_policy,
                                 'writer_par': config.write_callbacks_number,
+                                'writer_par_min': config.write_callbacks_min,
+                                'writer_par_max': config.write_callbacks_max,
+                                'writer_latency_target': config.write_latency_target,
                                 'writer_buffer': config.write_buffer_size,
+                                'writer_retries': config.write_retries,
+                                'writer_retry_delay': config.write_retry_delay,
+                                'writer_retry_max_delay': config.write_retry_max_delay,
+                                'writer_max_retrying': config.write_max_retrying,
+                                'writer_spill_dir': config.write_spill_dir,
+                                'writer_batch_rows': config.write_batch_rows,
+                                'writer_batch_bytes': config.write_batch_bytes,
+                                'writer_batch_linger': config.write_batch_linger,
+                                'writer_coalesce': config.write_coalesce,
                                 'timestamped_writes': config.timestamped_writes})
         log.debug("HCACHE params %s", self._hcache_params)
         self._hcache = Hcache(*self._hcache_params)
@@ -166,8 +180,12 @@ class QbeastIterator(IStorage):
             conditions += " AND expr(%s_idx, 'precision=%s:%s') ALLOW FILTERING" \
                           % (self._table, self._qbeast_meta.precision, self._qbeast_random)
 
-            hiter = self._hcache.iteritems({'custom_select': conditions, 'prefetch_size': config.prefetch_size})
+            hiter = self._hcache.iteritems({'custom_select': conditions, 'prefetch_size': config.prefetch_size,
+                                            'prefetch_parallelism': config.prefetch_parallelism,
+                                            'prefetch_page_size': config.prefetch_page_size})
         else:
-            hiter = self._hcache.iteritems(config.prefetch_size)
+            hiter = self._hcache.iteritems({'prefetch_size': config.prefetch_size,
+                                            'prefetch_parallelism': config.prefetch_parallelism,
+                                            'prefetch_page_size': config.prefetch_page_size})
 
         return NamedItemsIterator(self._key_builder, self._column_builder, self._k_size, hiter, self)
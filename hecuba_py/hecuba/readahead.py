@@ -0,0 +1,108 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Single background thread shared by all the arrays, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hecuba-readahead')
+        return _executor
+
+
+class ReadAhead(object):
+    """
+    Detects sweeps over the blocks of an array, consecutive requests whose first block moves by the same
+    stride, and loads in the background the blocks the next requests of the sweep are going to touch.
+    The stride is computed on the block coordinates, so rows, columns and tiles are detected whatever the
+    order (Z-order or Fortran order) used to store the blocks.
+    """
+
+    def __init__(self, grid, block_bytes, depth, memory, lock=None):
+        """
+        Args:
+            grid: number of blocks of each dimension of the array
+            block_bytes: size in bytes of a block
+            depth: max number of blocks read ahead and not requested yet
+            memory: max number of bytes read ahead and not requested yet
+            lock: reentrant lock serializing the loads with the flushes of the array, if any
+        """
+        self.grid = tuple(grid)
+        self.depth = max(0, min(depth, memory // max(1, block_bytes)))
+        self.hits = 0
+        self._lock = lock if lock is not None else threading.Lock()  # Serializes the loads of the array, foreground and background
+        self._last = None  # First block of the last request
+        self._stride = None  # Stride between the last two requests
+        self._ahead = {}  # Coordinates of the blocks read ahead and not requested yet -> future of their load
+
+    def run(self, load, coords):
+        """
+        Runs load(coords) excluding the loads done in the background
+        """
+        with self._lock:
+            return load(coords)
+
+    def claim(self, coords):
+        """
+        Waits for the loads in the background of the requested blocks
+        Args:
+            coords: coordinates of the blocks requested
+        Returns:
+            set with the coordinates of the requested blocks loaded by the read ahead
+        """
+        loaded = set()
+        for coord in coords:
+            future = self._ahead.pop(coord, None)
+            if future is not None and future.exception() is None:
+                loaded.add(coord)
+        self.hits += len(loaded)
+        return loaded
+
+    def access(self, coords, loaded, load):
+        """
+        Records a request and, if it continues a sweep, loads in the background the blocks of the
+        next requests of the sweep, up to the depth of the read ahead.
+        Args:
+            coords: coordinates of the blocks requested
+            loaded: set with the coordinates of the blocks already in memory
+            load: function loading a list of block coordinates
+        """
+        if not coords or self.depth == 0:
+            return
+        first = tuple(min(coord[dim] for coord in coords) for dim in range(len(self.grid)))
+        if first == self._last:  # Steps smaller than a block request the same blocks several times
+            return
+        stride = None if self._last is None else tuple(f - l for f, l in zip(first, self._last))
+        sweep = stride is not None and stride == self._stride
+        self._last = first
+        self._stride = stride
+        if not sweep:
+            return
+
+        budget = self.depth - len(self._ahead)
+        todo = []
+        step = 1
+        while budget > 0 and step <= self.depth:
+            inside = False
+            for coord in coords:
+                ahead = tuple(c + step * s for c, s in zip(coord, stride))
+                if not all(0 <= c < n for c, n in zip(ahead, self.grid)):
+                    continue
+                inside = True
+                if ahead in loaded or ahead in self._ahead or ahead in todo:
+                    continue
+                todo.append(ahead)
+                budget -= 1
+                if budget == 0:
+                    break
+            if not inside:  # The sweep reached the end of the array
+                break
+            step += 1
+        if todo:
+            future = _get_executor().submit(self.run, load, todo)
+            for coord in todo:
+                self._ahead[coord] = future
@@ -12,7 +12,9 @@ class NamedIterator:
         return self
 
     def __next__(self):
-        n = self.hiterator.get_next()
+        return self._build(self.hiterator.get_next())
+
+    def _build(self, n):
         if self.builder is not None:
             if self._storage_father._get_set_types() is not None:
                 nkeys = len(n) - len(self._storage_father._get_set_types())
@@ -37,7 +39,9 @@ class NamedItemsIterator:
         return self
 
     def __next__(self):
-        n = self.hiterator.get_next()
+        return self._build(self.hiterator.get_next())
+
+    def _build(self, n):
         if self.key_builder is None:
             k = n[0]
         else:
@@ -47,3 +51,27 @@ class NamedItemsIterator:
         else:
             v = self.column_builder(*n[self.k_size:])
         return self.builder(k, v)
+
+
+class BatchIterator:
+    # Class that allows to iterate over a dict in blocks of rows decoded column by column.
+    # Each block is a list of rows built like the ones of row_iterator, or when as_arrays is set,
+    # a dict of numpy arrays by column name ('arrow' returns a pyarrow RecordBatch instead)
+    def __init__(self, row_iterator, batch_size, names, as_arrays=False):
+        self.row_iterator = row_iterator
+        self.hiterator = row_iterator.hiterator
+        self.batch_size = batch_size
+        self.names = names
+        self.as_arrays = as_arrays
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        columns = self.hiterator.get_next_batch(self.batch_size)
+        if self.as_arrays == 'arrow':
+            import pyarrow as pa
+            return pa.RecordBatch.from_arrays([pa.array(column) for column in columns], names=self.names)
+        if self.as_arrays:
+            return dict(zip(self.names, columns))
+        return [self.row_iterator._build(row) for row in zip(*[column.tolist() for column in columns])]
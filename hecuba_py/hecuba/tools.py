@@ -39,6 +39,8 @@ def process_path(module_path):
 
 _size_estimates = config.session.prepare(("SELECT mean_partition_size, partitions_count "
                                           "FROM system.size_estimates WHERE keyspace_name=? and table_name=?"))
+_size_estimates_ranges = config.session.prepare(("SELECT range_start, range_end, partitions_count "
+                                                 "FROM system.size_estimates WHERE keyspace_name=? and table_name=?"))
 _max_token = int(((2 ** 63) - 1))  # type: int
 _min_token = int(-2 ** 63)  # type: int
 
@@ -129,6 +131,33 @@ def tokens_partitions(ksp, table, tokens_ranges):
             yield partition[i:i + group_size]
 
 
+def estimate_partitions(ksp, table, tokens_ranges):
+    """
+    Estimates the number of partitions of a table within some token ranges from system.size_estimates.
+    The estimates are local to the node answering the query and refreshed periodically, so the density
+    of partitions in the ranges it reports is extrapolated to the requested ranges.
+    Args:
+        ksp: keyspace name
+        table: table name
+        tokens_ranges: list of (start, end) token ranges
+    Returns:
+        the estimated number of partitions, 0 if there are no estimates yet
+    """
+    partitions = 0
+    width = 0
+    for range_start, range_end, partitions_count in config.session.execute(_size_estimates_ranges, [ksp, table]):
+        start, end = int(range_start), int(range_end)
+        if end <= start:  # wraps around the ring
+            width += (_max_token - start) + (end - _min_token)
+        else:
+            width += end - start
+        partitions += partitions_count
+    if not width:
+        return 0
+    requested = sum(end - start for start, end in tokens_ranges)
+    return int(round(partitions * requested / width))
+
+
 def generate_token_ring_ranges():
     ring = config.cluster.metadata.token_map.ring
     tokens = [token.value for token in ring]
@@ -0,0 +1,81 @@
+import threading
+
+import numpy as np
+
+
+class WriteBack(object):
+    """
+    Bitmap of the blocks of an array modified in memory and not stored yet. Instead of storing the blocks
+    on each modification, the modified blocks are stored once when flushed: at sync, when they are evicted
+    from memory, or by a timer some seconds after the first modification since the last flush. The blocks
+    must be modified and marked holding the lock, so the timer does not store a block being modified.
+    """
+
+    def __init__(self, grid, store, interval):
+        """
+        Args:
+            grid: number of blocks of each dimension of the array
+            store: function storing a list of block coordinates
+            interval: seconds after a modification the modified blocks are flushed, 0 to only flush them on demand
+        """
+        self.interval = interval
+        self.lock = threading.RLock()  # Also serializes the loads of the read ahead, see ReadAhead
+        self._store = store
+        self._dirty = np.zeros(tuple(grid), dtype=bool)
+        self._timer = None
+
+    def __contains__(self, coord):
+        return bool(self._dirty[coord])
+
+    def __len__(self):
+        return int(np.count_nonzero(self._dirty))
+
+    def mark_dirty(self, coords):
+        """
+        Records blocks modified in memory
+        Args:
+            coords: coordinates of the blocks modified
+        """
+        with self.lock:
+            for coord in coords:
+                self._dirty[coord] = True
+            if coords and self.interval > 0 and self._timer is None:
+                self._timer = threading.Timer(self.interval, self._expire)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _expire(self):
+        with self.lock:
+            self._timer = None
+            self.flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def flush(self, coords=None):
+        """
+        Stores the modified blocks. They are kept as modified if they can not be stored
+        Args:
+            coords: coordinates of the blocks to store if modified, None to store all the modified blocks
+        """
+        with self.lock:
+            if coords is None:
+                dirty = [tuple(int(c) for c in coord) for coord in np.argwhere(self._dirty)]
+            else:
+                dirty = [coord for coord in coords if self._dirty[coord]]
+            if dirty:
+                self._store(dirty)
+                for coord in dirty:
+                    self._dirty[coord] = False
+            if coords is None:
+                self._cancel_timer()
+
+    def discard(self):
+        """
+        Forgets the modified blocks without storing them
+        """
+        with self.lock:
+            self._dirty[...] = False
+            self._cancel_timer()
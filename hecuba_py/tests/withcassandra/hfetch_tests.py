@@ -33,6 +33,47 @@ class HfetchTests(unittest.TestCase):
 
         self.assertEqual(retrieved, last_value - 1)
 
+    def test_iter_prefetch_parallelism(self):
+        my_dict = ConcurrentDict("iter_parallel_dict")
+        nitems = 5000
+        for i in range(nitems):
+            my_dict[i] = i
+        my_dict.sync()
+
+        results = []
+        for parallelism in (1, 8):
+            it = my_dict._hcache.iteritems({'prefetch_size': 100, 'prefetch_parallelism': parallelism})
+            rows = []
+            while True:
+                try:
+                    rows.append(tuple(it.get_next()))
+                except StopIteration:
+                    break
+            results.append(rows)
+
+        self.assertEqual(len(results[0]), nitems)
+        # Ranges are consumed in the order they were issued, hence the same order
+        self.assertEqual(results[0], results[1])
+        my_dict.delete_persistent()
+
+    def test_iter_paging(self):
+        my_dict = ConcurrentDict("iter_paging_dict")
+        nitems = 5000
+        for i in range(nitems):
+            my_dict[i] = i
+        my_dict.sync()
+
+        # Pages much smaller than the token ranges
+        it = my_dict._hcache.iterkeys({'prefetch_size': 100, 'prefetch_page_size': 7})
+        keys = []
+        while True:
+            try:
+                keys.append(it.get_next()[0])
+            except StopIteration:
+                break
+        self.assertEqual(sorted(keys), list(range(nitems)))
+        my_dict.delete_persistent()
+
     def test_harray_metadata_init(self):
         base = np.arange(7 * 8 * 9 * 10).reshape((7, 8, 9, 10))
 
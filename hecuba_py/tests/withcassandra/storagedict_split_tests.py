@@ -1,8 +1,12 @@
 import unittest
 
+from mock import Mock
+
 from hecuba import config
+from hecuba import tools
 from hecuba.hdict import StorageDict
 from hecuba.storageobj import StorageObj
+from .. import test_config
 
 
 class SObj_Basic(StorageObj):
@@ -285,6 +289,45 @@ class StorageDictSplitTestbase(unittest.TestCase):
         self.assertEqual(count, ninserts)
         obj.delete_persistent()
 
+    def test_approx_len_on_split(self):
+        obj = SDict_SimpleTypeSpec("test_split_approx_len")
+        for i in range(10000):
+            obj[i] = str(f"test_split_approx_len{i}")
+        obj.sync()
+        # The estimates are computed from the sstables, otherwise only every few minutes
+        test_config.ccm_cluster.flush()
+        for node in test_config.ccm_cluster.nodes.values():
+            node.nodetool("refreshsizeestimates")
+
+        total = obj.approx_len()
+        self.assertGreater(total, 0)
+        real = len(obj)
+        chunks = [chunk.approx_len() for chunk in obj.split()]
+        self.assertGreater(len(chunks), 1)
+        # Each split estimates its own share of the table, and the shares add up to the whole
+        for chunk in chunks:
+            self.assertLess(chunk, total)
+        self.assertLessEqual(abs(sum(chunks) - total), len(chunks)) # Rounding of each split
+        self.assertLess(abs(sum(chunks) - real), 0.5 * real)
+        obj.delete_persistent()
+
+    def test_estimate_partitions(self):
+        quarter = (tools._max_token - tools._min_token) // 4
+        # 1000 partitions in a quarter of the ring and 500 in another quarter wrapping around its end
+        estimates = [(str(0), str(quarter), 1000),
+                     (str(tools._max_token - quarter // 2), str(tools._min_token + quarter // 2), 500)]
+        session = config.session
+        config.session = Mock(execute=Mock(return_value=estimates))
+        try:
+            self.assertEqual(tools.estimate_partitions("ksp", "table", [(0, quarter // 2)]), 375)
+            self.assertEqual(tools.estimate_partitions("ksp", "table",
+                                                       [(0, quarter // 4), (quarter, quarter + quarter // 4)]), 375)
+            self.assertEqual(tools.estimate_partitions("ksp", "table", [(tools._min_token, tools._max_token)]), 3000)
+            config.session.execute.return_value = []
+            self.assertEqual(tools.estimate_partitions("ksp", "table", [(0, quarter)]), 0)
+        finally:
+            config.session = session
+
     '''
     def test_remote_build_composed_iteritems(self):
          config.session.execute(
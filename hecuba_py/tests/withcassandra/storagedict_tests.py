@@ -117,6 +117,12 @@ class DictWithDateTimes2(StorageDict):
     '''
 
 
+class DictWithBlobs(StorageDict):
+    '''
+    @TypeSpec dict<<k:int>, v:bytearray>
+    '''
+
+
 class MyStorageDictB(StorageDict):
     '''
     @TypeSpec dict<<a:str, b:int>, c:int>
@@ -879,6 +885,152 @@ class StorageDictTest(unittest.TestCase):
         time.sleep(2)
         self.assertEquals(1, my_text.get('word', 0))
 
+    def test_get_many(self):
+        table_name = 'test_get_many'
+        pd = MyStorageDict(table_name)
+        nitems = 2000  # bigger than the default cache
+        for i in range(nitems):
+            pd[i] = i * 10
+        pd.sync()
+
+        pd = MyStorageDict(table_name)  # Empty cache
+        keys = list(range(nitems - 1, -10, -1))  # Reversed order and some missing keys
+        result = pd.get_many(keys, -1)
+        self.assertEqual(len(result), len(keys))
+        for key, val in zip(keys, result):
+            self.assertEqual(val, key * 10 if key >= 0 else -1)
+        # Second time, served from the cache
+        self.assertEqual(pd.get_many([5, 3, 1]), [50, 30, 10])
+        pd.delete_persistent()
+
+    def test_get_many_notpersistent(self):
+        my_dict = MyStorageDict()
+        my_dict[0] = 1
+        my_dict[2] = 3
+        self.assertEqual(my_dict.get_many([2, 1, 0]), [3, None, 1])
+
+    def test_put_many(self):
+        table_name = 'test_put_many'
+        pd = MyStorageDict(table_name)
+        nitems = 1000
+        pd.put_many([(i, i * 10) for i in range(nitems)])
+        pd.put_many(columns={'position': np.arange(nitems, 2 * nitems), 'val': np.arange(nitems, 2 * nitems) * 10})
+        pd.update({2 * nitems: 0})
+        pd.sync()
+
+        count, = config.session.execute('SELECT count(*) FROM ' + self.current_ksp + '.' + table_name)[0]
+        self.assertEqual(count, 2 * nitems + 1)
+        pd = MyStorageDict(table_name)
+        for i in range(2 * nitems):
+            self.assertEqual(pd[i], i * 10)
+        self.assertEqual(pd[2 * nitems], 0)
+        pd.delete_persistent()
+
+    def test_items_batches(self):
+        table_name = 'test_items_batches'
+        pd = MyStorageDict(table_name)
+        nitems = 1000
+        pd.put_many([(i, i * 10) for i in range(nitems)])
+        pd.sync()
+
+        batches = list(pd.items(batch_size=300, as_arrays=True))
+        self.assertEqual([len(batch['position']) for batch in batches], [300, 300, 300, 100])
+        positions = np.concatenate([batch['position'] for batch in batches])
+        vals = np.concatenate([batch['val'] for batch in batches])
+        self.assertEqual(positions.dtype, np.int32)
+        self.assertEqual(sorted(positions.tolist()), list(range(nitems)))
+        self.assertTrue(np.array_equal(vals, positions * 10))
+
+        rows = [row for batch in pd.items(batch_size=300) for row in batch]
+        self.assertEqual(sorted(rows), [(i, i * 10) for i in range(nitems)])
+        keys = np.concatenate([batch['position'] for batch in pd.keys(batch_size=128, as_arrays=True)])
+        self.assertEqual(sorted(keys.tolist()), list(range(nitems)))
+        values = [val for batch in pd.values(batch_size=128) for val in batch]
+        self.assertEqual(sorted(values), [i * 10 for i in range(nitems)])
+        pd.delete_persistent()
+
+    def test_stats(self):
+        import hecuba
+        pd = MyStorageDict('test_stats')
+        before = hecuba.stats()
+        for i in range(10):
+            pd[i] = i
+        pd.sync()
+        self.assertEqual(pd[1], 1)  # cached by the write
+        self.assertIsNone(pd.get(100))
+
+        stats = pd.stats()
+        self.assertEqual(stats['writes_queued'], 10)
+        self.assertEqual(stats['writes_completed'], 10)
+        self.assertEqual(stats['writes_pending'], 0)
+        self.assertEqual(stats['writes_in_flight'], 0)
+        self.assertGreaterEqual(stats['cache_hits'], 1)
+        self.assertGreaterEqual(stats['cache_misses'], 1)
+        self.assertGreaterEqual(stats['reads'], 1)
+        self.assertEqual(stats['latency']['write']['count'], 10)
+        self.assertEqual(sum(stats['latency']['write']['buckets'].values()), 10)
+        self.assertGreaterEqual(stats['cache_entries'], 10)
+        after = hecuba.stats()
+        self.assertGreaterEqual(after['writes_completed'] - before['writes_completed'], 10)
+        pd.delete_persistent()
+
+    def test_bloom_filter(self):
+        pd = MyStorageDict('test_bloom_filter')
+        for i in range(100):
+            pd[i] = i
+        pd.enable_bloom_filter(error_rate=0.001)
+        for i in range(100):
+            self.assertTrue(i in pd)
+        self.assertFalse(1000 in pd)
+        self.assertIsNone(pd.get(1000))
+        self.assertGreaterEqual(pd.stats()['bloom_filter_rejections'], 1)
+
+        pd[1000] = 5  # local writes are added to the filter
+        self.assertTrue(1000 in pd)
+        self.assertEqual(pd[1000], 5)
+        pd.put_many({2000: 1, 2001: 2})
+        self.assertEqual(pd.get_many([2000, 2001, 3000]), [1, 2, None])
+        self.assertEqual(pd.stats()['bloom_filter_keys'], 103)
+        pd.delete_persistent()
+
+    def test_negative_cache(self):
+        old = (config.negative_cache_size, config.negative_cache_ttl)
+        config.negative_cache_size = 100
+        config.negative_cache_ttl = 2000
+        try:
+            pd = MyStorageDict('test_negative_cache')
+            other = MyStorageDict('test_negative_cache')  # Writes the keys as another process would
+            hits = pd.stats()['negative_cache_hits']
+            self.assertIsNone(pd.get(1))
+            self.assertIsNone(pd.get(1))  # Answered by the negative cache
+            self.assertEqual(pd.stats()['negative_cache_hits'], hits + 1)
+
+            # Writes through another StorageDict are not seen until the entry expires
+            other[1] = 10
+            other.sync()
+            self.assertIsNone(pd.get(1))
+            self.assertEqual(pd.stats()['negative_cache_hits'], hits + 2)
+            time.sleep(2.5)
+            self.assertEqual(pd.get(1), 10)
+            self.assertEqual(pd.stats()['negative_cache_hits'], hits + 2)
+
+            # Local writes are seen at once
+            self.assertIsNone(pd.get(2))
+            pd[2] = 20
+            self.assertEqual(pd.get(2), 20)
+            self.assertEqual(pd.get_many([3, 4]), [None, None])
+            pd.put_many({3: 30, 4: 40})
+            self.assertEqual(pd.get_many([3, 4]), [30, 40])
+            hits = pd.stats()['negative_cache_hits']
+
+            # Deleted keys are remembered as missing
+            del pd[1]
+            self.assertIsNone(pd.get(1))
+            self.assertEqual(pd.stats()['negative_cache_hits'], hits + 1)
+            pd.delete_persistent()
+        finally:
+            config.negative_cache_size, config.negative_cache_ttl = old
+
     def test_keys(self):
         my_dict = MyStorageDict2('test_keys')
         # int,text - int
@@ -1487,5 +1639,20 @@ class StorageDictTest(unittest.TestCase):
         self.assertEqual(d[42].b.storage_id,  s.storage_id)
 
 
+    def test_blob_values_not_copied(self):
+        d = DictWithBlobs("test_blob_values_not_copied")
+        payload = bytes(range(256)) * 4096
+        d[0] = payload
+        d[1] = bytearray(b"small")
+        d.sync()
+        d = DictWithBlobs("test_blob_values_not_copied")
+        value = d[0]
+        self.assertIsInstance(value, memoryview)
+        self.assertTrue(value.readonly)
+        self.assertEqual(value, payload)
+        self.assertEqual(bytes(d[1]), b"small")
+        self.assertEqual(sorted(bytes(v) for v in d.values()), sorted([payload, b"small"]))
+
+
 if __name__ == '__main__':
     unittest.main()
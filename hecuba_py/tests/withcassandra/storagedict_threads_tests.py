@@ -0,0 +1,91 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from hecuba import config
+from hecuba.hdict import StorageDict
+
+
+class StorageDictThreadsTest(unittest.TestCase):
+    """
+    Multi-threaded StorageDict accesses. hfetch releases the GIL while it waits on Cassandra,
+    therefore the throughput of a pool of readers should grow with the number of threads.
+    """
+    num_keys = 20000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.old = config.execution_name
+        config.execution_name = "StorageDictThreadsTest".lower()
+        cls.tablename = config.execution_name + ".tb_threads"
+        config.session.execute("DROP TABLE IF EXISTS {}".format(cls.tablename))
+        pd = StorageDict(cls.tablename, [('pk1', 'int')], [('val1', 'text')])
+        for i in range(cls.num_keys):
+            pd[i] = 'ciao' + str(i)
+        pd.sync()
+
+    @classmethod
+    def tearDownClass(cls):
+        config.session.execute("DROP TABLE IF EXISTS {}".format(cls.tablename))
+        config.execution_name = cls.old
+
+    def _read_throughput(self, nthreads):
+        # A fresh instance starts with an empty cache, every access goes to Cassandra
+        pd = StorageDict(self.tablename, [('pk1', 'int')], [('val1', 'text')])
+        chunks = [range(t, self.num_keys, nthreads) for t in range(nthreads)]
+
+        def reader(keys):
+            for k in keys:
+                self.assertEqual(pd[k], 'ciao' + str(k))
+            return len(keys)
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            total = sum(executor.map(reader, chunks))
+        elapsed = time.time() - start
+        self.assertEqual(total, self.num_keys)
+        return total / elapsed
+
+    def test_getitem_setitem_threads(self):
+        # Readers and writers run concurrently on the same StorageDict and every access is correct
+        pd = StorageDict(self.tablename, [('pk1', 'int')], [('val1', 'text')])
+        nthreads = 8
+        written = range(self.num_keys, self.num_keys + 1000)
+
+        def reader(keys):
+            for k in keys:
+                self.assertEqual(pd[k], 'ciao' + str(k))
+            return len(keys)
+
+        def writer(keys):
+            for k in keys:
+                pd[k] = 'new' + str(k)
+            return len(keys)
+
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            reads = [executor.submit(reader, range(t, self.num_keys, nthreads // 2)) for t in range(nthreads // 2)]
+            writes = [executor.submit(writer, written[t::nthreads // 2]) for t in range(nthreads // 2)]
+            self.assertEqual(sum(f.result() for f in reads), self.num_keys)
+            self.assertEqual(sum(f.result() for f in writes), len(written))
+        pd.sync()
+
+        # The writes of every thread are visible, also from a fresh instance
+        pd = StorageDict(self.tablename, [('pk1', 'int')], [('val1', 'text')])
+        for k in written:
+            self.assertEqual(pd[k], 'new' + str(k))
+        for k in written:
+            del pd[k]
+
+    @unittest.skip("Only execute for performance reasons")
+    def test_getitem_scales_with_threads(self):
+        results = {}
+        for nthreads in (1, 2, 4, 8):
+            results[nthreads] = self._read_throughput(nthreads)
+        print("\nRESULTS:")
+        for nthreads, result in results.items():
+            print("StorageDict.__getitem__ {} threads: {:.0f} reads/s ({:.2f}x)".format(
+                nthreads, result, result / results[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
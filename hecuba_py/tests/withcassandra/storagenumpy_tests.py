@@ -1254,6 +1254,176 @@ class StorageNumpyTest(unittest.TestCase):
         z = s[:, 49]
         self.assertTrue(np.array_equal(z, n[:,49]))
 
+    def test_read_ahead_sweep(self):
+        n = np.arange(200*200).reshape(200,200)
+        s = StorageNumpy(n, "test_read_ahead_sweep")
+        s.sync()
+        del s
+        s = StorageNumpy(None, "test_read_ahead_sweep")
+        step = s._row_elem
+        for i in range(0, 200, step):
+            self.assertTrue(np.array_equal(s[i:i+step, :], n[i:i+step, :]))
+        if config.read_ahead_blocks > 0:
+            self.assertTrue(s._read_ahead.hits > 0)
+
+    def test_out_of_core(self):
+        n = np.arange(220*220, dtype=np.float64).reshape(220,220)
+        s = StorageNumpy(n, "test_out_of_core")
+        s.sync()
+        del s
+        old = config.numpy_cache_bytes
+        config.numpy_cache_bytes = 64 * 1024
+        try:
+            s = StorageNumpy(None, "test_out_of_core")
+            step = s._row_elem
+            for i in range(0, 220, step):
+                self.assertTrue(np.array_equal(s[i:i+step, :], n[i:i+step, :]))
+                s[i, 0] = -1
+            self.assertTrue(s._block_cache.evictions > 0)
+            s.sync()
+            del s
+        finally:
+            config.numpy_cache_bytes = old
+        n[::step, 0] = -1
+        s = StorageNumpy(None, "test_out_of_core")
+        self.assertTrue(np.array_equal(s, n))
+
+    def test_local_copy(self):
+        import tempfile
+        n = np.arange(100*100).reshape(100,100)
+        s = StorageNumpy(n, "test_local_copy")
+        s.sync()
+        del s
+        old = config.numpy_local_path
+        config.numpy_local_path = tempfile.mkdtemp()
+        try:
+            s = StorageNumpy(None, "test_local_copy")
+            self.assertTrue(np.array_equal(s[0:10, :], n[0:10, :]))
+            coords = s.calculate_block_coords((slice(0, 10), slice(None, None)))
+            del s
+            # Another StorageNumpy of the node finds the blocks already loaded
+            s = StorageNumpy(None, "test_local_copy")
+            self.assertEqual(s._local_copy.missing(coords), [])
+            self.assertTrue(np.array_equal(s[0:10, :], n[0:10, :]))
+            self.assertTrue(np.array_equal(s, n))
+            # The other processes of the node read the modified blocks from the database until synced
+            s[0, 0] = -1
+            s._hcache.wait()
+            modified = s.calculate_block_coords((slice(0, 1), slice(0, 1)))
+            other = StorageNumpy(None, "test_local_copy")
+            self.assertEqual(other._local_copy.missing(modified), modified)
+            self.assertEqual(other[0, 0], -1)
+            s.sync()
+            other = StorageNumpy(None, "test_local_copy")
+            self.assertEqual(other._local_copy.missing(modified), [])
+            self.assertEqual(other[0, 0], -1)
+            s.delete_persistent()
+        finally:
+            config.numpy_local_path = old
+
+    def test_compression(self):
+        n = np.arange(100*100, dtype=np.float64).reshape(100,100)
+        tested = 0
+        for compression, shuffle in (('lz4', False), ('zstd', False), ('zstd', True)):
+            name = "test_compression_{}_{}".format(compression, int(shuffle))
+            m = n.copy()
+            try:
+                s = StorageNumpy(m, name, compression=compression, shuffle=shuffle)
+            except RuntimeError as ex: # The codecs are optional in the build
+                if "built without" not in str(ex):
+                    raise
+                continue
+            tested += 1
+            s.sync()
+            del s
+            s = StorageNumpy(None, name)
+            partition_type = s._build_args.metas.partition_type
+            self.assertEqual(partition_type & 0x30, StorageNumpy.COMPRESSION_CODECS[compression])
+            self.assertEqual(bool(partition_type & StorageNumpy.COMPRESSION_SHUFFLE), shuffle)
+            self.assertTrue(np.array_equal(s[0:10, 20:30], m[0:10, 20:30]))
+            self.assertTrue(np.array_equal(s, m))
+            # Modified blocks are compressed again
+            s[50, 50] = -1
+            m[50, 50] = -1
+            s.sync()
+            del s
+            s = StorageNumpy(None, name)
+            self.assertTrue(np.array_equal(s, m))
+            s.delete_persistent()
+        with self.assertRaises(ValueError):
+            StorageNumpy(n, "test_compression_unknown", compression="gzip")
+        if not tested:
+            self.skipTest("Hecuba was built without lz4 and zstd support")
+
+    @unittest.skip("Only execute for performance reasons")
+    def test_performance_compression(self):
+        # Compare the time to load an array stored raw and compressed
+        TIMES = 5
+        n = np.linspace(0, 1, 4000*1000).reshape(4000, 1000)
+        times = {}
+        for compression, shuffle in (('none', False), ('lz4', False), ('lz4', True), ('zstd', True)):
+            name = "test_performance_compression_{}_{}".format(compression, int(shuffle))
+            o = StorageNumpy(n, name, compression=compression, shuffle=shuffle)
+            o.sync()
+            del o
+            times[name] = []
+            for i in range(TIMES):
+                start = timer()
+                o = StorageNumpy(None, name)
+                o[:]
+                times[name].append(timer() - start)
+                self.assertTrue(np.array_equal(o, n))
+                del o
+
+        print("\nRESULTS:")
+        for name, t in times.items():
+            print("{} = min {:.3f}s".format(name, min(t)), t)
+        print("\n")
+
+    def test_write_back(self):
+        import time
+        n = np.arange(100*100).reshape(100,100)
+        s = StorageNumpy(n, "test_write_back")
+        s.sync()
+        del s
+        old = (config.numpy_write_back, config.numpy_flush_interval)
+        config.numpy_write_back = True
+        config.numpy_flush_interval = 0
+        try:
+            s = StorageNumpy(None, "test_write_back")
+            for i in range(10): # The same block is stored once
+                s[1, 1] = i
+            n[1, 1] = 9
+            self.assertEqual(len(s._write_back), 1)
+            s[:, 99] += 1
+            n[:, 99] += 1
+            self.assertGreater(len(s._write_back), 1)
+            s += 1 # All the blocks of the output are stored
+            n += 1
+            self.assertEqual(len(s._write_back), s._n_blocks)
+            s.sync()
+            self.assertEqual(len(s._write_back), 0)
+            del s
+            s = StorageNumpy(None, "test_write_back")
+            self.assertTrue(np.array_equal(s, n))
+            del s
+
+            # The modified blocks are stored by the timer
+            config.numpy_flush_interval = 0.5
+            s = StorageNumpy(None, "test_write_back")
+            s[50, 50] = -1
+            n[50, 50] = -1
+            self.assertEqual(len(s._write_back), 1)
+            time.sleep(2)
+            self.assertEqual(len(s._write_back), 0)
+            s._hcache.wait()
+            del s
+            s = StorageNumpy(None, "test_write_back")
+            self.assertTrue(np.array_equal(s, n))
+            s.delete_persistent()
+        finally:
+            config.numpy_write_back, config.numpy_flush_interval = old
+
     def test_subclass(self):
         from hecuba import StorageStream
         n = np.arange(50*50).reshape(50,50)